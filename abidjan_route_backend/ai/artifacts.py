@@ -0,0 +1,94 @@
+"""
+Stockage versionné des modèles entraînés
+
+    AI_MODEL_DIR/
+    └── fare/
+        ├── 20261019T093000.joblib
+        └── 20261020T093000.joblib
+
+La version est l'horodatage UTC de l'entraînement. Le fichier CURRENT de
+chaque répertoire désigne la version active (à défaut : la plus récente) ;
+le modifier suffit à basculer les processus en service (ai/registry.py).
+"""
+
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+
+
+def model_dir(kind):
+    return Path(settings.AI_MODEL_DIR) / kind
+
+
+def new_version():
+    return datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')
+
+
+def list_versions(kind):
+    directory = model_dir(kind)
+    if not directory.is_dir():
+        return []
+    return sorted(path.stem for path in directory.glob('*.joblib'))
+
+
+def artifact_path(kind, version):
+    return model_dir(kind) / f"{version}.joblib"
+
+
+def current_path(kind):
+    return model_dir(kind) / 'CURRENT'
+
+
+def active_version(kind):
+    """Version désignée par CURRENT, sinon la plus récente ; None si aucun modèle"""
+    try:
+        version = current_path(kind).read_text().strip()
+    except FileNotFoundError:
+        version = None
+    if version:
+        return version
+    versions = list_versions(kind)
+    return versions[-1] if versions else None
+
+
+def activate_version(kind, version):
+    """Fait pointer CURRENT sur `version` (remplacement atomique du fichier)"""
+    if not artifact_path(kind, version).exists():
+        raise FileNotFoundError(f"Aucun artefact {kind} en version {version}")
+    tmp = current_path(kind).with_suffix('.tmp')
+    tmp.write_text(version)
+    tmp.replace(current_path(kind))
+
+
+def save_artifact(kind, payload, activate=True):
+    """
+    Écrit `payload` (dict de tableaux NumPy et métadonnées) sans compression,
+    pour pouvoir le relire en mémoire partagée (mmap). Renvoie la version.
+    """
+    import joblib
+
+    version = payload.setdefault('version', new_version())
+    path = artifact_path(kind, version)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    joblib.dump(payload, tmp)
+    tmp.replace(path)
+    if activate:
+        activate_version(kind, version)
+    return version
+
+
+def load_artifact(kind, version=None, mmap=True):
+    """
+    Charge une version (par défaut la version active) ; None si aucun modèle.
+
+    Avec mmap, les tableaux NumPy sont projetés en lecture seule depuis le
+    fichier : les workers d'un même serveur partagent les mêmes pages.
+    """
+    import joblib
+
+    version = version or active_version(kind)
+    if version is None:
+        return None
+    return joblib.load(artifact_path(kind, version), mmap_mode='r' if mmap else None)
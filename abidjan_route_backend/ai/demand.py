@@ -0,0 +1,139 @@
+"""
+Prévision de la demande de recherches et préchauffage du cache d'itinéraires
+
+Pour une heure cible (ex. lundi 7h), le nombre de recherches attendu par
+(origine, destination, critère) combine :
+- la saisonnalité hebdomadaire : les recherches du même jour à la même heure
+  sur les WEEKS dernières semaines, en moyenne pondérée à décroissance
+  exponentielle (demi-vie HALF_LIFE_WEEKS) ;
+- la tendance récente : la même heure sur les 7 derniers jours.
+
+Les prévisions sont enregistrées dans DemandForecast, puis prewarm_routes()
+calcule et met en cache les itinéraires des trajets les plus attendus avant
+que la pointe n'arrive (voir la commande forecast_demand).
+"""
+
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import ExtractHour, ExtractIsoWeekDay, TruncDate
+from django.utils import timezone
+
+from core.models import DemandForecast, SearchHistory
+from transport.planner import plan_route_cached
+
+
+logger = logging.getLogger(__name__)
+
+WEEKS = 8
+HALF_LIFE_WEEKS = 2.0
+SEASONAL_WEIGHT = 0.7
+RECENT_DAYS = 7
+
+
+def hour_bucket(value):
+    """Début de l'heure locale contenant `value`"""
+    return timezone.localtime(value).replace(minute=0, second=0, microsecond=0)
+
+
+def _week_weight(weeks_ago):
+    return 0.5 ** ((weeks_ago - 1) / HALF_LIFE_WEEKS)
+
+
+def forecast_bucket(bucket_start, weeks=WEEKS):
+    """{(origine, destination, critère): recherches attendues} pour une heure"""
+    bucket_start = hour_bucket(bucket_start)
+    keys = ('origin_id', 'destination_id', 'search_criteria')
+
+    seasonal = defaultdict(float)
+    same_slot = (
+        SearchHistory.objects
+        .filter(search_date__gte=bucket_start - timedelta(weeks=weeks), search_date__lt=bucket_start)
+        .annotate(weekday=ExtractIsoWeekDay('search_date'), hour=ExtractHour('search_date'))
+        .filter(weekday=bucket_start.isoweekday(), hour=bucket_start.hour)
+        .annotate(day=TruncDate('search_date'))
+        .values(*keys, 'day')
+        .annotate(searches=Count('id'))
+    )
+    for row in same_slot:
+        weeks_ago = max(1, round((bucket_start.date() - row['day']).days / 7))
+        seasonal[tuple(row[key] for key in keys)] += _week_weight(weeks_ago) * row['searches']
+    total_weight = sum(_week_weight(k) for k in range(1, weeks + 1))
+
+    recent = defaultdict(float)
+    same_hour = (
+        SearchHistory.objects
+        .filter(search_date__gte=bucket_start - timedelta(days=RECENT_DAYS), search_date__lt=bucket_start)
+        .annotate(hour=ExtractHour('search_date'))
+        .filter(hour=bucket_start.hour)
+        .values(*keys)
+        .annotate(searches=Count('id'))
+    )
+    for row in same_hour:
+        recent[tuple(row[key] for key in keys)] = row['searches'] / RECENT_DAYS
+
+    return {
+        key: SEASONAL_WEIGHT * seasonal[key] / total_weight + (1 - SEASONAL_WEIGHT) * recent[key]
+        for key in set(seasonal) | set(recent)
+    }
+
+
+def forecast_demand(bucket_start, limit=200):
+    """Calcule et enregistre les `limit` combinaisons les plus attendues ; renvoie les prévisions"""
+    bucket_start = hour_bucket(bucket_start)
+    scores = forecast_bucket(bucket_start)
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+    forecasts = [
+        DemandForecast(
+            bucket_start=bucket_start,
+            origin_id=origin_id,
+            destination_id=destination_id,
+            search_criteria=criteria,
+            expected_searches=round(expected, 3),
+            rank=rank,
+        )
+        for rank, ((origin_id, destination_id, criteria), expected) in enumerate(ranked, start=1)
+    ]
+    with transaction.atomic():
+        DemandForecast.objects.filter(bucket_start=bucket_start).delete()
+        DemandForecast.objects.bulk_create(forecasts)
+    return forecasts
+
+
+def prewarm_routes(bucket_start, limit=None, progress=None):
+    """
+    Calcule et met en cache les itinéraires prévus pour l'heure `bucket_start`,
+    par ordre de demande attendue. Renvoie le nombre de trajets préchauffés ;
+    `progress(done, total)` est appelé après chaque trajet, `total` étant le
+    nombre de paires origine/destination à préchauffer.
+    """
+    bucket_start = hour_bucket(bucket_start)
+    forecasts = (
+        DemandForecast.objects
+        .filter(bucket_start=bucket_start)
+        .select_related('origin', 'destination')
+        .order_by('rank')
+    )
+    # Première prévision (meilleur rang) de chaque paire, dans la limite demandée
+    targets = {}
+    for forecast in forecasts:
+        if limit is not None and len(targets) >= limit:
+            break
+        targets.setdefault((forecast.origin_id, forecast.destination_id), forecast)
+
+    total = len(targets)
+    for done, (pair, forecast) in enumerate(targets.items(), start=1):
+        try:
+            plan_route_cached(
+                forecast.origin, forecast.destination,
+                criteria=forecast.search_criteria, depart_at=bucket_start, refresh=True,
+            )
+        except Exception:
+            logger.exception("Préchauffage impossible pour %s -> %s", *pair)
+        if progress is not None:
+            progress(done, total)
+    return total
@@ -0,0 +1,185 @@
+"""
+Estimation des durées de trajet (ETA)
+
+Entraînement :
+- TrafficData donne une table de vitesses médianes (lieu x jour x heure),
+  complétée par le profil global jour x heure là où les mesures manquent ;
+- RouteSegment donne, pour chaque mode, la relation entre la durée observée
+  d'un segment et le temps « trafic » (distance / vitesse du lieu) :
+      durée = overhead[mode] + factor[mode] * distance / vitesse * 60
+  Les modes sans segments (taxi, woro...) roulent à leur average_speed
+  dans un trafic typique et suivent la congestion.
+
+L'artefact ne contient que ces tableaux ; EtaPredictor.predict() calcule la
+durée de tous les tronçons de toutes les options d'une recherche en quelques
+opérations NumPy.
+"""
+
+import numpy as np
+from django.utils import timezone
+
+from core.models import RouteSegment, TrafficData, TransportMode
+
+from .artifacts import load_artifact, save_artifact
+
+
+KIND = 'eta'
+
+# Vitesse de repli (km/h) si aucune mesure de trafic n'existe
+DEFAULT_SPEED_KMH = 20.0
+# Heures de journée utilisées pour la vitesse « typique » d'un lieu
+DAYTIME_HOURS = slice(6, 22)
+
+
+# ============================================================================
+# ENTRAÎNEMENT
+# ============================================================================
+
+def _median_table(frame, keys, shape, min_samples):
+    """Médiane de average_speed_kmh par clés, dans un tableau NaN là où n < min_samples"""
+    table = np.full(shape, np.nan)
+    grouped = frame.groupby(keys)['speed'].agg(['median', 'count'])
+    grouped = grouped[grouped['count'] >= min_samples]
+    if len(grouped):
+        index = tuple(grouped.index.get_level_values(level).to_numpy() for level in range(len(keys)))
+        table[index] = grouped['median'].to_numpy()
+    return table
+
+
+def build_speed_tables(min_samples=5):
+    """Tables de vitesses (lieux, vitesse[lieu, jour, heure], profil global[jour, heure])"""
+    import pandas as pd
+
+    rows = TrafficData.objects.values_list(
+        'location_id', 'day_of_week', 'hour_of_day', 'average_speed_kmh'
+    ).iterator(chunk_size=20000)
+    frame = pd.DataFrame.from_records(rows, columns=['location', 'dow', 'hour', 'speed'])
+    frame['speed'] = frame['speed'].astype(float)
+    frame = frame[frame['speed'] > 0]
+
+    locations = sorted(str(pk) for pk in frame['location'].unique())
+    location_index = {pk: index for index, pk in enumerate(locations)}
+    frame['loc'] = frame['location'].map(lambda pk: location_index[str(pk)])
+
+    overall = float(frame['speed'].median()) if len(frame) else DEFAULT_SPEED_KMH
+    global_table = _median_table(frame, ['dow', 'hour'], (7, 24), min_samples)
+    global_table = np.where(np.isnan(global_table), overall, global_table)
+
+    speed = _median_table(frame, ['loc', 'dow', 'hour'], (len(locations), 7, 24), min_samples)
+    # Repli : profil horaire du lieu tous jours confondus, puis profil global
+    by_hour = _median_table(frame, ['loc', 'hour'], (len(locations), 24), min_samples)
+    speed = np.where(np.isnan(speed), by_hour[:, None, :], speed)
+    speed = np.where(np.isnan(speed), global_table[None, :, :], speed)
+    return locations, speed.astype(np.float32), global_table.astype(np.float32)
+
+
+def fit_mode_coefficients(locations, speed, global_table, min_samples=10):
+    """(modes, overhead, factor) ajustés sur les durées de RouteSegment"""
+    location_index = {pk: index for index, pk in enumerate(locations)}
+    typical_by_location = np.nanmedian(speed[:, :, DAYTIME_HOURS], axis=(1, 2)) if len(locations) \
+        else np.zeros(0)
+    typical_global = float(np.median(global_table[:, DAYTIME_HOURS]))
+
+    modes = list(TransportMode.objects.order_by('slug').values_list('slug', 'average_speed'))
+    slugs = [slug for slug, _ in modes]
+    overhead = np.zeros(len(slugs))
+    factor = np.array([
+        typical_global / float(average_speed) if average_speed else 1.0
+        for _, average_speed in modes
+    ])
+
+    segments = RouteSegment.objects.values_list(
+        'transport_route__transport_mode__slug',
+        'from_stop__location_id',
+        'distance_km',
+        'duration_minutes',
+    ).iterator(chunk_size=20000)
+    samples = {}
+    for slug, location_id, distance, duration in segments:
+        index = location_index.get(str(location_id))
+        typical = typical_by_location[index] if index is not None else typical_global
+        if distance and typical > 0:
+            samples.setdefault(slug, []).append((float(distance) / typical * 60, float(duration)))
+
+    for index, slug in enumerate(slugs):
+        points = samples.get(slug, [])
+        if len(points) < min_samples:
+            continue
+        traffic_minutes, durations = np.array(points).T
+        A = np.column_stack([np.ones_like(traffic_minutes), traffic_minutes])
+        (intercept, slope), *_ = np.linalg.lstsq(A, durations, rcond=None)
+        if slope > 0:
+            overhead[index] = max(intercept, 0.0)
+            factor[index] = slope
+
+    return slugs, overhead, factor
+
+
+def train_eta_model(min_traffic_samples=5, min_segment_samples=10):
+    locations, speed, global_table = build_speed_tables(min_samples=min_traffic_samples)
+    modes, overhead, factor = fit_mode_coefficients(
+        locations, speed, global_table, min_samples=min_segment_samples
+    )
+    return {
+        'kind': KIND,
+        'locations': locations,
+        'speed': speed,
+        'global_speed': global_table,
+        'modes': modes,
+        'overhead': overhead.astype(np.float32),
+        'factor': factor.astype(np.float32),
+        'trained_at': timezone.now().isoformat(),
+    }
+
+
+def save_eta_model(payload):
+    return save_artifact(KIND, payload)
+
+
+# ============================================================================
+# SERVICE
+# ============================================================================
+
+class EtaPredictor:
+    """Durées vectorisées (minutes) à partir d'un artefact chargé"""
+
+    def __init__(self, payload):
+        self.version = payload['version']
+        self.location_index = {pk: index for index, pk in enumerate(payload['locations'])}
+        self.mode_index = {slug: index for index, slug in enumerate(payload['modes'])}
+        self.speed = payload['speed']
+        self.global_speed = payload['global_speed']
+        self.overhead = payload['overhead']
+        self.factor = payload['factor']
+
+    @classmethod
+    def load(cls, version=None):
+        payload = load_artifact(KIND, version)
+        return cls(payload) if payload is not None else None
+
+    def predict(self, modes, distance_km, location_ids, hour, day_of_week):
+        """
+        Durée en minutes de chaque tronçon : `modes` (slugs), `distance_km`
+        et `location_ids` (lieu de départ du tronçon) sont alignés ;
+        `hour` et `day_of_week` sont scalaires ou alignés.
+        Un mode inconnu de l'artefact renvoie NaN.
+        """
+        distance_km = np.asarray(distance_km, dtype=np.float64)
+        n = len(distance_km)
+        mode = np.fromiter((self.mode_index.get(slug, -1) for slug in modes), dtype=np.intp, count=n)
+        location = np.fromiter(
+            (self.location_index.get(str(pk), -1) for pk in location_ids), dtype=np.intp, count=n
+        )
+        hour = np.broadcast_to(np.asarray(hour, dtype=np.intp) % 24, n)
+        day_of_week = np.broadcast_to(np.asarray(day_of_week, dtype=np.intp) % 7, n)
+
+        global_speed = self.global_speed[day_of_week, hour]
+        if len(self.speed):
+            local_speed = self.speed[np.maximum(location, 0), day_of_week, hour]
+            speed = np.where(location >= 0, local_speed, global_speed)
+        else:
+            speed = global_speed
+
+        safe_mode = np.maximum(mode, 0)
+        minutes = self.overhead[safe_mode] + self.factor[safe_mode] * distance_km / speed * 60
+        return np.where(mode >= 0, minutes, np.nan)
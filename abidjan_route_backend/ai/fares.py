@@ -0,0 +1,149 @@
+"""
+Estimation des prix par mode de transport
+
+Entraînement : une régression Ridge par mode sur PriceHistory
+(distance, heure, week-end ; voir ai/features.py). Seuls les coefficients
+sont conservés dans l'artefact, une matrice (modes x variables).
+
+Service : FarePredictor.predict() estime en un seul produit matriciel les
+prix de toutes les options d'une recherche. Les modes sans modèle (pas assez
+d'observations) retombent sur le tarif TransportMode : base + prix/km.
+"""
+
+from datetime import timedelta
+
+import numpy as np
+from django.utils import timezone
+
+from core.models import PriceHistory, TransportMode
+
+from .artifacts import load_artifact, save_artifact
+from .features import FARE_FEATURES, fare_design_matrix
+
+
+KIND = 'fare'
+
+
+# ============================================================================
+# ENTRAÎNEMENT
+# ============================================================================
+
+def load_training_frame(since_days=None):
+    """Observations de prix sous forme de DataFrame (mode, prix, distance, date)"""
+    import pandas as pd
+
+    queryset = PriceHistory.objects.all()
+    if since_days:
+        queryset = queryset.filter(recorded_at__gte=timezone.now() - timedelta(days=since_days))
+    rows = queryset.values_list(
+        'transport_mode__slug', 'price', 'distance_km', 'recorded_at'
+    ).iterator(chunk_size=10000)
+    frame = pd.DataFrame.from_records(rows, columns=['mode', 'price', 'distance_km', 'recorded_at'])
+    frame['price'] = frame['price'].astype(float)
+    frame['distance_km'] = frame['distance_km'].astype(float)
+    recorded_at = pd.to_datetime(frame['recorded_at'], utc=True)
+    frame['hour'] = recorded_at.dt.hour + recorded_at.dt.minute / 60
+    frame['day_of_week'] = recorded_at.dt.dayofweek
+    return frame
+
+
+def train_fare_model(frame=None, since_days=None, min_samples=30, alpha=1.0, seed=0):
+    """
+    Entraîne un modèle par mode et renvoie le dictionnaire de l'artefact
+    (non sauvegardé, voir save_fare_model).
+    """
+    from sklearn.linear_model import Ridge
+    from sklearn.model_selection import train_test_split
+
+    if frame is None:
+        frame = load_training_frame(since_days=since_days)
+
+    modes = list(TransportMode.objects.order_by('slug').values_list(
+        'slug', 'base_price', 'price_per_km'
+    ))
+    slugs = [slug for slug, _, _ in modes]
+    coef = np.zeros((len(slugs), len(FARE_FEATURES)))
+    trained = np.zeros(len(slugs), dtype=bool)
+    fallback = np.array([[float(base), float(per_km)] for _, base, per_km in modes]).reshape(-1, 2)
+    metrics = {}
+
+    for index, slug in enumerate(slugs):
+        subset = frame[frame['mode'] == slug]
+        if len(subset) < min_samples:
+            metrics[slug] = {'samples': int(len(subset)), 'trained': False}
+            continue
+
+        X = fare_design_matrix(subset['distance_km'], subset['hour'], subset['day_of_week'])
+        y = subset['price'].to_numpy(dtype=np.float64)
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=seed)
+
+        model = Ridge(alpha=alpha, fit_intercept=False).fit(X_train, y_train)
+        mae = float(np.mean(np.abs(model.predict(X_test) - y_test)))
+        model.fit(X, y)
+
+        coef[index] = model.coef_
+        trained[index] = True
+        metrics[slug] = {'samples': int(len(subset)), 'trained': True, 'mae_fcfa': round(mae, 1)}
+
+    return {
+        'kind': KIND,
+        'features': FARE_FEATURES,
+        'modes': slugs,
+        'coef': coef,
+        'trained': trained,
+        'fallback': fallback,
+        'metrics': metrics,
+        'trained_at': timezone.now().isoformat(),
+    }
+
+
+def save_fare_model(payload):
+    return save_artifact(KIND, payload)
+
+
+# ============================================================================
+# SERVICE
+# ============================================================================
+
+class FarePredictor:
+    """Estimation vectorisée des prix à partir d'un artefact chargé"""
+
+    def __init__(self, payload):
+        self.version = payload['version']
+        self.modes = list(payload['modes'])
+        self.mode_index = {slug: index for index, slug in enumerate(self.modes)}
+        self.coef = payload['coef']
+        self.trained = payload['trained']
+        self.fallback = payload['fallback']
+
+    @classmethod
+    def load(cls, version=None):
+        payload = load_artifact(KIND, version)
+        return cls(payload) if payload is not None else None
+
+    def predict(self, modes, distance_km, hour, day_of_week):
+        """
+        Prix estimés en FCFA (entiers) pour des options décrites par
+        `modes` (slugs) et `distance_km` ; `hour` (0-23) et `day_of_week`
+        (0 = lundi) sont scalaires ou alignés sur les options.
+        Un mode inconnu de l'artefact renvoie NaN.
+        """
+        distance_km = np.asarray(distance_km, dtype=np.float64)
+        index = np.fromiter(
+            (self.mode_index.get(slug, -1) for slug in modes),
+            dtype=np.intp,
+            count=len(distance_km),
+        )
+        known = index >= 0
+        safe_index = np.where(known, index, 0)
+
+        X = fare_design_matrix(distance_km, hour, day_of_week)
+        learned = np.einsum('ij,ij->i', self.coef[safe_index], X)
+        base, per_km = self.fallback[safe_index, 0], self.fallback[safe_index, 1]
+        tariff = base + per_km * distance_km
+
+        prices = np.where(self.trained[safe_index], learned, tariff)
+        # Jamais en dessous du prix de base du mode
+        prices = np.maximum(prices, base)
+        prices = np.where(known, np.rint(prices), np.nan)
+        return prices
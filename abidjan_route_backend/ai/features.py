@@ -0,0 +1,31 @@
+"""
+Variables explicatives partagées par les modèles (prix, durées)
+
+Toutes les fonctions travaillent sur des tableaux NumPy pour traiter en un
+appel toutes les options d'une recherche.
+"""
+
+import numpy as np
+
+
+FARE_FEATURES = ['intercept', 'distance_km', 'hour_sin', 'hour_cos', 'weekend']
+
+
+def hour_cycle(hour):
+    """Encode l'heure (0-23, éventuellement fractionnaire) sur le cercle"""
+    angle = np.asarray(hour, dtype=np.float64) * (2 * np.pi / 24)
+    return np.sin(angle), np.cos(angle)
+
+
+def weekend_flag(day_of_week):
+    """1.0 le samedi et le dimanche (0 = lundi), 0.0 sinon"""
+    return (np.asarray(day_of_week) >= 5).astype(np.float64)
+
+
+def fare_design_matrix(distance_km, hour, day_of_week):
+    """Matrice (n, len(FARE_FEATURES)) ; hour et day_of_week peuvent être scalaires"""
+    distance_km = np.asarray(distance_km, dtype=np.float64)
+    n = distance_km.shape[0]
+    hour_sin, hour_cos = hour_cycle(np.broadcast_to(hour, n))
+    weekend = weekend_flag(np.broadcast_to(day_of_week, n))
+    return np.column_stack([np.ones(n), distance_km, hour_sin, hour_cos, weekend])
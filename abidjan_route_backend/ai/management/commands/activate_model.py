@@ -0,0 +1,39 @@
+"""
+Active une version de modèle (bascule à chaud ou retour arrière).
+
+Usage:
+    python manage.py activate_model fare --list
+    python manage.py activate_model fare 20261019T093000
+
+Les processus en service chargent la nouvelle version dans les
+AI_MODEL_CHECK_INTERVAL secondes, sans redémarrage.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ai import artifacts
+from ai.registry import PREDICTORS
+
+
+class Command(BaseCommand):
+    help = "Active une version d'un modèle entraîné"
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=list(PREDICTORS))
+        parser.add_argument('version', nargs='?', help="Version à activer")
+        parser.add_argument('--list', action='store_true', help="Liste les versions disponibles")
+
+    def handle(self, *args, **options):
+        kind = options['kind']
+        if options['list'] or not options['version']:
+            active = artifacts.active_version(kind)
+            for version in artifacts.list_versions(kind):
+                marker = '*' if version == active else ' '
+                self.stdout.write(f"{marker} {version}")
+            return
+
+        try:
+            artifacts.activate_version(kind, options['version'])
+        except FileNotFoundError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(f"{kind}: version {options['version']} active"))
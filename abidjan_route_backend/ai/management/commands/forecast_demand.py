@@ -0,0 +1,45 @@
+"""
+Prévoit la demande de recherches pour les prochaines heures et précalcule
+les itinéraires correspondants.
+
+Usage:
+    python manage.py forecast_demand --prewarm
+    python manage.py forecast_demand --hours-ahead 3 --limit 500
+
+À planifier chaque heure, avant le début de l'heure suivante.
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ai.demand import forecast_demand, hour_bucket, prewarm_routes
+
+
+class Command(BaseCommand):
+    help = "Prévoit les trajets les plus demandés et préchauffe le cache d'itinéraires"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours-ahead',
+            type=int,
+            default=1,
+            help="Nombre d'heures à venir à prévoir (à partir de l'heure suivante)",
+        )
+        parser.add_argument('--limit', type=int, default=200, help="Combinaisons retenues par heure")
+        parser.add_argument(
+            '--prewarm',
+            action='store_true',
+            help="Calcule et met en cache les itinéraires prévus",
+        )
+
+    def handle(self, *args, **options):
+        next_hour = hour_bucket(timezone.now()) + timedelta(hours=1)
+        for offset in range(options['hours_ahead']):
+            bucket = next_hour + timedelta(hours=offset)
+            forecasts = forecast_demand(bucket, limit=options['limit'])
+            message = f"{bucket:%Y-%m-%d %Hh}: {len(forecasts)} combinaisons prévues"
+            if options['prewarm']:
+                message += f", {prewarm_routes(bucket)} itinéraires préchauffés"
+            self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,41 @@
+"""
+Entraîne le modèle de durées (ETA) et sauvegarde un artefact versionné.
+
+Usage:
+    python manage.py train_eta_model
+    python manage.py train_eta_model --min-traffic-samples 10
+"""
+
+from django.core.management.base import BaseCommand
+
+from ai.eta import save_eta_model, train_eta_model
+
+
+class Command(BaseCommand):
+    help = "Entraîne le modèle de durées à partir de TrafficData et RouteSegment"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-traffic-samples',
+            type=int,
+            default=5,
+            help="Mesures minimales par (lieu, jour, heure) pour retenir une médiane",
+        )
+        parser.add_argument(
+            '--min-segment-samples',
+            type=int,
+            default=10,
+            help="Segments minimaux pour ajuster les coefficients d'un mode",
+        )
+
+    def handle(self, *args, **options):
+        payload = train_eta_model(
+            min_traffic_samples=options['min_traffic_samples'],
+            min_segment_samples=options['min_segment_samples'],
+        )
+        version = save_eta_model(payload)
+
+        self.stdout.write(f"  {len(payload['locations'])} lieux avec mesures de trafic")
+        for slug, overhead, factor in zip(payload['modes'], payload['overhead'], payload['factor']):
+            self.stdout.write(f"  {slug}: {overhead:.1f} min + {factor:.2f} x temps trafic")
+        self.stdout.write(self.style.SUCCESS(f"Modèle de durées {version} sauvegardé"))
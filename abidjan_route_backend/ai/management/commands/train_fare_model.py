@@ -0,0 +1,45 @@
+"""
+Entraîne le modèle d'estimation des prix et sauvegarde un artefact versionné.
+
+Usage:
+    python manage.py train_fare_model
+    python manage.py train_fare_model --since-days 180 --min-samples 50
+"""
+
+from django.core.management.base import BaseCommand
+
+from ai.fares import save_fare_model, train_fare_model
+
+
+class Command(BaseCommand):
+    help = "Entraîne le modèle de prix à partir de PriceHistory"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since-days',
+            type=int,
+            default=None,
+            help="N'utiliser que les observations des N derniers jours",
+        )
+        parser.add_argument(
+            '--min-samples',
+            type=int,
+            default=30,
+            help="Observations minimales pour entraîner un mode (sinon tarif TransportMode)",
+        )
+        parser.add_argument('--alpha', type=float, default=1.0, help="Régularisation Ridge")
+
+    def handle(self, *args, **options):
+        payload = train_fare_model(
+            since_days=options['since_days'],
+            min_samples=options['min_samples'],
+            alpha=options['alpha'],
+        )
+        version = save_fare_model(payload)
+
+        for slug, metrics in payload['metrics'].items():
+            if metrics['trained']:
+                self.stdout.write(f"  {slug}: {metrics['samples']} obs., MAE {metrics['mae_fcfa']} FCFA")
+            else:
+                self.stdout.write(f"  {slug}: {metrics['samples']} obs., tarif par défaut")
+        self.stdout.write(self.style.SUCCESS(f"Modèle de prix {version} sauvegardé"))
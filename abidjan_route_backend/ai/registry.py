@@ -0,0 +1,88 @@
+"""
+Registre des modèles servis en ligne
+
+    from ai.registry import registry
+    fares = registry.get('fare')      # FarePredictor ou None
+    if fares is not None:
+        prices = fares.predict(...)
+
+- Chargement paresseux : NumPy, pandas, joblib et le module du prédicteur
+  ne sont importés qu'au premier get() (ou à warm_up()).
+- Mémoire partagée : les artefacts sont projetés en mmap (ai/artifacts.py).
+- Bascule à chaud : au plus une fois toutes les AI_MODEL_CHECK_INTERVAL
+  secondes, get() relit la version active (fichier CURRENT) et charge la
+  nouvelle version si elle a changé, sans redémarrer le processus.
+- warm_up() charge tout au démarrage du serveur (config/wsgi.py,
+  config/asgi.py) pour ne pas faire payer la première requête.
+"""
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from . import artifacts
+
+
+logger = logging.getLogger(__name__)
+
+PREDICTORS = {
+    'fare': 'ai.fares.FarePredictor',
+    'eta': 'ai.eta.EtaPredictor',
+}
+
+
+class ModelRegistry:
+
+    def __init__(self, predictors=PREDICTORS):
+        self.predictors = predictors
+        self._models = {}
+        self._checked_at = {}
+        self._lock = threading.Lock()
+
+    def get(self, kind):
+        """Prédicteur de la version active, ou None si aucun modèle n'est entraîné"""
+        checked_at = self._checked_at.get(kind)
+        if checked_at is None or time.monotonic() - checked_at > settings.AI_MODEL_CHECK_INTERVAL:
+            self._refresh(kind)
+        return self._models.get(kind)
+
+    def _refresh(self, kind):
+        with self._lock:
+            self._checked_at[kind] = time.monotonic()
+            version = artifacts.active_version(kind)
+            current = self._models.get(kind)
+            if version is None or (current is not None and current.version == version):
+                return
+            try:
+                predictor = self._load(kind, version)
+            except Exception:
+                # On garde la version en service plutôt que de tomber sans modèle
+                logger.exception("Chargement du modèle %s %s impossible", kind, version)
+                return
+            self._models[kind] = predictor
+            logger.info("Modèle %s %s chargé", kind, version)
+
+    def _load(self, kind, version):
+        predictor_class = import_string(self.predictors[kind])
+        payload = artifacts.load_artifact(kind, version, mmap=settings.AI_MODEL_MMAP)
+        return predictor_class(payload)
+
+    def warm_up(self, kinds=None):
+        """Charge les modèles disponibles ; renvoie {type: version chargée ou None}"""
+        loaded = {}
+        for kind in kinds or self.predictors:
+            self._refresh(kind)
+            predictor = self._models.get(kind)
+            loaded[kind] = predictor.version if predictor is not None else None
+        return loaded
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+            self._checked_at.clear()
+
+
+registry = ModelRegistry()
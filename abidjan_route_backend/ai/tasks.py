@@ -0,0 +1,54 @@
+"""
+Tâches Celery de l'application ai (voir config/celery.py)
+
+- train_models : réentraînement des modèles de prix et de durées (file graph)
+- forecast_and_prewarm / prewarm_bucket : prévision de la demande de l'heure
+  suivante et précalcul des itinéraires correspondants (file precompute)
+"""
+
+from datetime import datetime, timedelta
+
+from celery import shared_task
+from django.utils import timezone
+
+from config.celery import report_progress, single_instance
+
+from .demand import forecast_demand, hour_bucket, prewarm_routes
+
+
+@shared_task
+def train_models(kinds=('fare', 'eta')):
+    """Entraîne et active une nouvelle version de chaque modèle ; renvoie les versions"""
+    # NumPy, pandas et scikit-learn ne sont chargés que par les workers qui entraînent
+    from .eta import save_eta_model, train_eta_model
+    from .fares import save_fare_model, train_fare_model
+
+    versions = {}
+    with single_instance('train_models', timeout=6 * 60 * 60) as acquired:
+        if not acquired:
+            return versions
+        if 'fare' in kinds:
+            versions['fare'] = save_fare_model(train_fare_model())
+        if 'eta' in kinds:
+            versions['eta'] = save_eta_model(train_eta_model())
+    return versions
+
+
+@shared_task
+def forecast_and_prewarm(hours_ahead=1, limit=200):
+    """Prévoit les prochaines heures puis confie le précalcul de chacune à prewarm_bucket"""
+    next_hour = hour_bucket(timezone.now()) + timedelta(hours=1)
+    for offset in range(hours_ahead):
+        bucket = next_hour + timedelta(hours=offset)
+        forecast_demand(bucket, limit=limit)
+        prewarm_bucket.delay(bucket.isoformat())
+
+
+@shared_task(bind=True)
+def prewarm_bucket(self, bucket_start, limit=None):
+    """Précalcule les itinéraires prévus pour une heure (ISO 8601) ; rejouable sans effet de bord"""
+    bucket = datetime.fromisoformat(bucket_start)
+    return prewarm_routes(
+        bucket, limit=limit,
+        progress=lambda done, total: report_progress(self, done, total, bucket=bucket_start),
+    )
@@ -0,0 +1,136 @@
+"""
+Paquet des données de référence pour le frontend
+
+Un seul document remplace les listes codées en dur dans abidjan-data.ts
+(communes, quartiers, modes de transport) et y ajoute le résumé des arrêts.
+Encodage en colonnes ({"colonne": [valeurs...]}) puis gzip : les noms de
+champs n'apparaissent qu'une fois et les colonnes homogènes se compressent
+bien. Les arrêts référencent mode et lieu par leur position dans les
+colonnes correspondantes.
+
+    {
+      "version": "<empreinte>",
+      "locations": {"id": [...], "name": [...], "type": [...], "commune": [...], "lat": [...], "lng": [...]},
+      "transportModes": {"id": [...], "name": [...], "type": [...], "icon": [...], "color": [...], ...},
+      "stops": {"name": [...], "mode": [indices], "location": [indices], "lat": [...], "lng": [...]}
+    }
+
+Le paquet est construit une fois par version du cache de référence
+(core/refcache.py) ; sa version est l'empreinte SHA-256 du contenu et sert
+d'ETag. Voir api/views.py:reference_bundle pour les en-têtes de cache.
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+
+from config.db_routers import pin_to_primary
+from core.models import Location, TransportMode, TransportStop
+from core.refcache import reference_cache
+
+
+COORDINATE_DIGITS = 5  # ~1 m
+
+
+class ReferenceBundle:
+    """Paquet encodé : version, JSON brut et JSON gzip"""
+
+    __slots__ = ('version', 'body', 'gzipped')
+
+    def __init__(self, version, body, gzipped):
+        self.version = version
+        self.body = body
+        self.gzipped = gzipped
+
+    @property
+    def etag(self):
+        return f'"{self.version}"'
+
+
+def _columns(rows, names):
+    columns = {name: [] for name in names}
+    for row in rows:
+        for name, value in zip(names, row):
+            columns[name].append(value)
+    return columns
+
+
+def build_bundle():
+    """Contenu du paquet (sans version), lu sur le primaire"""
+    with pin_to_primary():
+        locations = list(
+            Location.objects.filter(is_active=True)
+            .order_by('type', 'name', 'slug')
+            .values_list('id', 'slug', 'name', 'type', 'parent_location__slug', 'coordinates')
+        )
+        modes = list(
+            TransportMode.objects.filter(is_active=True)
+            .order_by('name', 'slug')
+            .values_list(
+                'id', 'slug', 'name', 'type', 'icon', 'color',
+                'base_price', 'price_per_km', 'security_rating', 'comfort_rating',
+            )
+        )
+        stops = (
+            TransportStop.objects.filter(is_active=True, transport_mode__is_active=True, location__is_active=True)
+            .order_by('transport_mode__slug', 'name', 'id')
+            .values_list('name', 'transport_mode_id', 'location_id', 'coordinates')
+        )
+        location_index = {row[0]: index for index, row in enumerate(locations)}
+        mode_index = {row[0]: index for index, row in enumerate(modes)}
+        stop_rows = [
+            (
+                name, mode_index[mode_id], location_index[location_id],
+                round(point.y, COORDINATE_DIGITS), round(point.x, COORDINATE_DIGITS),
+            )
+            for name, mode_id, location_id, point in stops.iterator(chunk_size=10000)
+        ]
+
+    return {
+        'locations': _columns(
+            (
+                (slug, name, type_, commune, round(point.y, COORDINATE_DIGITS), round(point.x, COORDINATE_DIGITS))
+                for _, slug, name, type_, commune, point in locations
+            ),
+            ('id', 'name', 'type', 'commune', 'lat', 'lng'),
+        ),
+        'transportModes': _columns(
+            (
+                (slug, name, type_, icon, color, int(base_price), int(price_per_km), security, comfort)
+                for _, slug, name, type_, icon, color, base_price, price_per_km, security, comfort in modes
+            ),
+            ('id', 'name', 'type', 'icon', 'color', 'basePrice', 'pricePerKm', 'securityRating', 'comfortRating'),
+        ),
+        'stops': _columns(stop_rows, ('name', 'mode', 'location', 'lat', 'lng')),
+    }
+
+
+def encode_bundle(content):
+    """Version = empreinte du contenu : même données, même ETag sur tous les workers"""
+    canonical = json.dumps(content, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+    version = hashlib.sha256(canonical.encode()).hexdigest()[:20]
+    body = json.dumps(dict(content, version=version), ensure_ascii=False, separators=(',', ':')).encode()
+    # mtime=0 : octets identiques d'un worker à l'autre
+    return ReferenceBundle(version, body, gzip.compress(body, compresslevel=9, mtime=0))
+
+
+class BundleCache:
+    """Paquet reconstruit quand le cache de référence du processus est rechargé"""
+
+    def __init__(self):
+        self._bundle = None
+        self._source = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        data = reference_cache.get()
+        if self._source is not data:
+            with self._lock:
+                if self._source is not data:
+                    self._bundle = encode_bundle(build_bundle())
+                    self._source = data
+        return self._bundle
+
+
+bundle_cache = BundleCache()
@@ -0,0 +1,159 @@
+"""
+Couches GeoJSON diffusées (arrêts, lignes, POI)
+
+Chemin rapide pour les listes de milliers d'objets : aucune instance de
+modèle ni géométrie GEOS n'est créée.
+- PostgreSQL produit directement le GeoJSON de chaque géométrie (AsGeoJSON,
+  ST_AsGeoJSON) et les propriétés sont lues par .values_list() ;
+- la géométrie, déjà sérialisée, est recopiée telle quelle dans la
+  Feature ; seules les propriétés passent par l'encodeur JSON (orjson s'il
+  est installé, json sinon) ;
+- les lignes sont lues par un curseur serveur (.iterator()) et envoyées par
+  paquets d'environ CHUNK_BYTES : la mémoire reste constante quelle que soit
+  la taille de la couche.
+"""
+
+import json
+import uuid
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.contrib.gis.db.models.functions import AsGeoJSON
+from django.contrib.gis.geos import Polygon
+
+from core.models import CarRental, Hotel, Restaurant, TransportRoute, TransportStop
+
+try:
+    import orjson
+except ImportError:  # repli sans la dépendance optionnelle
+    orjson = None
+
+
+FETCH_SIZE = 2000
+CHUNK_BYTES = 64 * 1024
+PRECISION = 6  # ~0,1 m
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    # PhoneNumber et autres valeurs affichables
+    return str(value)
+
+
+def dumps(value):
+    """Objet -> JSON (bytes) ; Decimal en nombre, UUID et téléphones en texte"""
+    if orjson is not None:
+        return orjson.dumps(value, default=_default)
+    return json.dumps(value, default=_default, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+class Layer:
+    """Couche : modèle, champ géométrique, propriétés {nom GeoJSON: chemin ORM}"""
+
+    def __init__(self, model, geometry, properties, mode_field=None):
+        self.model = model
+        self.geometry = geometry
+        self.properties = properties
+        self.mode_field = mode_field
+
+    def queryset(self, mode=None, bbox=None):
+        queryset = self.model.objects.filter(is_active=True)
+        if mode is not None and self.mode_field is not None:
+            queryset = queryset.filter(**{self.mode_field: mode})
+        if bbox is not None:
+            area = Polygon.from_bbox(bbox)
+            area.srid = 4326
+            queryset = queryset.filter(**{f'{self.geometry}__bboverlaps': area})
+        return (
+            queryset
+            .annotate(geojson=AsGeoJSON(self.geometry, precision=PRECISION))
+            .order_by('pk')
+            .values_list('pk', 'geojson', *self.properties.values())
+        )
+
+
+_POI_PROPERTIES = {
+    'name': 'name',
+    'rating': 'average_rating',
+    'ratingCount': 'rating_count',
+    'address': 'address',
+    'phone': 'phone',
+    'location': 'location__slug',
+}
+
+LAYERS = {
+    'stops': Layer(TransportStop, 'coordinates', {
+        'name': 'name',
+        'mode': 'transport_mode__slug',
+        'stopType': 'stop_type',
+        'location': 'location__slug',
+    }, mode_field='transport_mode__slug'),
+    'routes': Layer(TransportRoute, 'route_path', {
+        'code': 'code',
+        'name': 'name',
+        'mode': 'transport_mode__slug',
+        'price': 'price',
+        'distance': 'distance_km',
+        'duration': 'estimated_duration_minutes',
+        'frequency': 'frequency_minutes',
+    }, mode_field='transport_mode__slug'),
+    'hotels': Layer(Hotel, 'coordinates', dict(
+        _POI_PROPERTIES, starRating='star_rating', priceRange='price_range',
+    )),
+    'restaurants': Layer(Restaurant, 'coordinates', dict(_POI_PROPERTIES, priceRange='price_range')),
+    'car-rentals': Layer(CarRental, 'coordinates', dict(_POI_PROPERTIES, pricePerDay='price_per_day_fcfa')),
+}
+
+
+def encode_features(layer, rows):
+    """Features encodées (bytes) d'un flux de lignes (pk, geojson, propriétés...)"""
+    names = list(layer.properties)
+    for row in rows:
+        yield b''.join((
+            b'{"type":"Feature","id":"', str(row[0]).encode(),
+            b'","geometry":', row[1].encode(),
+            b',"properties":', dumps(dict(zip(names, row[2:]))),
+            b'}',
+        ))
+
+
+def feature_collection(layer, rows, chunk_bytes=CHUNK_BYTES):
+    """FeatureCollection découpée en paquets d'environ `chunk_bytes` octets"""
+    buffer = bytearray(b'{"type":"FeatureCollection","features":[')
+    separator = b''
+    for feature in encode_features(layer, rows):
+        buffer += separator
+        buffer += feature
+        separator = b','
+        if len(buffer) >= chunk_bytes:
+            yield bytes(buffer)
+            buffer.clear()
+    buffer += b']}'
+    yield bytes(buffer)
+
+
+def stream_layer(layer, mode=None, bbox=None):
+    """Paquets (bytes) de la couche, lus par curseur serveur"""
+    rows = layer.queryset(mode=mode, bbox=bbox).iterator(chunk_size=FETCH_SIZE)
+    return feature_collection(layer, rows)
+
+
+async def astream_layer(layer, mode=None, bbox=None):
+    """
+    Variante ASGI : chaque paquet est produit dans le thread de la requête
+    (sync_to_async), celui qui détient le curseur serveur, sans accumuler la
+    réponse en mémoire.
+    """
+    chunks = stream_layer(layer, mode=mode, bbox=bbox)
+    next_chunk = sync_to_async(next)
+    try:
+        while True:
+            chunk = await next_chunk(chunks, None)
+            if chunk is None:
+                break
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close)()
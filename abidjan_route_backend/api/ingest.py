@@ -0,0 +1,164 @@
+"""
+Tampons d'ingestion en direct (ASGI)
+
+Les observations validées par api/views.py sont empilées dans un tampon
+borné par type (trafic, prix). Une tâche asyncio par tampon les écrit en
+base par paquets (COPY, voir core/ingest.py) dès que `batch_size` lignes
+sont en attente ou au plus tard toutes les `flush_interval` secondes.
+
+Quand un tampon est plein, offer() refuse le lot entier et la vue répond
+429 : le client renvoie le même lot plus tard, rien n'est accepté à moitié.
+
+Un paquet dont l'écriture échoue reste en tête du tampon et est retenté
+jusqu'à `max_attempts` fois. Au-delà, il est coupé en deux récursivement
+pour isoler les lignes fautives (contrainte violée, lieu supprimé...) :
+les autres sont écrites, les fautives sont journalisées (logger
+api.ingest.rejected) et comptées dans INGEST_ROWS{outcome="dropped"}, pour
+qu'une seule ligne ne bloque pas le tampon jusqu'au redémarrage.
+
+Les tampons sont propres à chaque processus ; les lignes en attente sont
+perdues si le processus est tué avant le prochain vidage. Nécessite un
+serveur ASGI (config/asgi.py, ex. uvicorn) : sous WSGI la boucle
+d'événements ne survit pas à la requête et le vidage n'aurait pas lieu.
+
+Chaque tampon écrit depuis un thread qui lui est propre : une seule
+connexion persistante par tampon et par processus (voir DB_MAX_CONNECTIONS).
+"""
+
+import asyncio
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from config.metrics import INGEST_BUFFER_DEPTH, INGEST_ROWS
+from core.ingest import load_price_rows, load_traffic_rows
+
+
+logger = logging.getLogger(__name__)
+# Lettres mortes : lignes écartées après échecs répétés, à rejouer à la main
+rejected_logger = logging.getLogger(f'{__name__}.rejected')
+
+
+class ObservationBuffer:
+    """Tampon borné vidé en masse par une tâche asyncio"""
+
+    def __init__(self, name, loader, capacity, batch_size, flush_interval, max_attempts=3):
+        self.name = name
+        self.loader = loader
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self._rows = deque()
+        # Échecs consécutifs du paquet en tête du tampon
+        self._attempts = 0
+        self._wakeup = None
+        self._task = None
+        self._loop = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'ingest-{name}')
+
+    def __len__(self):
+        return len(self._rows)
+
+    @property
+    def is_full(self):
+        return len(self._rows) >= self.capacity
+
+    def offer(self, rows):
+        """Ajoute tout le lot ou rien ; False si la capacité serait dépassée"""
+        if len(self._rows) + len(rows) > self.capacity:
+            return False
+        self._rows.extend(rows)
+        INGEST_ROWS.labels(self.name, 'accepted').inc(len(rows))
+        INGEST_BUFFER_DEPTH.labels(self.name).set(len(self._rows))
+        self._ensure_flusher()
+        if len(self._rows) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def _ensure_flusher(self):
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            while self._rows:
+                if not await self.flush():
+                    await asyncio.sleep(self.flush_interval)
+                    break
+
+    async def flush(self):
+        """
+        Écrit un paquet en base. En cas d'échec il est remis en tête du
+        tampon (False) ; au `max_attempts`-ième, ses lignes valides sont
+        écrites et les autres écartées (True).
+        """
+        batch = [self._rows.popleft() for _ in range(min(self.batch_size, len(self._rows)))]
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self._executor, self._load, batch)
+        except Exception:
+            self._attempts += 1
+            logger.exception(
+                "Échec du vidage du tampon %s (%d lignes, essai %d/%d)",
+                self.name, len(batch), self._attempts, self.max_attempts,
+            )
+            if self._attempts < self.max_attempts:
+                # Même paquet au prochain essai : la tête du tampon est restituée telle quelle
+                self._rows.extendleft(reversed(batch))
+                return False
+            written, dropped = await loop.run_in_executor(self._executor, self._salvage, batch)
+        else:
+            written, dropped = len(batch), 0
+        self._attempts = 0
+        INGEST_ROWS.labels(self.name, 'written').inc(written)
+        if dropped:
+            INGEST_ROWS.labels(self.name, 'dropped').inc(dropped)
+        INGEST_BUFFER_DEPTH.labels(self.name).set(len(self._rows))
+        return True
+
+    def _salvage(self, batch):
+        """Isole par dichotomie les lignes qui échouent ; renvoie (écrites, écartées)"""
+        if len(batch) == 1:
+            rejected_logger.error("Ligne écartée du tampon %s : %r", self.name, batch[0])
+            return 0, 1
+        middle = len(batch) // 2
+        written = dropped = 0
+        for half in (batch[:middle], batch[middle:]):
+            try:
+                self._load(half)
+            except Exception:
+                half_written, half_dropped = self._salvage(half)
+                written += half_written
+                dropped += half_dropped
+            else:
+                written += len(half)
+        return written, dropped
+
+    def _load(self, batch):
+        try:
+            self.loader(batch)
+        finally:
+            close_old_connections()
+
+
+def _build_buffers():
+    config = settings.INGEST_BUFFER
+    return {
+        'traffic': ObservationBuffer('traffic', load_traffic_rows, **config),
+        'prices': ObservationBuffer('prices', load_price_rows, **config),
+    }
+
+
+buffers = _build_buffers()
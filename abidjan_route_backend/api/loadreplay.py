@@ -0,0 +1,150 @@
+"""
+Rejeu de charge à partir de SearchHistory
+
+Les recherches réelles d'une période (paires origine/destination, critères,
+instants) sont rejouées contre une instance en marche, avec la même forme
+de trafic : mêmes trajets populaires, mêmes pointes, temps accéléré d'un
+facteur `speed`. `concurrency` borne le nombre de requêtes en vol ; si
+l'instance ne suit pas, les requêtes partent en retard et le retard maximal
+est rapporté (la charge réelle est alors inférieure à la charge visée).
+
+Rapport : débit, histogramme et percentiles de latence, taux d'erreur par
+statut, taux de succès du cache d'itinéraires (en-tête X-Route-Cache).
+"""
+
+import asyncio
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+from core.models import SearchHistory
+
+
+SEARCH_PATH = '/api/routes/search/'
+# Bornes supérieures (ms) des classes de l'histogramme de latence
+HISTOGRAM_BOUNDS_MS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+
+@dataclass
+class ReplayRequest:
+    offset: float  # secondes depuis la première recherche, temps réel
+    params: dict
+
+
+def load_requests(since, until, limit=None, keep_depart_time=False):
+    """Recherches de [since, until) dans l'ordre chronologique"""
+    rows = (
+        SearchHistory.objects
+        .filter(search_date__gte=since, search_date__lt=until)
+        .order_by('search_date')
+        .values_list('search_date', 'origin__slug', 'destination__slug', 'search_criteria')
+    )
+    if limit:
+        rows = rows[:limit]
+
+    requests, start = [], None
+    for searched_at, origin, destination, criteria in rows.iterator(chunk_size=10000):
+        start = start or searched_at
+        params = {'from': origin, 'to': destination, 'criteria': criteria}
+        if keep_depart_time:
+            params['departAt'] = searched_at.isoformat()
+        requests.append(ReplayRequest((searched_at - start).total_seconds(), params))
+    return requests
+
+
+def percentile(ordered, fraction, digits=1):
+    """Centile d'une liste triée, arrondi ; None si elle est vide (JSON valide, contrairement à NaN)"""
+    if not ordered:
+        return None
+    return round(ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))], digits)
+
+
+@dataclass
+class ReplayStats:
+    latencies_ms: list = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+    cache: Counter = field(default_factory=Counter)
+    max_lag: float = 0.0
+    elapsed: float = 0.0
+
+    @property
+    def sent(self):
+        return sum(self.statuses.values())
+
+    @property
+    def errors(self):
+        return sum(count for status, count in self.statuses.items() if not str(status).startswith('2'))
+
+    def histogram(self):
+        bounds = HISTOGRAM_BOUNDS_MS + [float('inf')]
+        counts = Counter()
+        for latency in self.latencies_ms:
+            counts[next(bound for bound in bounds if latency <= bound)] += 1
+        return [(bound, counts[bound]) for bound in bounds]
+
+    def summary(self):
+        ordered = sorted(self.latencies_ms)
+        looked_up = self.cache['hit'] + self.cache['miss']
+        return {
+            'requests': self.sent,
+            'elapsed_s': round(self.elapsed, 2),
+            'throughput_rps': round(self.sent / self.elapsed, 1) if self.elapsed else 0.0,
+            'error_rate': round(self.errors / self.sent, 4) if self.sent else 0.0,
+            'statuses': {str(status): count for status, count in sorted(self.statuses.items(), key=str)},
+            'latency_ms': {
+                'p50': percentile(ordered, 0.50),
+                'p90': percentile(ordered, 0.90),
+                'p99': percentile(ordered, 0.99),
+                'max': round(ordered[-1], 1) if ordered else None,
+            },
+            'histogram_ms': [[bound if bound != float('inf') else None, count] for bound, count in self.histogram()],
+            'cache_hit_ratio': round(self.cache['hit'] / looked_up, 4) if looked_up else None,
+            'max_lag_s': round(self.max_lag, 2),
+        }
+
+
+async def replay(base_url, requests, speed=1.0, concurrency=50, timeout=30.0, headers=None):
+    """
+    Rejoue `requests` ; `speed` = accélération du temps (0 : au plus vite).
+    Les erreurs réseau sont comptées sous le statut du nom de l'exception.
+    """
+    import httpx
+
+    stats = ReplayStats()
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits, headers=headers) as client:
+
+        async def send(request):
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(SEARCH_PATH, params=request.params)
+                except httpx.HTTPError as exc:
+                    stats.statuses[type(exc).__name__] += 1
+                    return
+                stats.latencies_ms.append((time.perf_counter() - started) * 1000)
+                stats.statuses[response.status_code] += 1
+                cache_status = response.headers.get('X-Route-Cache')
+                if cache_status:
+                    stats.cache[cache_status] += 1
+
+        began = time.perf_counter()
+        in_flight = set()
+        for request in requests:
+            if speed:
+                delay = request.offset / speed - (time.perf_counter() - began)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                else:
+                    stats.max_lag = max(stats.max_lag, -delay)
+            # File d'attente bornée : pas de millions de tâches si l'instance sature
+            while len(in_flight) >= concurrency * 2:
+                await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            task = asyncio.create_task(send(request))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        await asyncio.gather(*in_flight)
+        stats.elapsed = time.perf_counter() - began
+    return stats
@@ -0,0 +1,100 @@
+"""
+Rejoue les recherches de SearchHistory contre une instance en marche (voir api/loadreplay.py).
+
+Usage:
+    python manage.py replay_searches http://localhost:8000 --since 2026-03-02T06:00 --hours 3 --speed 60
+    python manage.py replay_searches http://staging:8000 --days 1 --speed 0 --concurrency 200 --json var/replay.json
+"""
+
+import asyncio
+import json
+from datetime import timedelta
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from api.loadreplay import load_requests, replay
+
+
+class Command(BaseCommand):
+    help = "Rejoue le trafic réel de SearchHistory (forme, trajets, critères) contre une instance"
+
+    def add_arguments(self, parser):
+        parser.add_argument('base_url', help="URL de l'instance, ex. http://localhost:8000")
+        parser.add_argument('--since', help="Début de la période (ISO 8601, défaut : il y a --days jours)")
+        parser.add_argument('--hours', type=float, default=None, help="Durée de la période en heures")
+        parser.add_argument('--days', type=float, default=1, help="Durée de la période en jours")
+        parser.add_argument('--limit', type=int, default=100000, help="Nombre maximal de recherches")
+        parser.add_argument(
+            '--speed',
+            type=float,
+            default=60,
+            help="Accélération du temps (60 : une heure en une minute ; 0 : au plus vite)",
+        )
+        parser.add_argument('--concurrency', type=int, default=50, help="Requêtes simultanées maximales")
+        parser.add_argument('--timeout', type=float, default=30.0, help="Délai maximal par requête (s)")
+        parser.add_argument(
+            '--keep-depart-time',
+            action='store_true',
+            help="Envoie l'instant d'origine en departAt (mêmes entrées de cache que le trafic réel)",
+        )
+        parser.add_argument('--json', help="Écrit le rapport complet dans ce fichier")
+
+    def handle(self, *args, **options):
+        span = timedelta(hours=options['hours']) if options['hours'] else timedelta(days=options['days'])
+        if options['since']:
+            since = parse_datetime(options['since'])
+            if since is None:
+                raise CommandError("--since doit être une date ISO 8601")
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+        else:
+            since = timezone.now() - span
+
+        requests = load_requests(
+            since, since + span, limit=options['limit'], keep_depart_time=options['keep_depart_time'],
+        )
+        if not requests:
+            raise CommandError("Aucune recherche sur la période")
+        duration = requests[-1].offset / options['speed'] if options['speed'] else 0
+        self.stdout.write(
+            f"{len(requests)} recherches, durée visée {duration:.0f} s, concurrence {options['concurrency']}"
+        )
+
+        stats = asyncio.run(replay(
+            options['base_url'].rstrip('/'),
+            requests,
+            speed=options['speed'],
+            concurrency=options['concurrency'],
+            timeout=options['timeout'],
+        ))
+        summary = stats.summary()
+
+        self.stdout.write(
+            f"  {summary['requests']} requêtes en {summary['elapsed_s']} s "
+            f"({summary['throughput_rps']} req/s), erreurs {summary['error_rate']:.2%}"
+        )
+        latency = summary['latency_ms']
+        self.stdout.write(
+            f"  latence p50 {latency['p50']} ms, p90 {latency['p90']} ms, "
+            f"p99 {latency['p99']} ms, max {latency['max']} ms"
+        )
+        peak = max((count for _, count in summary['histogram_ms']), default=0) or 1
+        for bound, count in summary['histogram_ms']:
+            label = f"<= {bound} ms" if bound is not None else "> 10000 ms"
+            self.stdout.write(f"  {label:>12} {count:>8} {'#' * round(40 * count / peak)}")
+        if summary['cache_hit_ratio'] is not None:
+            self.stdout.write(f"  cache d'itinéraires : {summary['cache_hit_ratio']:.1%} de succès")
+        self.stdout.write(f"  statuts : {summary['statuses']}")
+        if summary['max_lag_s'] > 1:
+            self.stdout.write(self.style.WARNING(
+                f"  retard d'envoi maximal {summary['max_lag_s']} s : charge visée non atteinte"
+            ))
+
+        if options['json']:
+            path = Path(options['json'])
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(summary, indent=2) + '\n', encoding='utf-8')
+            self.stdout.write(self.style.SUCCESS(f"Rapport écrit dans {path}"))
@@ -0,0 +1,235 @@
+"""
+Recherche d'itinéraires concurrente (ASGI)
+
+Les familles d'options de transport/planner.py (transit, road, car_rental)
+et la recherche des POI autour de la destination sont indépendantes : elles
+sont lancées en même temps dans un pool de threads dédié, et la recherche
+dure le temps de la plus lente au lieu de la somme de toutes.
+
+Threads plutôt que processus : chaque partie passe l'essentiel de son temps
+dans PostgreSQL ou dans NumPy (modèles ai), qui relâchent le GIL, et les
+objets du contexte (lieux, modes) n'ont pas à être sérialisés.
+
+Au-delà de ROUTE_SEARCH_DEADLINE_SECONDS, la réponse est rendue avec les
+parties terminées (partial=True, parties abandonnées dans `pending`). Une
+partie qui lève une exception est journalisée et listée dans `failed`
+(partial=True) sans faire échouer les autres. Un résultat partiel n'est pas
+mis en cache.
+
+Annuler la tâche asyncio d'une partie abandonnée n'interrompt pas son
+thread : le calcul va à son terme dans le pool, occupe un worker jusque-là,
+et son résultat est ignoré. ROUTE_SEARCH_WORKERS doit en tenir compte.
+
+stream_routes() produit les mêmes données sous forme d'événements, chaque
+famille étant émise dès qu'elle est prête (voir route_search_stream).
+"""
+
+import asyncio
+import contextvars
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+
+from config.metrics import ROUTE_CACHE, time_phase, timed_phase
+from config.profiling import run_profiled
+from transport.planner import (
+    FAMILIES,
+    build_context,
+    cache_key,
+    destination_pois,
+    location_payload,
+    recommend,
+)
+
+
+logger = logging.getLogger(__name__)
+
+# Parties calculées en parallèle ; 'pois' complète le RouteResult (hotels, restaurants)
+PARTS = {
+    name: timed_phase(name, compute)
+    for name, compute in dict(FAMILIES, pois=destination_pois).items()
+}
+
+_executor = ThreadPoolExecutor(
+    max_workers=settings.ROUTE_SEARCH_WORKERS,
+    thread_name_prefix='route-search',
+)
+
+
+def _call(func, *args):
+    # Chaque thread du pool garde sa connexion : la libérer si elle a expiré
+    try:
+        # Sous cProfile si la requête est profilée (config/profiling.py)
+        return run_profiled(func, *args)
+    finally:
+        close_old_connections()
+
+
+def run_in_pool(func, *args):
+    """
+    Exécute `func(*args)` dans le pool de la recherche ; renvoie un awaitable.
+    Le contexte (contextvars) de l'appelant est propagé au thread, comme
+    sync_to_async : l'instrumentation par requête y voit les requêtes SQL.
+    """
+    context = contextvars.copy_context()
+    return asyncio.get_running_loop().run_in_executor(_executor, context.run, _call, func, *args)
+
+
+def start_parts(ctx):
+    """Lance toutes les parties ; renvoie {tâche asyncio: nom de la partie}"""
+    return {
+        asyncio.ensure_future(run_in_pool(compute, ctx)): name
+        for name, compute in PARTS.items()
+    }
+
+
+def part_error(task, name):
+    """Exception levée par une partie terminée (journalisée), ou None"""
+    exc = task.exception()
+    if exc is not None:
+        logger.error("Échec de la partie %s de la recherche", name, exc_info=exc)
+    return exc
+
+
+def _context(origin, destination, depart_at):
+    with time_phase('context'):
+        return build_context(origin, destination, depart_at)
+
+
+def _recommend(options, criteria):
+    with time_phase('ranking'):
+        return recommend(options, criteria)
+
+
+def empty_result(ctx):
+    return {
+        'from': location_payload(ctx.origin),
+        'to': location_payload(ctx.destination),
+        'options': [],
+        'hotels': [],
+        'restaurants': [],
+    }
+
+
+def merge_part(result, name, value):
+    """Ajoute le résultat d'une partie au RouteResult en construction"""
+    if name == 'pois':
+        result.update(value)
+    else:
+        result['options'].extend(value)
+
+
+async def search_routes(origin, destination, criteria='balanced', depart_at=None, deadline=None):
+    """
+    RouteResult avec recommandation, calculé partie par partie en parallèle.
+    Renvoie (résultat, trouvé_en_cache) ; le résultat porte `partial` et,
+    selon le cas, la liste `pending` des parties abandonnées à l'échéance et
+    la liste `failed` des parties en erreur.
+    """
+    deadline = settings.ROUTE_SEARCH_DEADLINE_SECONDS if deadline is None else deadline
+    ctx = await run_in_pool(_context, origin, destination, depart_at)
+    key = cache_key(origin, destination, ctx.depart_at)
+
+    result = await run_in_pool(cache.get, key)
+    hit = result is not None
+    ROUTE_CACHE.labels('hit' if hit else 'miss').inc()
+    if not hit:
+        result = empty_result(ctx)
+        tasks = start_parts(ctx)
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+        for task in pending:
+            task.cancel()
+        failed = []
+        # Ordre des familles conservé, quel que soit l'ordre de fin
+        for task in sorted(done, key=lambda task: list(PARTS).index(tasks[task])):
+            if part_error(task, tasks[task]) is None:
+                merge_part(result, tasks[task], task.result())
+            else:
+                failed.append(tasks[task])
+        if pending:
+            result['pending'] = sorted(tasks[task] for task in pending)
+        if failed:
+            result['failed'] = sorted(failed)
+        if not pending and not failed:
+            await run_in_pool(cache.set, key, result, settings.ROUTE_CACHE_TTL)
+
+    result = dict(result, partial='pending' in result or 'failed' in result)
+    result['recommendedOption'] = _recommend(result['options'], criteria)
+    return result, hit
+
+
+async def stream_routes(origin, destination, criteria='balanced', depart_at=None, deadline=None):
+    """
+    Événements (type, données) d'une recherche, dans l'ordre de disponibilité :
+        ('route', {'from', 'to'})            immédiatement
+        ('option', TransportOption)          une par option, famille par famille
+        ('pois', {'hotels', 'restaurants'})
+        ('error', {'part', 'detail'})        partie en erreur (part=None : recherche entière)
+        ('done', {'recommendedOption', 'partial', 'pending', 'failed', 'cached'})
+    La réponse HTTP est déjà partie : une erreur ne peut plus changer son
+    statut, elle devient un événement 'error' et 'done' est toujours émis.
+    """
+    deadline = settings.ROUTE_SEARCH_DEADLINE_SECONDS if deadline is None else deadline
+    loop = asyncio.get_running_loop()
+    result = None
+    cached = None
+    pending, failed = [], []
+    try:
+        ctx = await run_in_pool(_context, origin, destination, depart_at)
+        key = cache_key(origin, destination, ctx.depart_at)
+
+        cached = await run_in_pool(cache.get, key)
+        ROUTE_CACHE.labels('miss' if cached is None else 'hit').inc()
+        result = cached or empty_result(ctx)
+        yield 'route', {'from': result['from'], 'to': result['to']}
+
+        if cached is not None:
+            for option in cached['options']:
+                yield 'option', option
+            yield 'pois', {'hotels': cached['hotels'], 'restaurants': cached['restaurants']}
+        else:
+            tasks = start_parts(ctx)
+            end = loop.time() + deadline
+            remaining = set(tasks)
+            try:
+                while remaining:
+                    done, remaining = await asyncio.wait(
+                        remaining, timeout=max(end - loop.time(), 0), return_when=asyncio.FIRST_COMPLETED,
+                    )
+                    if not done:
+                        break
+                    for task in done:
+                        name = tasks[task]
+                        if part_error(task, name) is not None:
+                            failed.append(name)
+                            yield 'error', {'part': name, 'detail': "Calcul indisponible"}
+                            continue
+                        value = task.result()
+                        merge_part(result, name, value)
+                        if name == 'pois':
+                            yield 'pois', value
+                        else:
+                            for option in value:
+                                yield 'option', option
+            finally:
+                # Échéance dépassée, erreur ou client déconnecté
+                for task in remaining:
+                    task.cancel()
+            pending = sorted(tasks[task] for task in remaining)
+            if not pending and not failed:
+                await run_in_pool(cache.set, key, result, settings.ROUTE_CACHE_TTL)
+    except Exception:
+        logger.exception("Échec de la recherche diffusée")
+        yield 'error', {'part': None, 'detail': "Recherche interrompue"}
+        failed.append('search')
+
+    yield 'done', {
+        'recommendedOption': _recommend(result['options'] if result else [], criteria),
+        'partial': bool(pending or failed),
+        'pending': pending,
+        'failed': sorted(failed),
+        'cached': cached is not None,
+    }
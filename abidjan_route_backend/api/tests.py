@@ -1,3 +1,398 @@
-from django.test import TestCase
+import gzip
+import json
+import uuid
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.http import QueryDict
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.utils import timezone
+
+from core.ingest import IngestError
+
+from . import bundle, geojson, ingest, loadreplay, search, views
+
+
+LOCATIONS = {
+    'cocody': SimpleNamespace(id=1, slug='cocody'),
+    'plateau': SimpleNamespace(id=2, slug='plateau'),
+}
+
+
+# ============================================================================
+# RECHERCHE D'ITINÉRAIRES
+# ============================================================================
+
+class SearchParamsTests(SimpleTestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(views, 'reference_cache')
+        patcher.start().get.return_value = SimpleNamespace(locations=LOCATIONS)
+        self.addCleanup(patcher.stop)
+
+    def params(self, query):
+        return views._search_params(QueryDict(query))
+
+    def test_defaults(self):
+        origin, destination, criteria, depart_at = self.params('from=cocody&to=plateau')
+        self.assertEqual((origin.slug, destination.slug), ('cocody', 'plateau'))
+        self.assertEqual(criteria, 'balanced')
+        self.assertIsNone(depart_at)
+
+    def test_naive_depart_at_is_made_aware(self):
+        *_, depart_at = self.params('from=cocody&to=plateau&departAt=2026-10-19T08:00')
+        self.assertTrue(timezone.is_aware(depart_at))
+        self.assertEqual(timezone.localtime(depart_at).hour, 8)
+
+    def test_aware_depart_at_is_kept(self):
+        *_, depart_at = self.params('from=cocody&to=plateau&departAt=2026-10-19T08:00%2B02:00')
+        self.assertEqual(depart_at.utcoffset().total_seconds(), 2 * 3600)
+
+    def test_invalid_depart_at(self):
+        for value in ('demain', '2026-13-40T08:00'):
+            with self.subTest(value=value), self.assertRaises(views.SearchError) as error:
+                self.params(f'from=cocody&to=plateau&departAt={value}')
+            self.assertEqual(error.exception.status, 400)
+
+    def test_missing_or_unknown_parameters(self):
+        cases = [
+            ('to=plateau', 400),
+            ('from=cocody&to=plateau&criteria=scenic', 400),
+            ('from=cocody&to=atlantis', 404),
+        ]
+        for query, status in cases:
+            with self.subTest(query=query), self.assertRaises(views.SearchError) as error:
+                self.params(query)
+            self.assertEqual(error.exception.status, status)
+
+
+class SearchRoutesTests(SimpleTestCase):
+
+    def setUp(self):
+        ctx = SimpleNamespace(origin='cocody', destination='plateau', depart_at=None)
+        self.cache = mock.Mock(get=mock.Mock(return_value=None))
+        for name, value in (
+            ('build_context', mock.Mock(return_value=ctx)),
+            ('cache_key', mock.Mock(return_value='route:test')),
+            ('location_payload', lambda location: {'id': location}),
+            ('recommend', lambda options, criteria: options[0] if options else None),
+            ('cache', self.cache),
+        ):
+            patcher = mock.patch.object(search, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def parts(self, **parts):
+        return mock.patch.object(search, 'PARTS', parts)
+
+    async def test_complete_result_is_cached(self):
+        with self.parts(transit=lambda ctx: [{'id': 'gbaka'}], pois=lambda ctx: {'hotels': [], 'restaurants': []}):
+            result, hit = await search.search_routes('cocody', 'plateau')
+        self.assertFalse(hit)
+        self.assertFalse(result['partial'])
+        self.assertEqual(result['recommendedOption'], {'id': 'gbaka'})
+        self.cache.set.assert_called_once()
+
+    async def test_failed_part_is_reported_and_not_cached(self):
+        def broken(ctx):
+            raise RuntimeError("panne")
+
+        with self.parts(transit=lambda ctx: [{'id': 'gbaka'}], road=broken), \
+                self.assertLogs(search.logger, 'ERROR'):
+            result, _ = await search.search_routes('cocody', 'plateau')
+        self.assertTrue(result['partial'])
+        self.assertEqual(result['failed'], ['road'])
+        self.assertEqual(result['options'], [{'id': 'gbaka'}])
+        self.cache.set.assert_not_called()
+
+    async def events(self):
+        return [event async for event in search.stream_routes('cocody', 'plateau')]
+
+    async def test_stream_reports_failed_part_then_done(self):
+        def broken(ctx):
+            raise RuntimeError("panne")
+
+        with self.parts(transit=lambda ctx: [{'id': 'gbaka'}], road=broken), \
+                self.assertLogs(search.logger, 'ERROR'):
+            events = await self.events()
+        kinds = [kind for kind, _ in events]
+        self.assertIn(('error', {'part': 'road', 'detail': "Calcul indisponible"}), events)
+        self.assertIn('option', kinds)
+        self.assertEqual(kinds[-1], 'done')
+        self.assertTrue(events[-1][1]['partial'])
+        self.assertEqual(events[-1][1]['failed'], ['road'])
+        self.cache.set.assert_not_called()
+
+    async def test_stream_always_ends_with_done(self):
+        search.build_context.side_effect = RuntimeError("base indisponible")
+        with self.parts(transit=lambda ctx: []), self.assertLogs(search.logger, 'ERROR'):
+            events = await self.events()
+        self.assertEqual([kind for kind, _ in events], ['error', 'done'])
+        self.assertIsNone(events[-1][1]['recommendedOption'])
+        self.assertTrue(events[-1][1]['partial'])
+
+
+# ============================================================================
+# INGESTION EN DIRECT
+# ============================================================================
+
+def _parse(record):
+    if record.get('traffic_level') not in ('low', 'high'):
+        raise IngestError("Niveau de trafic invalide")
+    return (record['traffic_level'],)
+
+
+@override_settings(INGEST_TOKENS=['secret'], INGEST_MAX_BATCH_LINES=3, INGEST_RETRY_AFTER_SECONDS=2)
+class IngestViewTests(SimpleTestCase):
+
+    def setUp(self):
+        self.buffer = mock.Mock(is_full=False, offer=mock.Mock(return_value=True))
+        for patcher in (
+            mock.patch.dict(views.buffers, {'traffic': self.buffer}),
+            mock.patch.dict(views.PARSERS, {'traffic': _parse}),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def post(self, lines, token='secret'):
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+        request = RequestFactory().post(
+            '/api/ingest/traffic/', '\n'.join(lines), content_type='application/x-ndjson', **headers,
+        )
+        return await views.ingest_observations(request, 'traffic')
+
+    async def test_accepted_batch_lists_rejected_lines(self):
+        response = await self.post(['{"traffic_level": "low"}', '{"traffic_level": "bouchon"}', '{oups'])
+        self.assertEqual(response.status_code, 202)
+        body = json.loads(response.content)
+        self.assertEqual((body['accepted'], body['rejected']), (1, 2))
+        self.assertEqual([error['line'] for error in body['errors']], [2, 3])
+        self.buffer.offer.assert_called_once_with([('low',)])
+
+    async def test_non_utf8_line_is_rejected_not_500(self):
+        request = RequestFactory().post(
+            '/api/ingest/traffic/', b'{"traffic_level": "low"}\n{"traffic_level": "\xff"}',
+            content_type='application/x-ndjson', HTTP_AUTHORIZATION='Bearer secret',
+        )
+        response = await views.ingest_observations(request, 'traffic')
+        self.assertEqual(response.status_code, 202)
+        body = json.loads(response.content)
+        self.assertEqual(body['errors'], [{'line': 2, 'error': "Ligne non encodée en UTF-8"}])
+
+    async def test_closed_without_tokens(self):
+        with override_settings(INGEST_TOKENS=[]):
+            response = await self.post(['{"traffic_level": "low"}'])
+        self.assertEqual(response.status_code, 401)
+        self.buffer.offer.assert_not_called()
+
+    async def test_invalid_token(self):
+        for token in (None, 'autre'):
+            with self.subTest(token=token):
+                response = await self.post(['{"traffic_level": "low"}'], token=token)
+                self.assertEqual(response.status_code, 401)
+
+    async def test_no_valid_line_is_400(self):
+        response = await self.post(['{"traffic_level": "bouchon"}'])
+        self.assertEqual(response.status_code, 400)
+        self.buffer.offer.assert_not_called()
+
+    async def test_too_many_lines_is_413(self):
+        response = await self.post(['{"traffic_level": "low"}'] * 4)
+        self.assertEqual(response.status_code, 413)
+        self.buffer.offer.assert_not_called()
+
+    async def test_full_buffer_is_429_with_retry_after(self):
+        self.buffer.is_full = True
+        response = await self.post(['{"traffic_level": "low"}'])
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '2')
+
+    async def test_batch_refused_by_buffer_is_429(self):
+        self.buffer.offer.return_value = False
+        response = await self.post(['{"traffic_level": "low"}'])
+        self.assertEqual(response.status_code, 429)
+
+
+
+class ObservationBufferTests(SimpleTestCase):
+
+    def setUp(self):
+        self.written = []
+
+    def loader(self, batch):
+        if 'bad' in batch:
+            raise ValueError("contrainte violée")
+        self.written.extend(batch)
+
+    def buffer(self):
+        return ingest.ObservationBuffer(
+            'test', self.loader, capacity=10, batch_size=4, flush_interval=0, max_attempts=2,
+        )
+
+    async def test_failed_batch_is_retried_then_salvaged(self):
+        buffer = self.buffer()
+        buffer._rows.extend(['a', 'bad', 'b', 'c', 'd'])
+        with self.assertLogs(ingest.logger, 'ERROR'):
+            self.assertFalse(await buffer.flush())
+        # Le paquet reste en tête, dans l'ordre
+        self.assertEqual(list(buffer._rows), ['a', 'bad', 'b', 'c', 'd'])
+        self.assertEqual(self.written, [])
+
+        with self.assertLogs(ingest.logger, 'ERROR') as logs:
+            self.assertTrue(await buffer.flush())
+        self.assertEqual(self.written, ['a', 'b', 'c'])
+        self.assertTrue(any('bad' in line for line in logs.output))
+        self.assertEqual(list(buffer._rows), ['d'])
+
+        # La ligne suivante n'est plus bloquée
+        self.assertTrue(await buffer.flush())
+        self.assertEqual(self.written, ['a', 'b', 'c', 'd'])
+        self.assertEqual(len(buffer), 0)
+
+    async def test_success_resets_attempts(self):
+        buffer = self.buffer()
+        buffer._rows.extend(['a', 'bad'])
+        with self.assertLogs(ingest.logger, 'ERROR'):
+            await buffer.flush()
+        self.assertEqual(buffer._attempts, 1)
+        with self.assertLogs(ingest.logger, 'ERROR'):
+            await buffer.flush()
+        self.assertEqual(buffer._attempts, 0)
+
+
+# ============================================================================
+# REJEU DE CHARGE
+# ============================================================================
+
+class ReplayStatsTests(SimpleTestCase):
+
+    def test_percentile(self):
+        ordered = [float(value) for value in range(1, 101)]
+        self.assertEqual(loadreplay.percentile(ordered, 0.5), 51.0)
+        self.assertEqual(loadreplay.percentile(ordered, 0.99), 99.0)
+        self.assertIsNone(loadreplay.percentile([], 0.5))
+
+    def test_empty_summary_is_valid_json(self):
+        summary = loadreplay.ReplayStats().summary()
+        self.assertEqual(summary['latency_ms'], {'p50': None, 'p90': None, 'p99': None, 'max': None})
+        json.loads(json.dumps(summary, allow_nan=False))
+
+
+# ============================================================================
+# PAQUET DE RÉFÉRENCE
+# ============================================================================
+
+CONTENT = {
+    'locations': {'id': ['cocody'], 'name': ['Cocody'], 'type': ['commune'], 'commune': [None],
+                  'lat': [5.35], 'lng': [-3.98]},
+    'transportModes': {'id': [], 'name': []},
+    'stops': {'name': [], 'mode': [], 'location': [], 'lat': [], 'lng': []},
+}
+
+
+class BundleEncodingTests(SimpleTestCase):
+
+    def test_same_content_same_bytes(self):
+        first, second = bundle.encode_bundle(CONTENT), bundle.encode_bundle(dict(CONTENT))
+        self.assertEqual(first.version, second.version)
+        self.assertEqual(first.gzipped, second.gzipped)
+        self.assertEqual(first.etag, f'"{first.version}"')
+
+    def test_version_follows_content(self):
+        changed = dict(CONTENT, locations=dict(CONTENT['locations'], name=['Cocody Riviera']))
+        self.assertNotEqual(bundle.encode_bundle(CONTENT).version, bundle.encode_bundle(changed).version)
+
+    def test_body_embeds_version_and_gzip_matches(self):
+        encoded = bundle.encode_bundle(CONTENT)
+        self.assertEqual(json.loads(encoded.body), dict(CONTENT, version=encoded.version))
+        self.assertEqual(gzip.decompress(encoded.gzipped), encoded.body)
+
+
+class ReferenceBundleViewTests(SimpleTestCase):
+
+    def setUp(self):
+        self.bundle = bundle.encode_bundle(CONTENT)
+        patcher = mock.patch.object(views, 'bundle_cache')
+        patcher.start().get.return_value = self.bundle
+        self.addCleanup(patcher.stop)
+
+    def get(self, version=None, **headers):
+        return views.reference_bundle(RequestFactory().get('/api/reference/bundle/', **headers), version)
+
+    def test_current_bundle_is_revalidated(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, self.bundle.body)
+        self.assertEqual(response['ETag'], self.bundle.etag)
+        self.assertEqual(response['Cache-Control'], 'public, no-cache')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+
+    def test_matching_etag_is_304(self):
+        for header in (self.bundle.etag, f'"autre", {self.bundle.etag}', '*'):
+            with self.subTest(header=header):
+                response = self.get(HTTP_IF_NONE_MATCH=header)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response['ETag'], self.bundle.etag)
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH='"autre"').status_code, 200)
+
+    def test_gzip_when_accepted(self):
+        response = self.get(HTTP_ACCEPT_ENCODING='br, gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response.content, self.bundle.gzipped)
+
+    def test_versioned_url(self):
+        response = self.get(self.bundle.version)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        stale = self.get('0' * 20)
+        self.assertEqual(stale.status_code, 302)
+        self.assertEqual(stale['Location'], '/api/reference/bundle/')
+
+
+# ============================================================================
+# COUCHES GEOJSON
+# ============================================================================
+
+class GeoJSONEncodingTests(SimpleTestCase):
+
+    layer = geojson.Layer(None, 'coordinates', {'name': 'name', 'rating': 'average_rating', 'phone': 'phone'})
+
+    def test_feature(self):
+        row = (uuid.UUID(int=1), '{"type":"Point","coordinates":[-4.0,5.3]}', "Hôtel Ivoire", Decimal('4.50'), None)
+        feature = json.loads(next(geojson.encode_features(self.layer, [row])))
+        self.assertEqual(feature, {
+            'type': 'Feature',
+            'id': str(uuid.UUID(int=1)),
+            'geometry': {'type': 'Point', 'coordinates': [-4.0, 5.3]},
+            'properties': {'name': "Hôtel Ivoire", 'rating': 4.5, 'phone': None},
+        })
+
+    def test_collection_is_chunked_and_valid(self):
+        rows = [
+            (uuid.UUID(int=index), '{"type":"Point","coordinates":[-4.0,5.3]}', f"Arrêt {index}", Decimal('1'), '+225')
+            for index in range(50)
+        ]
+        chunks = list(geojson.feature_collection(self.layer, rows, chunk_bytes=512))
+        self.assertGreater(len(chunks), 1)
+        collection = json.loads(b''.join(chunks))
+        self.assertEqual(collection['type'], 'FeatureCollection')
+        self.assertEqual([feature['properties']['name'] for feature in collection['features']],
+                         [f"Arrêt {index}" for index in range(50)])
+
+    def test_empty_collection(self):
+        chunks = list(geojson.feature_collection(self.layer, []))
+        self.assertEqual(json.loads(b''.join(chunks)), {'type': 'FeatureCollection', 'features': []})
+
+    def test_dumps_without_orjson(self):
+        with mock.patch.object(geojson, 'orjson', None):
+            self.assertEqual(json.loads(geojson.dumps({'price': Decimal('250.00'), 'id': uuid.UUID(int=2)})),
+                             {'price': 250.0, 'id': str(uuid.UUID(int=2))})
+
+
+class BBoxTests(SimpleTestCase):
+
+    def test_bbox(self):
+        self.assertEqual(views._bbox('-4.1,5.2,-3.9,5.4'), (-4.1, 5.2, -3.9, 5.4))
+        for value in ('-4.1,5.2,-3.9', '-3.9,5.2,-4.1,5.4', 'a,b,c,d'):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                views._bbox(value)
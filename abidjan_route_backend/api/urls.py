@@ -0,0 +1,16 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'api'
+
+urlpatterns = [
+    path('routes/search/', views.route_search, name='route-search'),
+    path('routes/search/stream/', views.route_search_stream, name='route-search-stream'),
+    path('ingest/traffic/', views.ingest_observations, {'kind': 'traffic'}, name='ingest-traffic'),
+    path('ingest/prices/', views.ingest_observations, {'kind': 'prices'}, name='ingest-prices'),
+    path('reference/bundle/', views.reference_bundle, name='reference-bundle'),
+    path('reference/bundle/<str:version>/', views.reference_bundle, name='reference-bundle-version'),
+    path('sync/<slug:resource>/', views.sync_resource, name='sync'),
+    path('geo/<slug:layer>/', views.geojson_layer, name='geojson-layer'),
+]
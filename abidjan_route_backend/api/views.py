@@ -1,3 +1,372 @@
-from django.shortcuts import render
+import hmac
+import json
+import re
 
-# Create your views here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections
+from django.http import (
+    HttpResponse,
+    HttpResponseNotAllowed,
+    HttpResponseNotModified,
+    HttpResponseRedirect,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.http import parse_etags
+
+from core.ingest import (
+    IngestError,
+    LocationResolver,
+    TransportModeResolver,
+    parse_price_record,
+    parse_traffic_record,
+)
+from config.metrics import INGEST_ROWS
+from core.models import SearchHistory
+from core.refcache import reference_cache
+from core.sync import RESOURCES, CursorError, CursorExpired, changes_since
+
+from .bundle import bundle_cache
+from .geojson import LAYERS, astream_layer
+from .ingest import buffers
+from .search import run_in_pool, search_routes, stream_routes
+
+
+# ============================================================================
+# INGESTION EN DIRECT (NDJSON)
+# ============================================================================
+
+_locations = LocationResolver()
+_modes = TransportModeResolver()
+
+PARSERS = {
+    'traffic': lambda record: parse_traffic_record(record, _locations, default_source='user_reported'),
+    'prices': lambda record: parse_price_record(record, _locations, _modes),
+}
+
+MAX_REPORTED_ERRORS = 50
+
+
+def _authorized(request):
+    # Fermé par défaut : sans INGEST_TOKENS, aucune requête n'est acceptée
+    tokens = settings.INGEST_TOKENS
+    if not tokens:
+        return False
+    header = request.headers.get('Authorization', '')
+    scheme, _, token = header.partition(' ')
+    if scheme.lower() != 'bearer' or not token:
+        return False
+    return any(hmac.compare_digest(token, expected) for expected in tokens)
+
+
+def _validate_ndjson(request, kind):
+    """Valide le corps ligne par ligne ; renvoie (lignes valides, erreurs, trop_long)"""
+    # Exécutée dans le pool par défaut de asyncio (thread_sensitive=False) : les
+    # parseurs peuvent lire la base, libérer la connexion du thread si elle a expiré
+    try:
+        return _parse_lines(request, kind)
+    finally:
+        close_old_connections()
+
+
+def _parse_lines(request, kind):
+    parse = PARSERS[kind]
+    rows, errors = [], []
+    for line_no, raw in enumerate(request, start=1):
+        if line_no > settings.INGEST_MAX_BATCH_LINES:
+            return rows, errors, True
+        raw = raw.strip()
+        if not raw:
+            continue
+        try:
+            record = json.loads(raw)
+        except json.JSONDecodeError as exc:
+            errors.append({'line': line_no, 'error': f"JSON invalide : {exc.msg}"})
+            continue
+        except ValueError:
+            # UnicodeDecodeError (sous-classe de ValueError) : octets non UTF-8
+            errors.append({'line': line_no, 'error': "Ligne non encodée en UTF-8"})
+            continue
+        try:
+            rows.append(parse(record))
+        except IngestError as exc:
+            errors.append({'line': line_no, 'error': str(exc)})
+    return rows, errors, False
+
+
+def _buffer_full():
+    response = JsonResponse({'detail': "Tampon d'ingestion plein, réessayez plus tard"}, status=429)
+    response['Retry-After'] = str(settings.INGEST_RETRY_AFTER_SECONDS)
+    return response
+
+
+async def ingest_observations(request, kind):
+    """
+    POST d'un lot NDJSON d'observations (une observation JSON par ligne).
+
+    202 : lot accepté (les lignes invalides sont ignorées et listées)
+    400 : aucune ligne valide
+    401 : jeton absent ou invalide (toujours si INGEST_TOKENS est vide)
+    413 : plus de INGEST_MAX_BATCH_LINES lignes
+    429 : tampon plein, renvoyer le lot après Retry-After secondes
+    """
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    if not _authorized(request):
+        return JsonResponse({'detail': "Jeton d'ingestion invalide"}, status=401)
+
+    buffer = buffers[kind]
+    if buffer.is_full:
+        return _buffer_full()
+
+    rows, errors, too_large = await sync_to_async(_validate_ndjson, thread_sensitive=False)(request, kind)
+    INGEST_ROWS.labels(kind, 'rejected').inc(len(errors))
+    if too_large:
+        return JsonResponse(
+            {'detail': f"Lot limité à {settings.INGEST_MAX_BATCH_LINES} lignes"},
+            status=413,
+        )
+    if not rows:
+        return JsonResponse({'accepted': 0, 'rejected': len(errors), 'errors': errors[:MAX_REPORTED_ERRORS]}, status=400)
+    if not buffer.offer(rows):
+        return _buffer_full()
+
+    return JsonResponse(
+        {'accepted': len(rows), 'rejected': len(errors), 'errors': errors[:MAX_REPORTED_ERRORS]},
+        status=202,
+    )
+
+
+# Vue asynchrone : csrf_exempt (décorateur synchrone en Django 4.2) est posé à la main
+ingest_observations.csrf_exempt = True
+
+
+# ============================================================================
+# RECHERCHE D'ITINÉRAIRES
+# ============================================================================
+
+CRITERIA = {value for value, _ in SearchHistory.CRITERIA_CHOICES}
+
+
+class SearchError(ValueError):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _search_params(params):
+    """(origine, destination, critère, départ) depuis ?from=&to=&criteria=&departAt="""
+    origin_slug, destination_slug = params.get('from'), params.get('to')
+    if not origin_slug or not destination_slug:
+        raise SearchError("Paramètres 'from' et 'to' requis")
+    criteria = params.get('criteria', 'balanced')
+    if criteria not in CRITERIA:
+        raise SearchError(f"Critère inconnu : {criteria}")
+    depart_at = None
+    if params.get('departAt'):
+        try:
+            depart_at = parse_datetime(params['departAt'])
+        except ValueError:
+            depart_at = None
+        if depart_at is None:
+            raise SearchError("departAt doit être une date ISO 8601")
+        # Sans décalage horaire : heure locale (TIME_ZONE), comme replay_searches
+        if timezone.is_naive(depart_at):
+            depart_at = timezone.make_aware(depart_at)
+
+    locations = reference_cache.get().locations
+    missing = [slug for slug in (origin_slug, destination_slug) if slug not in locations]
+    if missing:
+        raise SearchError(f"Lieu inconnu : {', '.join(missing)}", status=404)
+    return locations[origin_slug], locations[destination_slug], criteria, depart_at
+
+
+def _record_search(origin, destination, criteria, ip_address):
+    SearchHistory.objects.create(
+        origin_id=origin.id,
+        destination_id=destination.id,
+        origin_coordinates=origin.coordinates,
+        destination_coordinates=destination.coordinates,
+        search_criteria=criteria,
+        ip_address=ip_address,
+    )
+
+
+async def route_search(request):
+    """
+    GET ?from=<slug>&to=<slug>[&criteria=balanced][&departAt=<ISO 8601>]
+
+    RouteResult du frontend avec recommendedOption. `partial` indique qu'une
+    partie manque : échéance atteinte avant sa fin (`pending`) ou erreur
+    (`failed`).
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    try:
+        origin, destination, criteria, depart_at = await run_in_pool(_search_params, request.GET)
+    except SearchError as exc:
+        return JsonResponse({'detail': str(exc)}, status=exc.status)
+
+    result, hit = await search_routes(origin, destination, criteria, depart_at)
+    # Historique (prévision de la demande) écrit sans retarder la réponse
+    run_in_pool(_record_search, origin, destination, criteria, request.META.get('REMOTE_ADDR'))
+
+    response = JsonResponse(result)
+    response['X-Route-Cache'] = 'hit' if hit else 'miss'
+    return response
+
+
+def _wants_sse(request):
+    return request.GET.get('format') == 'sse' or 'text/event-stream' in request.headers.get('Accept', '')
+
+
+async def _encode_events(events, sse):
+    async for event, data in events:
+        payload = json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':'))
+        if sse:
+            yield f"event: {event}\ndata: {payload}\n\n"
+        else:
+            yield f'{{"event":"{event}","data":{payload}}}\n'
+
+
+async def route_search_stream(request):
+    """
+    Variante diffusée de route_search : chaque TransportOption est envoyée dès
+    que sa famille est calculée, puis un message final 'done' porte
+    recommendedOption. NDJSON par défaut ({"event": ..., "data": ...} par
+    ligne), Server-Sent Events avec Accept: text/event-stream ou ?format=sse.
+
+    Les paramètres sont validés avant le début de la réponse (400/404) ;
+    ensuite, une erreur de calcul devient un événement 'error' suivi de 'done'.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    try:
+        origin, destination, criteria, depart_at = await run_in_pool(_search_params, request.GET)
+    except SearchError as exc:
+        return JsonResponse({'detail': str(exc)}, status=exc.status)
+
+    run_in_pool(_record_search, origin, destination, criteria, request.META.get('REMOTE_ADDR'))
+
+    sse = _wants_sse(request)
+    response = StreamingHttpResponse(
+        _encode_events(stream_routes(origin, destination, criteria, depart_at), sse),
+        content_type='text/event-stream' if sse else 'application/x-ndjson',
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Pas de mise en tampon par nginx : chaque événement part immédiatement
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+# ============================================================================
+# DONNÉES DE RÉFÉRENCE
+# ============================================================================
+
+_GZIP = re.compile(r'\bgzip\b')
+
+
+def reference_bundle(request, version=None):
+    """
+    GET /api/reference/bundle/
+        Paquet courant (voir api/bundle.py) ; le client le revalide à chaque
+        démarrage avec If-None-Match et reçoit 304 tant qu'il n'a pas changé.
+    GET /api/reference/bundle/<version>/
+        Contenu immuable, en cache un an ; une version périmée redirige vers
+        le paquet courant.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+    bundle = bundle_cache.get()
+    if version is not None and version != bundle.version:
+        return HttpResponseRedirect(reverse('api:reference-bundle'))
+
+    if_none_match = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+    if bundle.etag in if_none_match or '*' in if_none_match:
+        response = HttpResponseNotModified()
+    elif _GZIP.search(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+        response = HttpResponse(bundle.gzipped, content_type='application/json')
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(bundle.body, content_type='application/json')
+
+    response['ETag'] = bundle.etag
+    response['Vary'] = 'Accept-Encoding'
+    if version is not None:
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    else:
+        response['Cache-Control'] = 'public, no-cache'
+    return response
+
+
+def sync_resource(request, resource):
+    """
+    GET /api/sync/<ressource>/?cursor=<curseur>&limit=<n>
+
+    Changements depuis `cursor` (voir core/sync.py), ressources : locations,
+    stops, routes, hotels, restaurants, car-rentals. Sans curseur, le
+    catalogue complet page par page ; tant que `hasMore` est vrai, rappeler
+    avec le `cursor` renvoyé, puis le conserver pour la prochaine
+    synchronisation. 410 si le curseur a expiré : repartir sans curseur.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    spec = RESOURCES.get(resource)
+    if spec is None:
+        return JsonResponse({'detail': f"Ressource inconnue : {resource}"}, status=404)
+    try:
+        limit = int(request.GET.get('limit', settings.SYNC['page_size']))
+    except ValueError:
+        return JsonResponse({'detail': "limit doit être un entier"}, status=400)
+    limit = min(max(limit, 1), settings.SYNC['max_page_size'])
+
+    try:
+        page = changes_since(spec, request.GET.get('cursor'), limit)
+    except CursorExpired as exc:
+        return JsonResponse({'detail': str(exc)}, status=410)
+    except CursorError as exc:
+        return JsonResponse({'detail': str(exc)}, status=400)
+    return JsonResponse(dict(page, resource=resource))
+
+
+# ============================================================================
+# COUCHES GEOJSON
+# ============================================================================
+
+def _bbox(value):
+    """"minLng,minLat,maxLng,maxLat" -> tuple ; ValueError si mal formé"""
+    bbox = tuple(float(part) for part in value.split(','))
+    if len(bbox) != 4 or bbox[0] > bbox[2] or bbox[1] > bbox[3]:
+        raise ValueError(value)
+    return bbox
+
+
+async def geojson_layer(request, layer):
+    """
+    GET /api/geo/<couche>/[?mode=<slug>][&bbox=minLng,minLat,maxLng,maxLat]
+
+    FeatureCollection des objets actifs de la couche (stops, routes, hotels,
+    restaurants, car-rentals), diffusée au fil de la lecture (api/geojson.py).
+    `mode` filtre arrêts et lignes par mode de transport.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    spec = LAYERS.get(layer)
+    if spec is None:
+        return JsonResponse({'detail': f"Couche inconnue : {layer}"}, status=404)
+    bbox = None
+    if request.GET.get('bbox'):
+        try:
+            bbox = _bbox(request.GET['bbox'])
+        except ValueError:
+            return JsonResponse({'detail': "bbox attendu : minLng,minLat,maxLng,maxLat"}, status=400)
+
+    return StreamingHttpResponse(
+        astream_layer(spec, mode=request.GET.get('mode'), bbox=bbox),
+        content_type='application/geo+json',
+    )
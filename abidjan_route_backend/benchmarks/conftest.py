@@ -0,0 +1,118 @@
+"""
+Suite de benchmarks (pytest + pytest-django)
+
+    pytest benchmarks                              mesure et compare à la référence
+    pytest benchmarks --bench-save-baseline        enregistre la nouvelle référence
+    pytest benchmarks --bench-scale 0.1 -k route   plus de données, un sous-ensemble
+
+Les données viennent du générateur synthétique (core/synthetic.py), chargées
+une fois par session dans la base de test. Les benchmarks de requêtes
+demandent PostgreSQL/PostGIS (COPY, fonctions spatiales) et sont ignorés
+sur une autre base.
+
+Les résultats sont écrits en JSON (--bench-output) ; une métrique dépassant
+la référence (--bench-baseline) de plus de --bench-tolerance fait échouer
+la session. La référence n'est comparable que sur la même machine et à
+échelle égale.
+"""
+
+from datetime import date
+from pathlib import Path
+
+import pytest
+from django.db import connection
+
+from core.synthetic import SyntheticCity, copy_to_database
+
+from .harness import BenchmarkRecorder, compare, load_baseline
+
+
+HERE = Path(__file__).resolve().parent
+# Fin d'historique fixe : les mêmes données d'une exécution à l'autre
+SYNTHETIC_END = date(2026, 1, 5)
+SYNTHETIC_DAYS = 28
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('benchmarks')
+    group.addoption('--bench-output', default=str(HERE.parent / 'var' / 'benchmarks' / 'latest.json'))
+    group.addoption('--bench-baseline', default=str(HERE / 'baseline.json'))
+    group.addoption('--bench-save-baseline', action='store_true')
+    group.addoption('--bench-tolerance', type=float, default=1.25,
+                    help="Ratio actuel / référence au-delà duquel un benchmark est en régression")
+    group.addoption('--bench-scale', type=float, default=0.02)
+    group.addoption('--bench-seed', type=int, default=0)
+
+
+def pytest_configure(config):
+    config.bench_recorder = BenchmarkRecorder(meta={
+        'scale': config.getoption('--bench-scale'),
+        'seed': config.getoption('--bench-seed'),
+    })
+    config.bench_comparison = []
+
+
+@pytest.fixture(scope='session')
+def bench(pytestconfig):
+    return pytestconfig.bench_recorder
+
+
+@pytest.fixture(scope='session')
+def synthetic_city(pytestconfig):
+    return SyntheticCity(
+        seed=pytestconfig.getoption('--bench-seed'),
+        scale=pytestconfig.getoption('--bench-scale'),
+        days=SYNTHETIC_DAYS,
+        end=SYNTHETIC_END,
+    )
+
+
+@pytest.fixture(scope='session')
+def django_db_setup(django_db_setup, django_db_blocker, synthetic_city):
+    with django_db_blocker.unblock():
+        if connection.vendor == 'postgresql':
+            copy_to_database(synthetic_city)
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+
+
+@pytest.fixture
+def city_db(db, synthetic_city):
+    if connection.vendor != 'postgresql':
+        pytest.skip("Base PostGIS requise (COPY et fonctions spatiales)")
+    return synthetic_city
+
+
+def pytest_sessionfinish(session, exitstatus):
+    config = session.config
+    recorder = config.bench_recorder
+    if not recorder.results:
+        return
+    recorder.write(config.getoption('--bench-output'))
+    if config.getoption('--bench-save-baseline'):
+        recorder.write(config.getoption('--bench-baseline'))
+        return
+
+    baseline = load_baseline(config.getoption('--bench-baseline'))
+    config.bench_comparison = compare(recorder.results, baseline, config.getoption('--bench-tolerance'))
+    if any(regressed for *_, regressed in config.bench_comparison) and session.exitstatus == 0:
+        session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    results = config.bench_recorder.results
+    if not results:
+        return
+    terminalreporter.section('benchmarks')
+    rows = config.bench_comparison or [
+        (name, summary['metric'], None, summary[summary['metric']], None, False)
+        for name, summary in sorted(results.items())
+    ]
+    for name, metric, reference, current, ratio, regressed in rows:
+        line = f"{name:<32} {metric} {current:>10.3f} ms"
+        if 'throughput' in results[name]:
+            line += f"  {results[name]['throughput']:>10.1f}/s"
+        if ratio is not None:
+            line += f"  référence {reference:.3f} ms  x{ratio:.2f}"
+        terminalreporter.write_line(line, red=regressed, green=ratio is not None and not regressed)
+    terminalreporter.write_line(f"Résultats : {config.getoption('--bench-output')}")
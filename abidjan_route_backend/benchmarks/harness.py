@@ -0,0 +1,111 @@
+"""
+Mesures et comparaison à la référence pour la suite benchmarks/
+
+Chaque mesure est une série de durées (secondes) résumée en millisecondes :
+min, moyenne, p50, p95, p99, max, et un débit optionnel (unités / seconde).
+compare() confronte la métrique suivie de chaque benchmark (p50 par défaut,
+p95 pour les latences de requêtes) à celle de la référence enregistrée.
+"""
+
+import json
+import platform
+import statistics
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import django
+
+
+def percentile(samples, fraction):
+    """Percentile par interpolation linéaire (samples triés)"""
+    if not samples:
+        return float('nan')
+    position = (len(samples) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(samples) - 1)
+    return samples[lower] + (samples[upper] - samples[lower]) * (position - lower)
+
+
+def summarize(durations, units=None, metric='p50'):
+    ordered = sorted(durations)
+    ms = [value * 1000 for value in ordered]
+    summary = {
+        'rounds': len(ms),
+        'metric': metric,
+        'min': round(ms[0], 3),
+        'mean': round(statistics.fmean(ms), 3),
+        'p50': round(percentile(ms, 0.50), 3),
+        'p95': round(percentile(ms, 0.95), 3),
+        'p99': round(percentile(ms, 0.99), 3),
+        'max': round(ms[-1], 3),
+    }
+    if units is not None:
+        summary['throughput'] = round(units * len(ordered) / sum(ordered), 1)
+    return summary
+
+
+class BenchmarkRecorder:
+
+    def __init__(self, meta=None):
+        self.results = {}
+        self.meta = {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'machine': platform.machine(),
+            **(meta or {}),
+        }
+
+    def measure(self, name, func, args_list, warmup=3, units=None, metric='p50'):
+        """
+        Appelle func(*args) pour chaque args de `args_list` (après `warmup`
+        appels non mesurés) et enregistre le résumé sous `name`.
+        `units` : unités traitées par appel, pour le débit.
+        """
+        args_list = list(args_list)
+        for args in args_list[:warmup]:
+            func(*args)
+        durations = []
+        for args in args_list:
+            started = time.perf_counter()
+            func(*args)
+            durations.append(time.perf_counter() - started)
+        self.results[name] = summarize(durations, units=units, metric=metric)
+        return self.results[name]
+
+    def record(self, name, durations, units=None, metric='p50'):
+        self.results[name] = summarize(durations, units=units, metric=metric)
+        return self.results[name]
+
+    def as_dict(self):
+        return {'meta': self.meta, 'results': self.results}
+
+    def write(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.as_dict(), indent=2, sort_keys=True) + '\n', encoding='utf-8')
+
+
+def load_baseline(path):
+    path = Path(path)
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding='utf-8'))
+
+
+def compare(results, baseline, tolerance):
+    """
+    Lignes de comparaison (nom, métrique, référence, actuel, ratio, régression).
+    Régression : actuel > référence x tolerance.
+    """
+    rows = []
+    for name, current in sorted(results.items()):
+        reference = (baseline or {}).get('results', {}).get(name)
+        metric = current['metric']
+        if reference is None or not reference.get(metric):
+            rows.append((name, metric, None, current[metric], None, False))
+            continue
+        ratio = current[metric] / reference[metric]
+        rows.append((name, metric, reference[metric], current[metric], ratio, ratio > tolerance))
+    return rows
@@ -0,0 +1,7 @@
+"""Reconstruction du modèle de réseau : tables de vitesses et coefficients par mode"""
+
+from ai.eta import train_eta_model
+
+
+def test_graph_build(bench, city_db):
+    bench.measure('graph_build', train_eta_model, [()] * 3, warmup=0)
@@ -0,0 +1,44 @@
+"""Latences des requêtes d'une recherche d'itinéraire"""
+
+import random
+
+import pytest
+
+from core.models import Location, SearchHistory, TransportMode
+from transport.planner import TRANSIT_TYPES, build_context, destination_pois, nearest_stop, plan_route
+
+
+SAMPLES = 50
+
+
+@pytest.fixture
+def od_pairs(city_db):
+    """Trajets réellement recherchés (distribution de la demande), dans un ordre stable"""
+    pairs = list(
+        SearchHistory.objects.order_by('search_date', 'id')
+        .values_list('origin_id', 'destination_id')[:SAMPLES]
+    )
+    locations = Location.objects.in_bulk({pk for pair in pairs for pk in pair})
+    return [(locations[origin], locations[destination]) for origin, destination in pairs]
+
+
+def test_route_query(bench, od_pairs):
+    bench.measure(
+        'route_query',
+        lambda origin, destination: plan_route(build_context(origin, destination)),
+        od_pairs,
+        metric='p95',
+    )
+
+
+def test_nearest_stop(bench, od_pairs):
+    modes = list(TransportMode.objects.filter(type__in=TRANSIT_TYPES))
+    rng = random.Random(0)
+    cases = [(rng.choice(modes), origin.coordinates) for origin, _ in od_pairs]
+    bench.measure('nearest_stop', nearest_stop, cases, metric='p95')
+
+
+def test_poi_corridor(bench, od_pairs):
+    contexts = [(build_context(origin, destination),) for origin, destination in od_pairs]
+    bench.measure('poi_corridor', destination_pois, contexts, metric='p95')
+
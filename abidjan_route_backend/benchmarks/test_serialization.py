@@ -0,0 +1,24 @@
+"""Débit de sérialisation des réponses JSON"""
+
+from django.http import JsonResponse
+
+from core.models import Location
+from transport.planner import build_context, location_payload, plan_route
+
+
+def test_route_result_serialization(bench, city_db):
+    locations = list(Location.objects.filter(type='quartier').order_by('id')[:20])
+    results = [
+        plan_route(build_context(origin, destination))
+        for origin, destination in zip(locations, locations[1:])
+    ]
+    bench.measure('serialize_route_result', JsonResponse, [(result,) for result in results] * 10, units=1)
+
+
+def test_locations_serialization(bench, city_db):
+    locations = list(Location.objects.all())
+
+    def serialize():
+        return JsonResponse([location_payload(location) for location in locations], safe=False)
+
+    bench.measure('serialize_locations', serialize, [()] * 20, units=len(locations))
@@ -0,0 +1,73 @@
+"""
+Latences des endpoints servis au frontend, de la requête HTTP au corps complet
+
+Les suggestions de lieux (SearchForm.tsx) sont filtrées côté client dans le
+paquet de référence : reference_bundle est le chemin réel de l'autocomplétion.
+"""
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import AsyncClient
+from django.urls import reverse
+
+from api.bundle import bundle_cache
+from core.models import SearchHistory
+
+
+SAMPLES = 50
+
+
+async def _get(path, data=None, **headers):
+    response = await AsyncClient().get(path, data, **headers)
+    assert response.status_code in (200, 304), response.status_code
+    if response.streaming:
+        return b''.join([chunk async for chunk in response.streaming_content])
+    return response.content
+
+
+fetch = async_to_sync(_get)
+
+
+@pytest.fixture
+def search_params(city_db):
+    """Trajets recherchés distincts : chaque appel mesuré calcule l'itinéraire (cache vide)"""
+    pairs = {}
+    for pair in (
+        SearchHistory.objects.order_by('search_date', 'id')
+        .values_list('origin__slug', 'destination__slug').iterator()
+    ):
+        pairs.setdefault(pair, None)
+        if len(pairs) == SAMPLES:
+            break
+    return [({'from': origin, 'to': destination},) for origin, destination in pairs]
+
+
+def test_route_search_view(bench, search_params):
+    cache.clear()
+    bench.measure(
+        'view_route_search',
+        lambda params: fetch(reverse('api:route-search'), params),
+        search_params, warmup=0, metric='p95',
+    )
+
+
+def test_reference_bundle_view(bench, city_db):
+    path = reverse('api:reference-bundle')
+    etag = bundle_cache.get().etag
+    bench.measure(
+        'view_reference_bundle',
+        lambda: fetch(path, HTTP_ACCEPT_ENCODING='gzip'),
+        [()] * SAMPLES, metric='p95',
+    )
+    bench.measure(
+        'view_reference_bundle_304',
+        lambda: fetch(path, HTTP_IF_NONE_MATCH=etag),
+        [()] * SAMPLES, metric='p95',
+    )
+
+
+@pytest.mark.parametrize('layer', ['stops', 'routes', 'hotels'])
+def test_geojson_layer_view(bench, city_db, layer):
+    path = reverse('api:geojson-layer', args=[layer])
+    bench.measure(f'view_geojson_{layer}', lambda: fetch(path), [()] * 10, metric='p95')
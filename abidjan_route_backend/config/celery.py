@@ -0,0 +1,87 @@
+"""
+Application Celery du projet
+
+Les tâches lourdes (reconstruction des modèles de réseau, précalcul
+d'itinéraires, agrégats, réconciliation des notes, fusion des imports) sont
+exécutées par des workers dédiés, une file par famille (voir CELERY_TASK_ROUTES
+et CELERY_WORKER_QUEUES dans config/settings.py) :
+
+    celery -A config worker -Q graph -c 1 -n graph@%h
+    celery -A config worker -Q precompute -c 4 -n precompute@%h
+    celery -A config beat
+
+Toutes les tâches sont idempotentes : relancées après une coupure (acks_late),
+elles recalculent le même résultat.
+"""
+
+import os
+
+from celery import Celery
+from celery.schedules import crontab
+from django.core.cache import cache
+
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+app = Celery('config')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
+
+# Maintenance lourde aux heures creuses (Abidjan = UTC), précalcul avant chaque heure
+app.conf.beat_schedule = {
+    'forecast-and-prewarm': {
+        'task': 'ai.tasks.forecast_and_prewarm',
+        'schedule': crontab(minute=45),
+    },
+    'rollup-prices': {
+        'task': 'core.tasks.rollup_prices',
+        'schedule': crontab(minute='*/15'),
+    },
+    'maintain-partitions': {
+        'task': 'core.tasks.maintain_partitions',
+        'schedule': crontab(hour=2, minute=0),
+    },
+    'purge-tombstones': {
+        'task': 'core.tasks.purge_tombstones',
+        'schedule': crontab(hour=2, minute=15),
+    },
+    'reconcile-ratings': {
+        'task': 'core.tasks.reconcile_ratings',
+        'schedule': crontab(hour=2, minute=30),
+    },
+    'train-models': {
+        'task': 'ai.tasks.train_models',
+        'schedule': crontab(hour=3, minute=0),
+    },
+}
+
+
+def report_progress(task, done, total, **extra):
+    """Publie l'avancement d'une tâche (état PROGRESS, lisible via AsyncResult.info)"""
+    if task.request.id and not task.request.is_eager:
+        task.update_state(state='PROGRESS', meta={'done': done, 'total': total, **extra})
+
+
+class single_instance:
+    """
+    Verrou (cache partagé) empêchant deux exécutions simultanées d'une même
+    tâche de maintenance, par exemple si beat relance une passe encore en
+    cours. `timeout` borne la durée du verrou si un worker disparaît.
+
+        with single_instance('rollup_prices', timeout=3600) as acquired:
+            if not acquired:
+                return
+    """
+
+    def __init__(self, name, timeout):
+        self.key = f'celery-lock:{name}'
+        self.timeout = timeout
+        self.acquired = False
+
+    def __enter__(self):
+        self.acquired = cache.add(self.key, os.getpid(), self.timeout)
+        return self.acquired
+
+    def __exit__(self, *exc_info):
+        if self.acquired:
+            cache.delete(self.key)
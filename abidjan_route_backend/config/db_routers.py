@@ -0,0 +1,245 @@
+"""
+Lectures sur réplicas PostgreSQL
+
+Les données de référence (lieux, modes, arrêts, lignes, segments, POI) sont
+lues des dizaines de fois par recherche et modifiées rarement : pendant une
+requête HTTP, ReplicaRouter envoie leurs lectures sur un réplica
+(DATABASE_REPLICAS, choisi au hasard). Tout le reste (SearchHistory,
+Rating, TrafficData, PriceHistory...) ainsi que toutes les écritures vont
+sur le primaire.
+
+Lecture après écriture : une requête qui modifie une donnée de référence
+lit ensuite sur le primaire, et ReplicaPinMiddleware pose un cookie qui y
+maintient le client pendant REPLICA_LAG_SECONDS, le temps que la
+réplication rattrape son retard. Les requêtes non sûres (POST, PUT...) et
+les lectures dans une transaction du primaire n'utilisent pas de réplica.
+
+Retard : un thread de fond par processus, démarré à la première lecture
+routable, mesure toutes les REPLICA_LAG_CHECK_INTERVAL secondes le retard
+de rejeu de chaque réplica (pg_last_xact_replay_timestamp), avec un délai
+de connexion et d'exécution courts ; les requêtes ne l'attendent jamais.
+Un réplica en retard de plus de REPLICA_LAG_SECONDS, ou injoignable, est
+écarté jusqu'à la mesure suivante ; tant qu'aucune mesure n'a abouti, ou
+sans réplica utilisable, les lectures vont sur le primaire. Un client qui
+n'a rien écrit peut donc lire des données vieilles d'au plus
+REPLICA_LAG_SECONDS (plus l'intervalle de mesure).
+
+Le corps d'une réponse en flux (route_search_stream, geojson_layer) garde
+l'état de sa requête : ses lectures de référence vont aussi sur un réplica.
+Le cookie ne peut plus être posé une fois les en-têtes partis ; seules les
+écritures faites avant comptent.
+
+Hors requête (commandes, tâches Celery), tout va sur le primaire ;
+pin_to_primary() force le primaire dans une portion de requête.
+"""
+
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections, transaction
+
+from .streaming import bind_streaming
+
+
+logger = logging.getLogger(__name__)
+
+REPLICATED_MODELS = frozenset({
+    'core.location',
+    'core.transportmode',
+    'core.transportstop',
+    'core.transportroute',
+    'core.routesegment',
+    'core.hotel',
+    'core.restaurant',
+    'core.carrental',
+})
+
+PIN_COOKIE = 'db_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Secondes depuis la dernière transaction rejouée ; 0 si le réplica a tout
+# rejoué (rien de neuf sur le primaire) ou si la base n'est pas un réplica
+LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+# Durée maximale de la mesure sur un réplica surchargé (ms)
+LAG_TIMEOUT_MS = 200
+
+
+class PinState:
+    """État d'une requête ; objet mutable partagé avec les threads du pool"""
+
+    __slots__ = ('pinned', 'wrote')
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+_state = ContextVar('db_pin_state', default=None)
+
+
+@contextmanager
+def pin_to_primary():
+    """Lectures sur le primaire dans le bloc, quel que soit l'état de la requête"""
+    token = _state.set(PinState(pinned=True))
+    try:
+        yield
+    finally:
+        _state.reset(token)
+
+
+def _replicated(model):
+    return model._meta.label_lower in REPLICATED_MODELS
+
+
+def replica_lag(alias):
+    """Retard de rejeu du réplica en secondes ; None s'il est injoignable"""
+    try:
+        with transaction.atomic(using=alias), connections[alias].cursor() as cursor:
+            cursor.execute(f"SET LOCAL statement_timeout = {LAG_TIMEOUT_MS}")
+            cursor.execute(LAG_SQL)
+            return float(cursor.fetchone()[0])
+    except DatabaseError:
+        logger.warning("Réplica %s injoignable", alias, exc_info=True)
+        # Connexion rouverte à la mesure suivante
+        connections[alias].close()
+        return None
+
+
+class ReplicaHealth:
+    """Réplicas utilisables d'après la dernière mesure du thread de fond"""
+
+    def __init__(self):
+        self._healthy = ()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def healthy(self):
+        """Ne bloque jamais : () (primaire) tant qu'aucune mesure n'a abouti"""
+        if self._thread is None or not self._thread.is_alive():
+            self.start()
+        return self._healthy
+
+    def start(self):
+        # is_alive() : le thread n'existe plus dans un processus issu d'un fork
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='replica-health', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        # Nouveau thread, contexte vide : les mesures ne sont pas comptées
+        # dans les requêtes SQL d'une requête HTTP, et ses connexions aux
+        # réplicas lui sont propres
+        while True:
+            try:
+                self.measure()
+            except Exception:
+                logger.exception("Mesure du retard des réplicas impossible")
+            time.sleep(settings.REPLICA_LAG_CHECK_INTERVAL)
+
+    def measure(self):
+        self._healthy = tuple(self._usable())
+
+    def _usable(self):
+        for alias in settings.DATABASE_REPLICA_ALIASES:
+            lag = replica_lag(alias)
+            if lag is None:
+                continue
+            if lag > settings.REPLICA_LAG_SECONDS:
+                logger.warning("Réplica %s écarté : %.1f s de retard", alias, lag)
+                continue
+            yield alias
+
+    def clear(self):
+        self._healthy = ()
+
+
+replica_health = ReplicaHealth()
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state.pinned or not settings.DATABASE_REPLICA_ALIASES or not _replicated(model):
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        replicas = replica_health.healthy()
+        if not replicas:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None and _replicated(model):
+            state.pinned = state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primaire et réplicas portent les mêmes données
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Les réplicas reçoivent le schéma par la réplication
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaPinMiddleware:
+    """Active le routage vers les réplicas pour la requête ; cookie de maintien sur le primaire"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = self.state_for(request)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if response.streaming:
+            bind_streaming(response, _state, state)
+        return self.pin(response, state)
+
+    async def __acall__(self, request):
+        state = self.state_for(request)
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        if response.streaming:
+            bind_streaming(response, _state, state)
+        return self.pin(response, state)
+
+    def state_for(self, request):
+        return PinState(pinned=request.method not in SAFE_METHODS or PIN_COOKIE in request.COOKIES)
+
+    def pin(self, response, state):
+        if state.wrote:
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=settings.REPLICA_LAG_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
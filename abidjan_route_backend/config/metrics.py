@@ -0,0 +1,140 @@
+"""
+Métriques Prometheus (exposées sur /metrics)
+
+    http_request_duration_seconds{view, method, status}   latence par vue
+    http_request_db_seconds{view}                         temps SQL par requête
+    route_search_phase_seconds{phase}                     temps de recherche par phase
+    route_cache_requests_total{result}                    cache d'itinéraires (hit / miss)
+    ingest_buffer_depth{buffer}                           lignes en attente d'écriture
+    ingest_rows_total{buffer, outcome}                    lignes acceptées / refusées / écrites
+
+Phases de recherche : context (lieux, modes), access (arrêt le plus proche),
+transit, road, car_rental (familles d'options), pois, ranking.
+
+Sous gunicorn, chaque worker a ses propres compteurs : avec
+PROMETHEUS_MULTIPROC_DIR défini (voir gunicorn.conf.py), prometheus_client
+les écrit dans des fichiers mmap de ce dossier et /metrics agrège tous les
+workers. /metrics n'est servi qu'aux adresses METRICS_ALLOWED_IPS.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from .queries import capture_queries
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds',
+    "Durée des requêtes HTTP par vue",
+    ['view', 'method', 'status'],
+    buckets=LATENCY_BUCKETS,
+)
+REQUEST_DB_TIME = Histogram(
+    'http_request_db_seconds',
+    "Temps passé en base par requête HTTP",
+    ['view'],
+    buckets=LATENCY_BUCKETS,
+)
+SEARCH_PHASE = Histogram(
+    'route_search_phase_seconds',
+    "Temps de recherche d'itinéraire par phase",
+    ['phase'],
+    buckets=LATENCY_BUCKETS,
+)
+ROUTE_CACHE = Counter(
+    'route_cache_requests',
+    "Consultations du cache d'itinéraires",
+    ['result'],
+)
+INGEST_BUFFER_DEPTH = Gauge(
+    'ingest_buffer_depth',
+    "Lignes en attente dans les tampons d'ingestion",
+    ['buffer'],
+    multiprocess_mode='livesum',
+)
+INGEST_ROWS = Counter(
+    'ingest_rows',
+    "Lignes d'observations par issue (accepted, rejected, written, dropped)",
+    ['buffer', 'outcome'],
+)
+
+
+@contextmanager
+def time_phase(phase):
+    """Mesure un bloc de la recherche d'itinéraire dans route_search_phase_seconds"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        SEARCH_PHASE.labels(phase).observe(time.perf_counter() - started)
+
+
+def timed_phase(phase, func):
+    """Version fonction de time_phase, pour envelopper une famille d'options"""
+    def wrapper(*args, **kwargs):
+        with time_phase(phase):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+class PrometheusMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        with capture_queries() as queries:
+            response = self.get_response(request)
+        self.observe(request, response, started, queries)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        with capture_queries() as queries:
+            response = await self.get_response(request)
+        self.observe(request, response, started, queries)
+        return response
+
+    def observe(self, request, response, started, queries):
+        match = request.resolver_match
+        # Nom d'URL plutôt que chemin : nombre de séries borné
+        view = match.view_name if match else 'unmatched'
+        REQUEST_DURATION.labels(view, request.method, response.status_code).observe(
+            time.perf_counter() - started
+        )
+        REQUEST_DB_TIME.labels(view).observe(queries.duration)
+
+
+def metrics_view(request):
+    if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        return HttpResponseForbidden()
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,200 @@
+"""
+Profilage échantillonné des requêtes (cProfile)
+
+Quand PROFILING['enabled'] est vrai, une fraction `sample_rate` des
+requêtes est exécutée sous cProfile. Une requête portant un en-tête
+X-Profile signé et récent est toujours profilée, même si le profilage est
+désactivé : on peut ainsi profiler une recherche réelle en production sans
+toucher aux workers (jeton : python manage.py profile_token).
+
+Chaque profil est écrit au format pstats dans
+    PROFILING['dir']/<nom d'URL>/<AAAAMMJJTHHMMSS>-<pid>-<id>.prof
+lisible par snakeviz, flameprof ou gprof2dot ; la réponse porte
+X-Profile-Id. python manage.py aggregate_profiles fusionne les profils de
+tous les workers.
+
+Ce qui est mesuré :
+- sous WSGI, le thread de la requête (vues synchrones) ;
+- sous WSGI comme sous ASGI, le travail délégué au pool de la recherche
+  (api/search.py:run_in_pool) : chaque appel y est exécuté sous son propre
+  cProfile (run_profiled), rattaché à la requête par un contextvar que
+  run_in_pool propage au thread. C'est là que la recherche d'itinéraires
+  passe son temps (planificateur, SQL, modèles ai).
+La boucle d'événements ASGI n'est jamais profilée : elle entrelace les
+coroutines de plusieurs requêtes. Pour une réponse en flux, le contexte
+est rétabli pendant la production du corps (config/streaming.py) et le
+profil est écrit à sa fin. Les profils d'une requête sont fusionnés en un
+seul fichier. Un seul profil de requête à la fois par thread ; une
+requête concurrente du même thread n'est pas profilée. À partir de Python
+3.12, un seul cProfile peut être actif par processus : les appels qui n'en
+obtiennent pas tournent sans profil.
+
+Le fichier .prof est écrit par un thread dédié pendant l'envoi de la
+réponse : l'écriture ne rallonge pas la requête profilée.
+"""
+
+import cProfile
+import os
+import pstats
+import random
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+
+from .streaming import bind_streaming
+
+
+HEADER = 'X-Profile'
+SALT = 'config.profiling'
+
+_state = threading.local()
+
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='profile-dump')
+
+
+def make_token():
+    return signing.TimestampSigner(salt=SALT).sign('profile')
+
+
+def _valid_token(token):
+    try:
+        signing.TimestampSigner(salt=SALT).unsign(token, max_age=settings.PROFILING['token_max_age'])
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def should_profile(request):
+    token = request.headers.get(HEADER)
+    if token:
+        return _valid_token(token)
+    config = settings.PROFILING
+    return config['enabled'] and random.random() < config['sample_rate']
+
+
+class ProfileSession:
+    """Profils collectés pour une requête (thread de la requête et pool de la recherche)"""
+
+    def __init__(self):
+        self.profilers = []
+        self._lock = threading.Lock()
+
+    def add(self, profiler):
+        with self._lock:
+            self.profilers.append(profiler)
+
+
+_session = ContextVar('profile_session', default=None)
+
+
+def run_profiled(func, *args):
+    """func(*args), sous cProfile si la requête appelante est profilée"""
+    session = _session.get()
+    if session is None:
+        return func(*args)
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Python >= 3.12 : un autre cProfile est déjà actif dans le processus
+        return func(*args)
+    try:
+        return func(*args)
+    finally:
+        profiler.disable()
+        session.add(profiler)
+
+
+def _write(profilers, directory, profile_id):
+    if not profilers:
+        return
+    directory.mkdir(parents=True, exist_ok=True)
+    pstats.Stats(*profilers).dump_stats(directory / f"{profile_id}.prof")
+
+
+def new_profile_id():
+    return f"{timezone.now():%Y%m%dT%H%M%S}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+
+def dump(profilers, request, profile_id=None):
+    """Planifie l'écriture des profils (désactivés) fusionnés ; renvoie son identifiant"""
+    match = request.resolver_match
+    url_name = (match.view_name if match else 'unmatched').replace(':', '.')
+    directory = Path(settings.PROFILING['dir']) / url_name
+    profile_id = profile_id or new_profile_id()
+    _writer.submit(_write, list(profilers), directory, profile_id)
+    return profile_id
+
+
+class ProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _start(self, request):
+        if getattr(_state, 'active', False) or not should_profile(request):
+            return None
+        _state.active = True
+        session = ProfileSession()
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            pass
+        else:
+            session.add(profiler)
+        return session, profiler, _session.set(session)
+
+    def _stop(self, started):
+        session, profiler, token = started
+        profiler.disable()
+        _session.reset(token)
+        _state.active = False
+        return session
+
+    def _finish(self, session, request, response):
+        if response.streaming:
+            # Le corps, et la recherche qu'il lance, est produit après le retour : profil écrit à la fin
+            profile_id = response['X-Profile-Id'] = new_profile_id()
+            bind_streaming(
+                response, _session, session,
+                on_close=lambda: dump(session.profilers, request, profile_id),
+            )
+        elif session.profilers:
+            response['X-Profile-Id'] = dump(session.profilers, request)
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = self._start(request)
+        if started is None:
+            return self.get_response(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            session = self._stop(started)
+        return self._finish(session, request, response)
+
+    async def __acall__(self, request):
+        # Boucle d'événements non profilée : seul le pool de la recherche l'est (run_profiled)
+        if not should_profile(request):
+            return await self.get_response(request)
+        session = ProfileSession()
+        token = _session.set(session)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _session.reset(token)
+        return self._finish(session, request, response)
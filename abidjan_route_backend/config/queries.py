@@ -0,0 +1,192 @@
+"""
+Profilage des requêtes SQL par requête HTTP (optionnel)
+
+QueryProfilerMiddleware compte, pour chaque requête HTTP, les requêtes SQL
+exécutées, leur durée totale et leurs empreintes (SQL paramétré, listes IN
+réduites). Une empreinte répétée au moins `repeat_threshold` fois signale
+un motif N+1 (typiquement un __str__ ou une boucle qui suit une clé
+étrangère sans select_related).
+
+Réponse :
+    X-DB-Queries: 42
+    X-DB-Time-Ms: 18.3
+    X-DB-Repeated: 2            (empreintes répétées, détaillées dans les logs)
+    X-DB-Query-Budget: exceeded (au-delà de QUERY_BUDGETS[<nom d'URL>])
+
+Activation : QUERY_PROFILER['enabled'] (par défaut en DEBUG). En test,
+QUERY_PROFILER['raise_on_budget'] lève QueryBudgetExceeded pour faire
+échouer le test ; query_budget() vérifie un bloc de code directement :
+
+    with query_budget(5):
+        client.get('/api/routes/search/?from=...')
+
+Les requêtes exécutées dans d'autres threads sont comptées si le contexte y
+est propagé (sync_to_async, api/search.py:run_in_pool). Une réponse en flux
+(route_search_stream, geojson_layer) n'a pas d'en-têtes X-DB-* : ses
+requêtes, y compris celles du corps, sont comptées jusqu'à la fin de
+l'envoi, puis le budget est vérifié (journal, ou QueryBudgetExceeded levée
+pendant la lecture du corps).
+"""
+
+import contextvars
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from .streaming import bind_streaming
+
+
+logger = logging.getLogger(__name__)
+
+# Journaux actifs : les captures peuvent s'imbriquer (métriques + profilage)
+_current = contextvars.ContextVar('query_logs', default=())
+
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+_SPACES = re.compile(r'\s+')
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def fingerprint(sql):
+    """SQL normalisé : listes IN de longueur variable réduites, espaces compactés"""
+    return _SPACES.sub(' ', _IN_LIST.sub('IN (...)', sql)).strip()
+
+
+@dataclass
+class QueryLog:
+    count: int = 0
+    duration: float = 0.0
+    fingerprints: Counter = field(default_factory=Counter)
+
+    def add(self, key, duration):
+        self.count += 1
+        self.duration += duration
+        self.fingerprints[key] += 1
+
+    def repeated(self, threshold=None):
+        threshold = threshold or settings.QUERY_PROFILER['repeat_threshold']
+        return [(sql, count) for sql, count in self.fingerprints.most_common() if count >= threshold]
+
+
+def _record(execute, sql, params, many, context):
+    logs = _current.get()
+    if not logs:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        key = fingerprint(sql)
+        for log in logs:
+            log.add(key, duration)
+
+
+def _install(connection, **kwargs):
+    if _record not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record)
+
+
+def install():
+    """Branche l'enregistreur sur toutes les connexions (actuelles et futures, tous threads)"""
+    connection_created.connect(_install, dispatch_uid='config.queries')
+    for connection in connections.all(initialized_only=True):
+        _install(connection)
+
+
+@contextmanager
+def capture_queries():
+    """Enregistre les requêtes SQL du bloc (et des threads qui en héritent le contexte)"""
+    install()
+    log = QueryLog()
+    token = _current.set(_current.get() + (log,))
+    try:
+        yield log
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def query_budget(limit):
+    """Lève QueryBudgetExceeded si le bloc exécute plus de `limit` requêtes SQL"""
+    with capture_queries() as log:
+        yield log
+    if log.count > limit:
+        detail = '\n'.join(f"  {count} x {sql}" for sql, count in log.fingerprints.most_common(5))
+        raise QueryBudgetExceeded(f"{log.count} requêtes SQL pour un budget de {limit}\n{detail}")
+
+
+class QueryProfilerMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.QUERY_PROFILER['enabled']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        install()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with capture_queries():
+            logs = _current.get()
+            response = self.get_response(request)
+        return self.report(request, response, logs)
+
+    async def __acall__(self, request):
+        with capture_queries():
+            logs = _current.get()
+            response = await self.get_response(request)
+        return self.report(request, response, logs)
+
+    def report(self, request, response, logs):
+        log = logs[-1]
+        match = request.resolver_match
+        view_name = match.view_name if match else request.path
+
+        if response.streaming:
+            # Corps produit après le retour du middleware : ses requêtes
+            # comptent aussi, vérification une fois l'envoi terminé
+            return bind_streaming(response, _current, logs, on_close=lambda: self.check(view_name, log))
+
+        repeated, exceeded = self.check(view_name, log)
+        response['X-DB-Queries'] = str(log.count)
+        response['X-DB-Time-Ms'] = f"{log.duration * 1000:.1f}"
+        if repeated:
+            response['X-DB-Repeated'] = str(len(repeated))
+        if exceeded:
+            response['X-DB-Query-Budget'] = 'exceeded'
+        return response
+
+    def check(self, view_name, log):
+        """Journalise les N+1 probables et le dépassement de QUERY_BUDGETS ; renvoie (répétées, dépassé)"""
+        repeated = log.repeated()
+        if repeated:
+            logger.warning(
+                "N+1 probable sur %s : %s",
+                view_name,
+                '; '.join(f"{count} x {sql[:200]}" for sql, count in repeated),
+            )
+
+        budget = settings.QUERY_BUDGETS.get(view_name)
+        exceeded = budget is not None and log.count > budget
+        if exceeded:
+            message = f"{view_name} : {log.count} requêtes SQL pour un budget de {budget}"
+            if settings.QUERY_PROFILER['raise_on_budget']:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return repeated, exceeded
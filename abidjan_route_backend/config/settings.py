@@ -14,9 +14,6 @@ import os
 
 from pathlib import Path
 
-# Indiquer à Django où trouver GDAL
-GDAL_LIBRARY_PATH = r"C:\OSGeo4W\bin\gdal312.dll"
-
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -36,6 +33,23 @@ env = environ.Env(
 # On lui dit où se trouve le fichier .env par rapport à ce dossier
 environ.Env.read_env(os.path.join(BASE_DIR, '.env'))
 
+# Bibliothèques GDAL/GEOS : variables GDAL_LIBRARY_PATH / GEOS_LIBRARY_PATH si
+# définies ; sinon détection automatique de Django sous Linux/macOS
+# (libgdal, libgeos_c installées par le système) et OSGeo4W sous Windows.
+GDAL_LIBRARY_PATH = env('GDAL_LIBRARY_PATH', default=None)
+GEOS_LIBRARY_PATH = env('GEOS_LIBRARY_PATH', default=None)
+if os.name == 'nt':
+    OSGEO4W_BIN = Path(env('OSGEO4W_ROOT', default=r'C:\OSGeo4W')) / 'bin'
+    if OSGEO4W_BIN.is_dir():
+        os.environ['PATH'] = f"{OSGEO4W_BIN};{os.environ['PATH']}"
+        os.environ.setdefault('PROJ_LIB', str(OSGEO4W_BIN.parent / 'share' / 'proj'))
+        if GDAL_LIBRARY_PATH is None:
+            # Version la plus récente installée (gdal312.dll, gdal309.dll...)
+            candidates = sorted(OSGEO4W_BIN.glob('gdal[0-9]*.dll'))
+            GDAL_LIBRARY_PATH = str(candidates[-1]) if candidates else None
+        if GEOS_LIBRARY_PATH is None and (OSGEO4W_BIN / 'geos_c.dll').exists():
+            GEOS_LIBRARY_PATH = str(OSGEO4W_BIN / 'geos_c.dll')
+
 # 3. Récupérer les valeurs du .env
 SECRET_KEY = env('DJANGO_SECRET_KEY')
 DEBUG = env('DEBUG')
@@ -61,10 +75,18 @@ INSTALLED_APPS = [
     'api',
     'ai',
     'django.contrib.gis', # pour les fonctionnalités géospatiales
+
+    # Tâches asynchrones (config/celery.py)
+    'django_celery_beat',
+    'django_celery_results',
 ]
 
 MIDDLEWARE = [
+    "config.metrics.PrometheusMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "config.db_routers.ReplicaPinMiddleware",  # lectures sur réplicas, voir DATABASE_REPLICAS
+    "config.queries.QueryProfilerMiddleware",  # optionnel, voir QUERY_PROFILER
+    "config.profiling.ProfilingMiddleware",  # échantillonnage ou en-tête X-Profile signé
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -105,9 +127,62 @@ DATABASES = {
         "PASSWORD": env('DB_PASSWORD'), # ton mot de passe PostgreSQL
         "HOST": env('DB_HOST'),            # ou l'IP du serveur PostgreSQL
         "PORT": env('DB_PORT'),                 # port PostgreSQL par défaut
+        # Connexions persistantes : réutilisées d'une requête à l'autre pendant
+        # CONN_MAX_AGE secondes, vérifiées avant réutilisation (CONN_HEALTH_CHECKS)
+        "CONN_MAX_AGE": env.int('DB_CONN_MAX_AGE', default=600),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            "connect_timeout": env.int('DB_CONNECT_TIMEOUT', default=5),
+            "application_name": env('DB_APPLICATION_NAME', default='abidjan_route'),
+        },
     }
 }
 
+# Mode pgbouncer (DB_PGBOUNCER=True, HOST/PORT pointant sur pgbouncer en
+# pool_mode = transaction) : une connexion serveur n'est attachée au client que
+# le temps d'une transaction, donc pas de curseurs serveur (.iterator() lit
+# alors par paquets côté client). Les connexions vers pgbouncer restent
+# persistantes : elles ne coûtent rien côté PostgreSQL.
+DB_PGBOUNCER = env.bool('DB_PGBOUNCER', default=False)
+if DB_PGBOUNCER:
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+
+# Dimensionnement (vérifié par `manage.py check --deploy`, voir core/checks.py).
+# Une connexion est ouverte par thread qui touche la base, soit par processus :
+#   web    : 1 (requête) + ROUTE_SEARCH_WORKERS (api/search.py) +
+#            1 thread par tampon d'ingestion (api/ingest.py) +
+#            min(32, CPU + 4) (pool par défaut de asyncio, sync_to_async) +
+#            1 (écriture des profils), fois GUNICORN_WORKERS ;
+#   celery : 1 par processus de la concurrence de chaque file (CELERY_WORKER_QUEUES).
+# Sans pgbouncer, le total doit rester sous max_connections de PostgreSQL
+# (DB_MAX_CONNECTIONS, marge déduite pour l'administration).
+DB_MAX_CONNECTIONS = env.int('DB_MAX_CONNECTIONS', default=100)
+DB_RESERVED_CONNECTIONS = env.int('DB_RESERVED_CONNECTIONS', default=10)
+
+# Réplicas en lecture des données de référence (voir config/db_routers.py) :
+# "hôte" ou "hôte:port" séparés par des virgules, mêmes identifiants que le
+# primaire. Les tests les font pointer sur la base par défaut (MIRROR).
+DATABASE_REPLICAS = env.list('DATABASE_REPLICAS', default=[])
+DATABASE_REPLICA_ALIASES = []
+for index, address in enumerate(DATABASE_REPLICAS, start=1):
+    host, _, port = address.partition(':')
+    alias = f'replica{index}'
+    DATABASES[alias] = dict(
+        DATABASES['default'],
+        HOST=host,
+        PORT=port or DATABASES['default']['PORT'],
+        # Réplica injoignable écarté vite par la mesure du retard
+        OPTIONS=dict(DATABASES['default']['OPTIONS'], connect_timeout=env.int('REPLICA_CONNECT_TIMEOUT', default=1)),
+        TEST={'MIRROR': 'default'},
+    )
+    DATABASE_REPLICA_ALIASES.append(alias)
+DATABASE_ROUTERS = ['config.db_routers.ReplicaRouter']
+# Durée pendant laquelle un client qui vient d'écrire reste lu sur le primaire,
+# et retard maximal toléré d'un réplica avant qu'il soit écarté
+REPLICA_LAG_SECONDS = env.int('REPLICA_LAG_SECONDS', default=5)
+# Intervalle entre deux mesures du retard des réplicas (par processus)
+REPLICA_LAG_CHECK_INTERVAL = env.float('REPLICA_LAG_CHECK_INTERVAL', default=1.0)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -150,6 +225,164 @@ STATIC_URL = "static/"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Cache partagé (itinéraires, verrous des tâches) ; en production : redis://...
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
 #Pour utiliser notre propre modèle d'utilisateur
 AUTH_USER_MODEL = 'core.User'
 
+
+# Partitionnement mensuel des grosses tables (PostgreSQL, voir core/partitioning.py)
+# - premake_months : partitions créées à l'avance (python manage.py create_partitions)
+# - retention_months : mois conservés dans la table active (python manage.py prune_partitions)
+# - retention_action : 'archive' (déplacement dans PARTITION_ARCHIVE_SCHEMA) ou 'drop'
+PARTITIONED_TABLES = {
+    'search_history': {
+        'column': 'search_date',
+        'premake_months': 3,
+        'retention_months': env.int('SEARCH_HISTORY_RETENTION_MONTHS', default=13),
+        'retention_action': env('SEARCH_HISTORY_RETENTION_ACTION', default='archive'),
+    },
+    'traffic_data': {
+        'column': 'recorded_at',
+        'premake_months': 3,
+        'retention_months': env.int('TRAFFIC_DATA_RETENTION_MONTHS', default=24),
+        'retention_action': 'archive',
+    },
+    'price_history': {
+        'column': 'recorded_at',
+        'premake_months': 3,
+        'retention_months': env.int('PRICE_HISTORY_RETENTION_MONTHS', default=24),
+        'retention_action': 'archive',
+    },
+}
+PARTITION_ARCHIVE_SCHEMA = 'archive'
+# Tablespace optionnel (stockage froid/compressé) pour les partitions archivées
+PARTITION_ARCHIVE_TABLESPACE = env('PARTITION_ARCHIVE_TABLESPACE', default=None)
+
+# Agrégats de prix (core/rollups.py) : les lignes insérées il y a moins de
+# ROLLUP_SAFETY_LAG_SECONDS ne sont pas encore agrégées (transactions en cours)
+ROLLUP_SAFETY_LAG_SECONDS = env.int('ROLLUP_SAFETY_LAG_SECONDS', default=120)
+
+# Ingestion en direct des observations (api/ingest.py, ASGI)
+# Jetons Bearer acceptés ; vide : endpoint fermé (voir core.W002)
+INGEST_TOKENS = env.list('INGEST_TOKENS', default=[])
+INGEST_MAX_BATCH_LINES = 5000
+INGEST_RETRY_AFTER_SECONDS = 2
+INGEST_BUFFER = {
+    'capacity': env.int('INGEST_BUFFER_CAPACITY', default=50000),
+    'batch_size': 5000,
+    'flush_interval': 1.0,
+    # Essais d'un paquet avant d'en écarter les lignes fautives
+    'max_attempts': 3,
+}
+
+# Modèles entraînés par l'application ai (artefacts versionnés, voir ai/artifacts.py)
+AI_MODEL_DIR = env('AI_MODEL_DIR', default=str(BASE_DIR / 'var' / 'models'))
+# Relecture de la version active des modèles (bascule à chaud), en secondes
+AI_MODEL_CHECK_INTERVAL = env.int('AI_MODEL_CHECK_INTERVAL', default=30)
+# Artefacts projetés en mémoire partagée entre workers
+AI_MODEL_MMAP = True
+# Chargement des modèles au démarrage du serveur (config/wsgi.py, config/asgi.py)
+AI_WARM_UP_ON_START = env.bool('AI_WARM_UP_ON_START', default=True)
+
+# Données de référence en mémoire de chaque processus (core/refcache.py) :
+# contrôle de la version partagée et rechargement forcé, en secondes
+REFERENCE_CACHE = {
+    'check_interval': env.float('REFERENCE_CACHE_CHECK_INTERVAL', default=2.0),
+    'max_age': 15 * 60,
+}
+
+# Synchronisation incrémentale (core/sync.py, /api/sync/<ressource>/)
+SYNC = {
+    # Délai avant qu'une modification soit servie (transactions longues)
+    'safety_seconds': env.int('SYNC_SAFETY_SECONDS', default=30),
+    'tombstone_days': env.int('SYNC_TOMBSTONE_DAYS', default=90),
+    'page_size': 500,
+    'max_page_size': 5000,
+}
+
+# Cache des itinéraires (transport/planner.py), une entrée par trajet et par heure
+ROUTE_CACHE_TTL = env.int('ROUTE_CACHE_TTL', default=2 * 60 * 60)
+# Recherche concurrente (api/search.py) : threads du pool et échéance de réponse
+ROUTE_SEARCH_WORKERS = env.int('ROUTE_SEARCH_WORKERS', default=8)
+ROUTE_SEARCH_DEADLINE_SECONDS = env.float('ROUTE_SEARCH_DEADLINE_SECONDS', default=3.0)
+
+# Tâches asynchrones (Celery, voir config/celery.py)
+# Tests : CELERY_TASK_ALWAYS_EAGER=True et CELERY_BROKER_URL=memory://
+CELERY_BROKER_URL = env('CELERY_BROKER_URL', default='redis://localhost:6379/0')
+CELERY_RESULT_BACKEND = 'django-db'
+CELERY_RESULT_EXTENDED = True
+CELERY_TASK_ALWAYS_EAGER = env.bool('CELERY_TASK_ALWAYS_EAGER', default=False)
+CELERY_TASK_EAGER_PROPAGATES = True
+CELERY_TASK_TRACK_STARTED = True
+# Une tâche n'est acquittée qu'une fois terminée : relancée si le worker tombe
+CELERY_TASK_ACKS_LATE = True
+CELERY_TASK_REJECT_ON_WORKER_LOST = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_TIMEZONE = TIME_ZONE
+CELERY_TASK_DEFAULT_QUEUE = 'default'
+CELERY_TASK_ROUTES = {
+    'ai.tasks.train_*': {'queue': 'graph'},
+    'ai.tasks.forecast_*': {'queue': 'precompute'},
+    'ai.tasks.prewarm_*': {'queue': 'precompute'},
+    'core.tasks.rollup_*': {'queue': 'rollups'},
+    'core.tasks.maintain_partitions': {'queue': 'rollups'},
+    'core.tasks.purge_tombstones': {'queue': 'rollups'},
+    'core.tasks.reconcile_*': {'queue': 'ratings'},
+    'core.tasks.merge_*': {'queue': 'ingest'},
+}
+# Concurrence par file : un worker par file (celery -A config worker -Q <file> -c <n>)
+CELERY_WORKER_QUEUES = {
+    'graph': env.int('CELERY_GRAPH_CONCURRENCY', default=1),
+    'precompute': env.int('CELERY_PRECOMPUTE_CONCURRENCY', default=4),
+    'rollups': 1,
+    'ratings': 2,
+    'ingest': env.int('CELERY_INGEST_CONCURRENCY', default=2),
+    'default': 2,
+}
+CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
+# Planning des tâches périodiques : config/celery.py (beat_schedule), pour que
+# le chargement des réglages n'importe pas Celery
+
+# Profilage SQL par requête (config/queries.py) : en-têtes X-DB-*, détection N+1
+QUERY_PROFILER = {
+    'enabled': env.bool('QUERY_PROFILER', default=DEBUG),
+    # Une même requête répétée autant de fois dans une requête HTTP : N+1 probable
+    'repeat_threshold': 5,
+    # Tests : dépasser un budget lève QueryBudgetExceeded au lieu de journaliser
+    'raise_on_budget': env.bool('QUERY_PROFILER_RAISE', default=False),
+}
+# Budget de requêtes SQL par nom d'URL
+QUERY_BUDGETS = {
+    'api:route-search': 40,
+    'api:route-search-stream': 40,
+    'api:ingest-traffic': 2,
+    'api:ingest-prices': 4,
+    'api:reference-bundle': 4,
+    'api:reference-bundle-version': 4,
+    'api:sync': 2,
+    'api:geojson-layer': 2,
+}
+
+# Métriques Prometheus (config/metrics.py) : adresses autorisées à lire /metrics
+METRICS_ALLOWED_IPS = env.list('METRICS_ALLOWED_IPS', default=['127.0.0.1', '::1'])
+
+# Profilage cProfile échantillonné (config/profiling.py)
+PROFILING = {
+    'enabled': env.bool('PROFILING', default=False),
+    'sample_rate': env.float('PROFILING_SAMPLE_RATE', default=0.01),
+    'dir': env('PROFILING_DIR', default=str(BASE_DIR / 'var' / 'profiles')),
+    # Durée de validité d'un jeton X-Profile (python manage.py profile_token)
+    'token_max_age': 15 * 60,
+}
+
+# Temps d'import au démarrage (python manage.py import_report) : budget en
+# millisecondes par cible et bibliothèques lourdes interdites au démarrage
+# (chargées à la demande, voir ai/registry.py)
+IMPORT_TIME_BUDGET = {
+    'budget_ms': {'manage': 1500, 'web': 2500, 'celery': 2500},
+    'forbidden': ['pandas', 'sklearn', 'scipy', 'joblib'],
+}
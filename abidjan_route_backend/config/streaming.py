@@ -0,0 +1,56 @@
+"""
+Contexte d'une requête pendant l'envoi d'une réponse en flux
+
+Le corps d'une StreamingHttpResponse (route_search_stream, geojson_layer)
+est produit après le retour des middlewares : un contextvar qu'ils ont posé
+autour de get_response() est déjà remis à zéro quand les vues lisent la
+base ou lancent les calculs. bind_streaming() enveloppe le corps pour que
+la variable reprenne sa valeur à chaque paquet produit, puis appelle
+`on_close` une fois le corps terminé (ou abandonné).
+
+    response = get_response(request)
+    if response.streaming:
+        bind_streaming(response, _state, state, on_close=...)
+"""
+
+
+def _bound(iterator, var, value, on_close):
+    try:
+        while True:
+            token = var.set(value)
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                var.reset(token)
+            yield chunk
+    finally:
+        if on_close is not None:
+            on_close()
+
+
+async def _abound(iterator, var, value, on_close):
+    try:
+        while True:
+            token = var.set(value)
+            try:
+                chunk = await anext(iterator)
+            except StopAsyncIteration:
+                return
+            finally:
+                var.reset(token)
+            yield chunk
+    finally:
+        if on_close is not None:
+            on_close()
+
+
+def bind_streaming(response, var, value, on_close=None):
+    """Fixe `var` à `value` pendant la production de chaque paquet du corps de `response`"""
+    content = response.streaming_content
+    if response.is_async:
+        response.streaming_content = _abound(aiter(content), var, value, on_close)
+    else:
+        response.streaming_content = _bound(iter(content), var, value, on_close)
+    return response
@@ -0,0 +1,250 @@
+import asyncio
+import contextvars
+from unittest import mock
+
+from django.db import DEFAULT_DB_ALIAS
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from core.models import Location, SearchHistory
+
+from . import db_routers, profiling
+from .queries import QueryBudgetExceeded, QueryProfilerMiddleware, fingerprint, query_budget
+
+
+# ============================================================================
+# RÉPLICAS
+# ============================================================================
+
+@override_settings(
+    DATABASE_REPLICA_ALIASES=['replica1', 'replica2'],
+    REPLICA_LAG_SECONDS=5,
+    REPLICA_LAG_CHECK_INTERVAL=60,
+)
+class ReplicaRouterTests(SimpleTestCase):
+
+    def setUp(self):
+        self.router = db_routers.ReplicaRouter()
+        self.lags = {'replica1': 0.2, 'replica2': 0.4}
+        patcher = mock.patch.object(db_routers, 'replica_lag', side_effect=lambda alias: self.lags[alias])
+        self.replica_lag = patcher.start()
+        self.addCleanup(patcher.stop)
+        # Pas de thread de fond : mesures faites par le test
+        patcher = mock.patch.object(db_routers.replica_health, 'start')
+        self.start = patcher.start()
+        self.addCleanup(patcher.stop)
+        db_routers.replica_health.measure()
+        self.addCleanup(db_routers.replica_health.clear)
+
+    def in_request(self, func, method='GET', cookies=None):
+        """Exécute func() dans une requête passée par ReplicaPinMiddleware"""
+        seen = {}
+
+        def view(request):
+            seen['result'] = func()
+            return HttpResponse()
+
+        request = getattr(RequestFactory(), method.lower())('/')
+        request.COOKIES.update(cookies or {})
+        response = db_routers.ReplicaPinMiddleware(view)(request)
+        return seen['result'], response
+
+    def read(self, model=Location):
+        return self.router.db_for_read(model)
+
+    def test_outside_request_reads_primary(self):
+        self.assertEqual(self.read(), DEFAULT_DB_ALIAS)
+
+    def test_reference_reads_go_to_replica(self):
+        alias, _ = self.in_request(self.read)
+        self.assertIn(alias, ('replica1', 'replica2'))
+
+    def test_other_models_read_primary(self):
+        alias, _ = self.in_request(lambda: self.read(SearchHistory))
+        self.assertEqual(alias, DEFAULT_DB_ALIAS)
+
+    def test_unsafe_method_and_cookie_read_primary(self):
+        alias, _ = self.in_request(self.read, method='POST')
+        self.assertEqual(alias, DEFAULT_DB_ALIAS)
+        alias, _ = self.in_request(self.read, cookies={db_routers.PIN_COOKIE: '1'})
+        self.assertEqual(alias, DEFAULT_DB_ALIAS)
+
+    def test_write_pins_request_and_sets_cookie(self):
+        def write_then_read():
+            self.router.db_for_write(Location)
+            return self.read()
+
+        alias, response = self.in_request(write_then_read)
+        self.assertEqual(alias, DEFAULT_DB_ALIAS)
+        cookie = response.cookies[db_routers.PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], 5)
+
+    def test_pin_to_primary_block(self):
+        def pinned_read():
+            with db_routers.pin_to_primary():
+                return self.read()
+
+        alias, response = self.in_request(pinned_read)
+        self.assertEqual(alias, DEFAULT_DB_ALIAS)
+        self.assertNotIn(db_routers.PIN_COOKIE, response.cookies)
+
+    def test_streamed_body_reads_replica(self):
+        def body():
+            yield self.read()
+
+        response = db_routers.ReplicaPinMiddleware(lambda request: StreamingHttpResponse(body()))(RequestFactory().get('/'))
+        # Le corps est produit après le retour du middleware
+        self.assertIn(b''.join(response).decode(), ('replica1', 'replica2'))
+        self.assertEqual(self.read(), DEFAULT_DB_ALIAS)
+
+    async def test_async_streamed_body_reads_replica(self):
+        async def body():
+            yield self.read()
+
+        async def view(request):
+            return StreamingHttpResponse(body())
+
+        response = await db_routers.ReplicaPinMiddleware(view)(RequestFactory().get('/'))
+        chunks = [chunk async for chunk in response]
+        self.assertIn(b''.join(chunks).decode(), ('replica1', 'replica2'))
+        self.assertEqual(self.read(), DEFAULT_DB_ALIAS)
+
+    def test_lagging_or_unreachable_replica_is_skipped(self):
+        self.lags = {'replica1': 30.0, 'replica2': None}
+        with self.assertLogs(db_routers.logger, 'WARNING'):
+            db_routers.replica_health.measure()
+        alias, _ = self.in_request(self.read)
+        self.assertEqual(alias, DEFAULT_DB_ALIAS)
+
+        self.lags = {'replica1': 30.0, 'replica2': 1.0}
+        with self.assertLogs(db_routers.logger, 'WARNING'):
+            db_routers.replica_health.measure()
+        alias, _ = self.in_request(self.read)
+        self.assertEqual(alias, 'replica2')
+
+    def test_requests_never_measure_lag(self):
+        db_routers.replica_health.clear()
+        self.replica_lag.reset_mock()
+        # Avant la première mesure : primaire, sans attendre le thread de fond
+        alias, _ = self.in_request(self.read)
+        self.assertEqual(alias, DEFAULT_DB_ALIAS)
+        self.start.assert_called()
+        self.replica_lag.assert_not_called()
+
+    def test_replicas_are_never_migrated(self):
+        self.assertTrue(self.router.allow_migrate(DEFAULT_DB_ALIAS, 'core'))
+        self.assertFalse(self.router.allow_migrate('replica1', 'core'))
+
+
+# ============================================================================
+# BUDGET DE REQUÊTES SQL
+# ============================================================================
+
+class FingerprintTests(SimpleTestCase):
+
+    def test_in_lists_and_spaces_are_normalized(self):
+        self.assertEqual(
+            fingerprint('SELECT *\n  FROM t WHERE id IN (%s, %s, %s)'),
+            fingerprint('SELECT * FROM t WHERE id IN (%s)'),
+        )
+
+
+class QueryBudgetTests(TestCase):
+
+    def test_within_budget(self):
+        with query_budget(2) as log:
+            Location.objects.count()
+            Location.objects.count()
+        self.assertEqual(log.count, 2)
+
+    def test_over_budget_reports_repeated_queries(self):
+        with self.assertRaises(QueryBudgetExceeded) as error:
+            with query_budget(1):
+                for _ in range(3):
+                    list(Location.objects.filter(slug='cocody'))
+        message = str(error.exception)
+        self.assertIn("3 requêtes SQL pour un budget de 1", message)
+        self.assertIn("3 x SELECT", message)
+
+
+@override_settings(
+    QUERY_PROFILER={'enabled': True, 'repeat_threshold': 5, 'raise_on_budget': True},
+    QUERY_BUDGETS={'/flux/': 2},
+)
+class QueryProfilerStreamingTests(TestCase):
+
+    def stream(self, queries):
+        def body():
+            for _ in range(queries):
+                yield str(Location.objects.count())
+
+        middleware = QueryProfilerMiddleware(lambda request: StreamingHttpResponse(body()))
+        return middleware(RequestFactory().get('/flux/'))
+
+    def test_body_queries_are_counted(self):
+        response = self.stream(2)
+        self.assertNotIn('X-DB-Queries', response)
+        self.assertEqual(b''.join(response), b'00')
+
+    def test_body_over_budget_raises_while_reading(self):
+        response = self.stream(3)
+        with self.assertRaises(QueryBudgetExceeded):
+            b''.join(response)
+
+
+# ============================================================================
+# PROFILAGE
+# ============================================================================
+
+def _work():
+    return sum(range(1000))
+
+
+async def _in_pool(func):
+    # Comme api/search.py:run_in_pool : contexte de l'appelant propagé au thread
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(None, context.run, profiling.run_profiled, func)
+
+
+@override_settings(PROFILING={'enabled': True, 'sample_rate': 1.0, 'dir': '/tmp', 'token_max_age': 60})
+class ProfilingMiddlewareTests(SimpleTestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(profiling, 'dump', return_value='profil-1')
+        self.dump = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_async_request_profiles_pool_work(self):
+        async def view(request):
+            await _in_pool(_work)
+            return HttpResponse()
+
+        response = await profiling.ProfilingMiddleware(view)(RequestFactory().get('/'))
+        self.assertEqual(response['X-Profile-Id'], 'profil-1')
+        profilers = self.dump.call_args.args[0]
+        self.assertEqual(len(profilers), 1)
+
+    async def test_streamed_body_is_profiled_until_the_end(self):
+        async def body():
+            yield str(await _in_pool(_work))
+            yield str(await _in_pool(_work))
+
+        async def view(request):
+            return StreamingHttpResponse(body())
+
+        response = await profiling.ProfilingMiddleware(view)(RequestFactory().get('/'))
+        self.assertIn('X-Profile-Id', response)
+        self.dump.assert_not_called()
+        self.assertEqual([chunk async for chunk in response], [b'499500', b'499500'])
+        self.assertEqual(len(self.dump.call_args.args[0]), 2)
+        self.assertEqual(self.dump.call_args.args[2], response['X-Profile-Id'])
+
+    async def test_unsampled_request_is_not_profiled(self):
+        async def view(request):
+            await _in_pool(_work)
+            return HttpResponse()
+
+        with override_settings(PROFILING={'enabled': False, 'sample_rate': 1.0, 'dir': '/tmp', 'token_max_age': 60}):
+            response = await profiling.ProfilingMiddleware(view)(RequestFactory().get('/'))
+        self.assertNotIn('X-Profile-Id', response)
+        self.dump.assert_not_called()
@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
 application = get_wsgi_application()
+
+# Chargement des modèles avant la première requête (voir ai/registry.py)
+from django.conf import settings  # noqa: E402
+
+if settings.AI_WARM_UP_ON_START:
+    from ai.registry import registry
+
+    registry.warm_up()
@@ -0,0 +1,69 @@
+"""
+Vérifications `manage.py check` propres au déploiement
+
+- core.W001 : nombre de connexions PostgreSQL ouvertes au pire par le web et
+  Celery avec les connexions persistantes (CONN_MAX_AGE), comparé à
+  DB_MAX_CONNECTIONS ;
+- core.W002 : aucun jeton d'ingestion configuré hors DEBUG, les endpoints
+  /api/ingest/ refusent alors toutes les requêtes.
+"""
+
+import os
+
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+# Tampons d'ingestion de api/ingest.py (trafic, prix), un thread chacun
+INGEST_THREADS = 2
+# Pool par défaut de la boucle asyncio, utilisé par sync_to_async(thread_sensitive=False)
+# (validation de l'ingestion, api/views.py) : taille par défaut de ThreadPoolExecutor
+ASYNC_EXECUTOR_THREADS = min(32, (os.cpu_count() or 1) + 4)
+# Thread d'écriture des profils (config/profiling.py)
+PROFILE_WRITER_THREADS = 1
+
+
+def web_connections(workers=None):
+    """Connexions au pire pour `workers` processus web (GUNICORN_WORKERS)"""
+    if workers is None:
+        workers = int(os.environ.get('GUNICORN_WORKERS', (os.cpu_count() or 1) * 2 + 1))
+    # 1 thread de requête + pool de recherche + un thread par tampon d'ingestion
+    # + pool par défaut de asyncio + écriture des profils. Le thread de mesure
+    # des réplicas (config/db_routers.py) ne se connecte qu'aux réplicas.
+    per_process = (
+        1 + settings.ROUTE_SEARCH_WORKERS + INGEST_THREADS
+        + ASYNC_EXECUTOR_THREADS + PROFILE_WRITER_THREADS
+    )
+    return workers * per_process
+
+
+def celery_connections():
+    return sum(settings.CELERY_WORKER_QUEUES.values())
+
+
+@register(Tags.database, deploy=True)
+def check_connection_budget(app_configs, **kwargs):
+    if settings.DB_PGBOUNCER:
+        # pgbouncer borne lui-même les connexions serveur (default_pool_size)
+        return []
+    budget = settings.DB_MAX_CONNECTIONS - settings.DB_RESERVED_CONNECTIONS
+    needed = web_connections() + celery_connections()
+    if needed <= budget:
+        return []
+    return [Warning(
+        f"Jusqu'à {needed} connexions PostgreSQL pour {budget} disponibles",
+        hint="Réduire GUNICORN_WORKERS, ROUTE_SEARCH_WORKERS ou la concurrence Celery, "
+             "augmenter DB_MAX_CONNECTIONS ou passer par pgbouncer (DB_PGBOUNCER=True).",
+        id='core.W001',
+    )]
+
+
+@register(Tags.security, deploy=True)
+def check_ingest_tokens(app_configs, **kwargs):
+    if settings.DEBUG or settings.INGEST_TOKENS:
+        return []
+    return [Warning(
+        "INGEST_TOKENS est vide : l'ingestion en direct refuse toutes les requêtes",
+        hint="Définir INGEST_TOKENS (jetons Bearer séparés par des virgules).",
+        id='core.W002',
+    )]
@@ -0,0 +1,404 @@
+"""
+Ingestion en masse des données de trafic (TrafficData)
+
+Les fichiers CSV ou NDJSON des capteurs et partenaires sont lus en flux,
+validés par paquets, puis chargés avec COPY dans une table temporaire avant
+d'être fusionnés dans traffic_data. Les doublons (location, recorded_at,
+source) sont ignorés grâce à la contrainte d'unicité de la table.
+
+Les observations de prix (PriceHistory) envoyées en direct par les
+applications passent par les mêmes validations et le même COPY
+(voir api/ingest.py).
+
+Colonnes acceptées par enregistrement :
+    location | location_id | location_slug   (obligatoire)
+    lat + lng | latitude + longitude        (par défaut : coordonnées du lieu)
+    traffic_level, average_speed_kmh, recorded_at (ISO 8601), source
+
+day_of_week et hour_of_day sont toujours dérivés de recorded_at.
+"""
+
+import csv
+import gzip
+import io
+import json
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import timezone as dt_timezone
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Location, TrafficData, TransportMode
+
+
+TRAFFIC_COLUMNS = [
+    'location_id',
+    'coordinates',
+    'traffic_level',
+    'average_speed_kmh',
+    'recorded_at',
+    'day_of_week',
+    'hour_of_day',
+    'source',
+]
+
+TRAFFIC_STAGING_DDL = """
+CREATE TEMP TABLE IF NOT EXISTS traffic_staging (
+    location_id uuid NOT NULL,
+    coordinates geometry(Point, 4326) NOT NULL,
+    traffic_level varchar(20) NOT NULL,
+    average_speed_kmh numeric(5, 2) NOT NULL,
+    recorded_at timestamptz NOT NULL,
+    day_of_week integer NOT NULL,
+    hour_of_day integer NOT NULL,
+    source varchar(50) NOT NULL
+) ON COMMIT DELETE ROWS
+"""
+
+TRAFFIC_MERGE_SQL = """
+INSERT INTO traffic_data (id, created_at, updated_at, {columns})
+SELECT DISTINCT ON (location_id, recorded_at, source)
+       gen_random_uuid(), now(), now(), {columns}
+FROM traffic_staging
+ORDER BY location_id, recorded_at, source
+ON CONFLICT (location_id, recorded_at, source) DO NOTHING
+""".format(columns=', '.join(TRAFFIC_COLUMNS))
+
+PRICE_COLUMNS = [
+    'transport_mode_id',
+    'origin_id',
+    'destination_id',
+    'price',
+    'distance_km',
+    'recorded_at',
+    'source',
+]
+
+TRAFFIC_LEVELS = {value for value, _ in TrafficData.TRAFFIC_LEVELS}
+MAX_SPEED_KMH = Decimal('999.99')
+MAX_PRICE = Decimal('99999999.99')
+MAX_DISTANCE_KM = Decimal('999999.99')
+
+
+class IngestError(ValueError):
+    """Enregistrement invalide"""
+
+
+@dataclass
+class IngestStats:
+    read: int = 0
+    rejected: int = 0
+    loaded: int = 0
+    inserted: int = 0
+    errors: list = field(default_factory=list)
+
+    @property
+    def duplicates(self):
+        return self.loaded - self.inserted
+
+
+# ============================================================================
+# LECTURE
+# ============================================================================
+
+def _open(path):
+    path = Path(path)
+    if path.suffix == '.gz':
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return open(path, 'r', encoding='utf-8', newline='')
+
+
+def detect_format(path):
+    suffixes = [s.lower() for s in Path(path).suffixes if s.lower() != '.gz']
+    if suffixes and suffixes[-1] == '.csv':
+        return 'csv'
+    if suffixes and suffixes[-1] in ('.ndjson', '.jsonl', '.json'):
+        return 'ndjson'
+    raise IngestError(f"Format de fichier non reconnu : {path}")
+
+
+def read_records(path, fmt=None):
+    """Génère (numéro de ligne, dict) sans charger le fichier en mémoire"""
+    fmt = fmt or detect_format(path)
+    with _open(path) as handle:
+        if fmt == 'csv':
+            for line_no, record in enumerate(csv.DictReader(handle), start=2):
+                yield line_no, record
+        elif fmt == 'ndjson':
+            for line_no, line in enumerate(handle, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as exc:
+                    yield line_no, IngestError(f"JSON invalide : {exc.msg}")
+                    continue
+                yield line_no, record
+        else:
+            raise IngestError(f"Format inconnu : {fmt}")
+
+
+# ============================================================================
+# VALIDATION
+# ============================================================================
+
+class LocationResolver:
+    """
+    Résout un lieu (UUID ou slug) en (id, point EWKT), avec cache mémoire.
+
+    Une clé inconnue recharge la table au plus une fois toutes les
+    `reload_after` secondes, pour voir les lieux créés depuis le démarrage.
+    """
+
+    label = "Lieu"
+
+    def __init__(self, reload_after=60):
+        self.reload_after = reload_after
+        self._by_key = None
+        self._loaded_at = 0
+
+    def _entries(self):
+        for pk, slug, point in Location.objects.values_list('id', 'slug', 'coordinates').iterator():
+            yield (pk, slug), (pk, point_ewkt(point.x, point.y))
+
+    def _load(self):
+        by_key = {}
+        for (pk, slug), entry in self._entries():
+            by_key[str(pk)] = entry
+            by_key[slug] = entry
+        self._by_key = by_key
+        self._loaded_at = time.monotonic()
+
+    def resolve(self, key):
+        key = str(key).strip()
+        if self._by_key is None:
+            self._load()
+        entry = self._by_key.get(key)
+        if entry is None and time.monotonic() - self._loaded_at > self.reload_after:
+            self._load()
+            entry = self._by_key.get(key)
+        if entry is None:
+            raise IngestError(f"{self.label} inconnu : {key}")
+        return entry
+
+
+class TransportModeResolver(LocationResolver):
+    """Résout un mode de transport (UUID ou slug) en son id"""
+
+    label = "Mode de transport"
+
+    def _entries(self):
+        for pk, slug in TransportMode.objects.values_list('id', 'slug').iterator():
+            yield (pk, slug), pk
+
+
+def point_ewkt(lng, lat):
+    return f"SRID=4326;POINT({lng} {lat})"
+
+
+def _first(record, *keys):
+    for key in keys:
+        value = record.get(key)
+        if value not in (None, ''):
+            return value
+    return None
+
+
+def parse_datetime_utc(value):
+    """Date ISO 8601 -> datetime aware (UTC si aucun fuseau n'est précisé)"""
+    try:
+        parsed = parse_datetime(str(value)) if value else None
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise IngestError(f"Date invalide : {value!r}")
+    if timezone.is_naive(parsed):
+        parsed = parsed.replace(tzinfo=dt_timezone.utc)
+    return parsed
+
+
+def parse_coordinates(record):
+    """(lng, lat) depuis lat/lng ou latitude/longitude, None si absentes"""
+    lat = _first(record, 'lat', 'latitude')
+    lng = _first(record, 'lng', 'lon', 'longitude')
+    if lat is None and lng is None:
+        return None
+    try:
+        lat, lng = float(lat), float(lng)
+    except (TypeError, ValueError):
+        raise IngestError(f"Coordonnées invalides : {lat!r}, {lng!r}")
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise IngestError(f"Coordonnées hors limites : {lat}, {lng}")
+    return lng, lat
+
+
+def _decimal(value, label, maximum):
+    try:
+        number = Decimal(str(value))
+    except (InvalidOperation, ValueError):
+        raise IngestError(f"{label} invalide : {value!r}")
+    # NaN et Infinity passent Decimal() mais pas la comparaison ni quantize()
+    if not number.is_finite():
+        raise IngestError(f"{label} invalide : {value!r}")
+    # Bornes avant quantize() : 1E+30 dépasserait la précision du contexte
+    if not (0 <= number <= maximum):
+        raise IngestError(f"{label} hors limites : {number}")
+    return number.quantize(Decimal('0.01'))
+
+
+def parse_traffic_record(record, resolver, default_source=None):
+    """Valide un enregistrement et renvoie un tuple dans l'ordre de TRAFFIC_COLUMNS"""
+    if isinstance(record, Exception):
+        raise record
+    if not isinstance(record, dict):
+        raise IngestError("Enregistrement attendu sous forme d'objet")
+
+    location_key = _first(record, 'location', 'location_id', 'location_slug')
+    if location_key is None:
+        raise IngestError("Lieu manquant")
+    location_id, location_point = resolver.resolve(location_key)
+
+    coordinates = parse_coordinates(record)
+    coordinates = point_ewkt(*coordinates) if coordinates else location_point
+
+    traffic_level = record.get('traffic_level')
+    # Une liste ou un objet JSON n'est pas hachable : test du type d'abord
+    if not isinstance(traffic_level, str) or traffic_level not in TRAFFIC_LEVELS:
+        raise IngestError(f"Niveau de trafic invalide : {traffic_level!r}")
+
+    speed = _decimal(record.get('average_speed_kmh'), "Vitesse", MAX_SPEED_KMH)
+
+    recorded_at = parse_datetime_utc(record.get('recorded_at'))
+    local = timezone.localtime(recorded_at)
+
+    source = str(_first(record, 'source') or default_source or '')
+    if not source:
+        raise IngestError("Source manquante")
+    if len(source) > 50:
+        raise IngestError("Source trop longue (50 caractères max)")
+
+    return (
+        location_id,
+        coordinates,
+        traffic_level,
+        speed,
+        recorded_at.isoformat(),
+        local.weekday(),
+        local.hour,
+        source,
+    )
+
+
+def parse_price_record(record, locations, modes, default_source='user_reported'):
+    """Valide une observation de prix et renvoie un tuple dans l'ordre de PRICE_COLUMNS"""
+    if isinstance(record, Exception):
+        raise record
+    if not isinstance(record, dict):
+        raise IngestError("Enregistrement attendu sous forme d'objet")
+
+    mode_key = _first(record, 'transport_mode', 'transport_mode_id', 'transport_mode_slug')
+    origin_key = _first(record, 'origin', 'origin_id', 'origin_slug')
+    destination_key = _first(record, 'destination', 'destination_id', 'destination_slug')
+    if mode_key is None or origin_key is None or destination_key is None:
+        raise IngestError("transport_mode, origin et destination sont obligatoires")
+
+    recorded_at = record.get('recorded_at')
+    recorded_at = parse_datetime_utc(recorded_at) if recorded_at else timezone.now()
+
+    source = str(_first(record, 'source') or default_source)
+    if len(source) > 50:
+        raise IngestError("Source trop longue (50 caractères max)")
+
+    return (
+        modes.resolve(mode_key),
+        locations.resolve(origin_key)[0],
+        locations.resolve(destination_key)[0],
+        _decimal(record.get('price'), "Prix", MAX_PRICE),
+        _decimal(record.get('distance_km'), "Distance", MAX_DISTANCE_KM),
+        recorded_at.isoformat(),
+        source,
+    )
+
+
+# ============================================================================
+# CHARGEMENT
+# ============================================================================
+
+def copy_rows(cursor, table, columns, rows):
+    """COPY d'une liste de tuples dans `table` (format CSV, None -> NULL)"""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    cursor.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+        buffer,
+    )
+
+
+def load_traffic_rows(rows):
+    """
+    Charge un paquet de tuples validés dans traffic_data (COPY + fusion).
+    Retourne le nombre de lignes réellement insérées.
+    """
+    if not rows:
+        return 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(TRAFFIC_STAGING_DDL)
+        copy_rows(cursor, 'traffic_staging', TRAFFIC_COLUMNS, rows)
+        cursor.execute(TRAFFIC_MERGE_SQL)
+        return cursor.rowcount
+
+
+def load_price_rows(rows):
+    """
+    COPY d'un paquet de tuples validés dans price_history.
+    created_at est fixé au chargement : c'est le repère des agrégats (core/rollups.py).
+    """
+    if not rows:
+        return 0
+    now = timezone.now().isoformat()
+    with transaction.atomic(), connection.cursor() as cursor:
+        copy_rows(
+            cursor,
+            'price_history',
+            ['id', 'created_at', 'updated_at'] + PRICE_COLUMNS,
+            ((uuid.uuid4(), now, now) + tuple(row) for row in rows),
+        )
+    return len(rows)
+
+
+def import_traffic_file(path, fmt=None, source=None, chunk_size=50000, max_errors=1000):
+    """
+    Importe un fichier CSV/NDJSON de données de trafic par paquets de
+    `chunk_size` lignes. Lève IngestError au-delà de `max_errors` rejets ;
+    les paquets déjà chargés restent en base (réimport idempotent).
+    """
+    stats = IngestStats()
+    resolver = LocationResolver()
+    chunk = []
+
+    for line_no, record in read_records(path, fmt):
+        stats.read += 1
+        try:
+            chunk.append(parse_traffic_record(record, resolver, default_source=source))
+        except IngestError as exc:
+            stats.rejected += 1
+            stats.errors.append((line_no, str(exc)))
+            if stats.rejected > max_errors:
+                raise IngestError(f"Plus de {max_errors} lignes rejetées, import interrompu")
+            continue
+
+        if len(chunk) >= chunk_size:
+            stats.inserted += load_traffic_rows(chunk)
+            stats.loaded += len(chunk)
+            chunk = []
+
+    stats.inserted += load_traffic_rows(chunk)
+    stats.loaded += len(chunk)
+    return stats
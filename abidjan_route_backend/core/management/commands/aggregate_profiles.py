@@ -0,0 +1,66 @@
+"""
+Fusionne les profils cProfile écrits par les workers (voir config/profiling.py).
+
+Usage:
+    python manage.py aggregate_profiles
+    python manage.py aggregate_profiles --url-name api.route-search --since 2026-03-01 --output var/search.prof
+    python manage.py aggregate_profiles --sort tottime --limit 50
+"""
+
+import pstats
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Agrège les profils pstats par nom d'URL et affiche les fonctions les plus coûteuses"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', default=None, help="Dossier des profils (défaut : PROFILING['dir'])")
+        parser.add_argument(
+            '--url-name',
+            action='append',
+            dest='url_names',
+            help="Nom d'URL à agréger, ':' remplacé par '.' (répétable). Par défaut : tous.",
+        )
+        parser.add_argument('--since', type=datetime.fromisoformat, help="Profils écrits depuis (ISO 8601)")
+        parser.add_argument(
+            '--sort',
+            default='cumulative',
+            choices=['cumulative', 'tottime', 'ncalls'],
+            help="Tri des fonctions",
+        )
+        parser.add_argument('--limit', type=int, default=30, help="Nombre de fonctions affichées")
+        parser.add_argument('--output', help="Écrit le profil fusionné (pstats) dans ce fichier")
+
+    def handle(self, *args, **options):
+        root = Path(options['dir'] or settings.PROFILING['dir'])
+        if not root.is_dir():
+            raise CommandError(f"Aucun profil dans {root}")
+
+        directories = [root / name for name in options['url_names']] if options['url_names'] \
+            else sorted(path for path in root.iterdir() if path.is_dir())
+        since = options['since'].strftime('%Y%m%dT%H%M%S') if options['since'] else ''
+
+        merged = None
+        for directory in directories:
+            files = sorted(path for path in directory.glob('*.prof') if path.name >= since)
+            if not files:
+                continue
+            self.stdout.write(f"{directory.name}: {len(files)} profils")
+            if merged is None:
+                merged = pstats.Stats(str(files[0]), stream=self.stdout)
+                files = files[1:]
+            for path in files:
+                merged.add(str(path))
+
+        if merged is None:
+            raise CommandError("Aucun profil ne correspond")
+
+        merged.strip_dirs().sort_stats(options['sort']).print_stats(options['limit'])
+        if options['output']:
+            merged.dump_stats(options['output'])
+            self.stdout.write(self.style.SUCCESS(f"Profil fusionné écrit dans {options['output']}"))
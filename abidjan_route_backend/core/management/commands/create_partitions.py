@@ -0,0 +1,49 @@
+"""
+Crée à l'avance les partitions mensuelles des tables partitionnées.
+
+Usage:
+    python manage.py create_partitions
+    python manage.py create_partitions --table search_history --months-ahead 6
+
+À planifier quotidiennement : une partition manquante fait tomber les
+nouvelles lignes dans la partition par défaut.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core import partitioning
+
+
+class Command(BaseCommand):
+    help = "Crée les partitions mensuelles à venir (settings.PARTITIONED_TABLES)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--table',
+            action='append',
+            dest='tables',
+            help="Table à traiter (répétable). Par défaut : toutes les tables déclarées.",
+        )
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=None,
+            help="Nombre de mois futurs à préparer (défaut : premake_months de la table)",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("Le partitionnement nécessite PostgreSQL")
+
+        tables = options['tables'] or list(settings.PARTITIONED_TABLES)
+        for table in tables:
+            try:
+                created = partitioning.ensure_partitions(table, months_ahead=options['months_ahead'])
+            except ValueError as exc:
+                raise CommandError(str(exc))
+            if created:
+                self.stdout.write(self.style.SUCCESS(f"{table}: {', '.join(created)}"))
+            else:
+                self.stdout.write(f"{table}: partitions déjà à jour")
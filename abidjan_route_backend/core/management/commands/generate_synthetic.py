@@ -0,0 +1,81 @@
+"""
+Génère un jeu de données synthétique déterministe (voir core/synthetic.py).
+
+Usage:
+    python manage.py generate_synthetic --scale 0.1 --output var/synthetic
+    python manage.py generate_synthetic --seed 42 --scale 1 --database
+    python manage.py generate_synthetic --database --table search_history --table traffic_data
+"""
+
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core.synthetic import TABLES, SyntheticCity, copy_to_database, write_csv
+
+
+class Command(BaseCommand):
+    help = "Génère un jeu de données synthétique (CSV pour COPY ou chargement direct en base)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0, help="Graine aléatoire")
+        parser.add_argument(
+            '--scale',
+            type=float,
+            default=1.0,
+            help="Facteur d'échelle (1 = 2 000 quartiers, 2 millions de recherches)",
+        )
+        parser.add_argument('--days', type=int, default=180, help="Profondeur d'historique en jours")
+        parser.add_argument(
+            '--end',
+            type=date.fromisoformat,
+            default=None,
+            help="Date de fin de l'historique (AAAA-MM-JJ, défaut : aujourd'hui)",
+        )
+        parser.add_argument('--prefix', default='syn', help="Préfixe des slugs générés")
+        parser.add_argument(
+            '--table',
+            action='append',
+            choices=TABLES,
+            dest='tables',
+            help="Table à générer (répétable). Par défaut : toutes.",
+        )
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument('--output', help="Dossier de sortie des fichiers CSV")
+        target.add_argument('--database', action='store_true', help="Chargement direct par COPY")
+        parser.add_argument('--no-compress', action='store_true', help="CSV non compressés")
+
+    def handle(self, *args, **options):
+        city = SyntheticCity(
+            seed=options['seed'],
+            scale=options['scale'],
+            days=options['days'],
+            end=options['end'],
+            prefix=options['prefix'],
+        )
+        started = time.monotonic()
+
+        if options['database']:
+            if connection.vendor != 'postgresql':
+                raise CommandError("Le chargement par COPY nécessite PostgreSQL")
+
+            def progress(table, rows):
+                self.stdout.write(f"\r  {table}: {rows} lignes", ending='')
+                self.stdout.flush()
+
+            counts = copy_to_database(city, tables=options['tables'], progress=progress)
+            self.stdout.write('')
+        else:
+            counts = write_csv(
+                city, options['output'], tables=options['tables'], compress=not options['no_compress'],
+            )
+
+        elapsed = time.monotonic() - started
+        total = sum(counts.values())
+        for table, rows in counts.items():
+            self.stdout.write(f"  {table}: {rows}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} lignes en {elapsed:.1f} s ({total / max(elapsed, 1e-9):.0f} lignes/s)"
+        ))
@@ -0,0 +1,112 @@
+"""
+Mesure le temps d'import au démarrage (python -X importtime) et le compare
+au budget settings.IMPORT_TIME_BUDGET.
+
+Cibles :
+    manage   django.setup() et chargement des commandes
+    web      config.wsgi et résolution des URL, comme à la première requête
+             (sans préchargement des modèles, sauf --warm-up)
+    celery   application Celery et modules de tâches
+
+Usage:
+    python manage.py import_report
+    python manage.py import_report --target celery --top 30
+    python manage.py import_report --check        # échoue si budget dépassé (CI)
+"""
+
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+TARGETS = {
+    'manage': (
+        "import django; django.setup(); "
+        "from django.core.management import get_commands; get_commands()"
+    ),
+    # Les vues (api.views...) ne sont importées qu'à la première résolution d'URL
+    'web': "import config.wsgi; from django.urls import get_resolver; get_resolver().url_patterns",
+    'celery': "from config.celery import app; app.loader.import_default_modules()",
+}
+
+LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def measure(code, env):
+    """Lignes (module, niveau, self µs, cumulé µs) de -X importtime, dans l'ordre d'affichage"""
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=settings.BASE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        raise CommandError(completed.stderr.strip().splitlines()[-1])
+    rows = []
+    for line in completed.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((module, len(indent) // 2, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def import_chain(rows, index):
+    """Modules importateurs de rows[index] (un module est affiché après ses dépendances)"""
+    chain, level = [], rows[index][1]
+    for module, row_level, *_ in rows[index + 1:]:
+        if row_level < level:
+            chain.append(module)
+            level = row_level
+    return chain
+
+
+class Command(BaseCommand):
+    help = "Rapport du temps d'import au démarrage et contrôle du budget"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', action='append', choices=list(TARGETS), dest='targets')
+        parser.add_argument('--top', type=int, default=15, help="Nombre de paquets/modules affichés")
+        parser.add_argument('--warm-up', action='store_true', help="web : inclut le préchargement des modèles")
+        parser.add_argument('--check', action='store_true', help="Erreur si budget dépassé ou import interdit")
+
+    def handle(self, *args, **options):
+        budget = settings.IMPORT_TIME_BUDGET
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings'))
+        env['AI_WARM_UP_ON_START'] = 'True' if options['warm_up'] else 'False'
+        failures = []
+
+        for target in options['targets'] or list(TARGETS):
+            rows = measure(TARGETS[target], env)
+            total_ms = sum(row[2] for row in rows) / 1000
+            limit = budget['budget_ms'].get(target)
+
+            by_package = defaultdict(int)
+            for module, _, self_us, _ in rows:
+                by_package[module.split('.')[0]] += self_us
+
+            status = f"budget {limit} ms" if limit else "sans budget"
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{target} : {total_ms:.0f} ms, {len(rows)} modules ({status})"
+            ))
+            for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:options['top']]:
+                self.stdout.write(f"  {self_us / 1000:>8.1f} ms  {package}")
+
+            if limit and total_ms > limit:
+                failures.append(f"{target} : {total_ms:.0f} ms > {limit} ms")
+            for index, (module, *_) in enumerate(rows):
+                if module in budget['forbidden']:
+                    chain = ' <- '.join(import_chain(rows, index)[:6])
+                    self.stdout.write(self.style.WARNING(f"  import interdit : {module} <- {chain}"))
+                    failures.append(f"{target} : {module} importé au démarrage")
+
+        if failures and options['check']:
+            raise CommandError('; '.join(failures))
+        if not failures:
+            self.stdout.write(self.style.SUCCESS("Budget d'import respecté"))
@@ -0,0 +1,66 @@
+"""
+Importe des données de trafic depuis des fichiers CSV ou NDJSON (COPY).
+
+Usage:
+    python manage.py import_traffic capteurs.csv --source sensors
+    python manage.py import_traffic flux.ndjson.gz --chunk-size 100000
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core.ingest import IngestError, import_traffic_file
+
+
+class Command(BaseCommand):
+    help = "Importe en masse des TrafficData (CSV/NDJSON, éventuellement .gz)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help="Fichiers à importer")
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'ndjson'],
+            default=None,
+            help="Format des fichiers (par défaut : d'après l'extension)",
+        )
+        parser.add_argument(
+            '--source',
+            default=None,
+            help="Source utilisée pour les lignes qui n'en précisent pas",
+        )
+        parser.add_argument('--chunk-size', type=int, default=50000)
+        parser.add_argument(
+            '--max-errors',
+            type=int,
+            default=1000,
+            help="Nombre de lignes rejetées au-delà duquel l'import s'arrête",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("L'import par COPY nécessite PostgreSQL")
+
+        for path in options['paths']:
+            started = time.monotonic()
+            try:
+                stats = import_traffic_file(
+                    path,
+                    fmt=options['format'],
+                    source=options['source'],
+                    chunk_size=options['chunk_size'],
+                    max_errors=options['max_errors'],
+                )
+            except (IngestError, OSError) as exc:
+                raise CommandError(f"{path}: {exc}")
+            elapsed = time.monotonic() - started
+
+            for line_no, message in stats.errors[:20]:
+                self.stderr.write(f"{path}:{line_no}: {message}")
+            rate = stats.read / elapsed * 60 if elapsed else stats.read
+            self.stdout.write(self.style.SUCCESS(
+                f"{path}: {stats.read} lues, {stats.inserted} insérées, "
+                f"{stats.duplicates} doublons, {stats.rejected} rejetées "
+                f"({elapsed:.1f}s, {rate:,.0f} lignes/min)"
+            ))
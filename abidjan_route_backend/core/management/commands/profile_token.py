@@ -0,0 +1,19 @@
+"""
+Affiche un jeton X-Profile signé (voir config/profiling.py).
+
+Usage:
+    curl -H "X-Profile: $(python manage.py profile_token)" http://localhost:8000/api/routes/search/?from=...
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from config.profiling import make_token
+
+
+class Command(BaseCommand):
+    help = "Génère un jeton pour profiler une requête (en-tête X-Profile)"
+
+    def handle(self, *args, **options):
+        self.stderr.write(f"Valable {settings.PROFILING['token_max_age']} s")
+        self.stdout.write(make_token())
@@ -0,0 +1,71 @@
+"""
+Applique la politique de rétention des tables partitionnées.
+
+Les partitions plus anciennes que `retention_months` sont détachées puis
+archivées (schéma settings.PARTITION_ARCHIVE_SCHEMA) ou supprimées, sans
+aucun DELETE sur la table active. Les lignes expirées de la partition par
+défaut sont déplacées dans l'archive ou supprimées.
+
+Usage:
+    python manage.py prune_partitions --dry-run
+    python manage.py prune_partitions --table search_history --action drop
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core import partitioning
+
+
+class Command(BaseCommand):
+    help = "Archive ou supprime les partitions expirées (settings.PARTITIONED_TABLES)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--table',
+            action='append',
+            dest='tables',
+            help="Table à traiter (répétable). Par défaut : toutes les tables déclarées.",
+        )
+        parser.add_argument(
+            '--retention-months',
+            type=int,
+            default=None,
+            help="Surcharge la rétention configurée (en mois)",
+        )
+        parser.add_argument(
+            '--action',
+            choices=['archive', 'drop'],
+            default=None,
+            help="Surcharge l'action configurée",
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Affiche les partitions concernées sans les modifier",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("Le partitionnement nécessite PostgreSQL")
+
+        tables = options['tables'] or list(settings.PARTITIONED_TABLES)
+        for table in tables:
+            try:
+                with transaction.atomic():
+                    pruned = partitioning.apply_retention(
+                        table,
+                        retention_months=options['retention_months'],
+                        action=options['action'],
+                        dry_run=options['dry_run'],
+                    )
+            except ValueError as exc:
+                raise CommandError(str(exc))
+
+            if not pruned:
+                self.stdout.write(f"{table}: aucune partition expirée")
+            elif options['dry_run']:
+                self.stdout.write(f"{table}: à traiter -> {', '.join(pruned)}")
+            else:
+                self.stdout.write(self.style.SUCCESS(f"{table}: {', '.join(pruned)}"))
@@ -0,0 +1,33 @@
+"""
+Met à jour les agrégats de prix (FareAggregate) à partir de PriceHistory.
+
+Usage:
+    python manage.py rollup_prices
+    python manage.py rollup_prices --granularity day
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core.rollups import GRANULARITIES, rollup_price_history
+
+
+class Command(BaseCommand):
+    help = "Agrège incrémentalement PriceHistory en agrégats horaires et journaliers"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--granularity',
+            action='append',
+            choices=list(GRANULARITIES),
+            dest='granularities',
+            help="Granularité à traiter (répétable). Par défaut : toutes.",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("Les agrégats de prix nécessitent PostgreSQL")
+
+        results = rollup_price_history(options['granularities'])
+        for granularity, buckets in results.items():
+            self.stdout.write(self.style.SUCCESS(f"{granularity}: {buckets} seau(x) recalculé(s)"))
@@ -0,0 +1,34 @@
+"""
+Partitionnement mensuel de search_history sur search_date.
+
+La clé primaire en base devient (id, search_date) ; côté Django, `id` reste
+la clé primaire du modèle. Sans effet hors PostgreSQL.
+"""
+
+from django.db import migrations
+
+from core import partitioning
+
+
+def partition_search_history(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    partitioning.convert_to_partitioned(
+        'search_history', 'search_date', connection=schema_editor.connection
+    )
+
+
+def unpartition_search_history(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    partitioning.revert_to_plain('search_history', connection=schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0006_alter_hotel_location"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_search_history, unpartition_search_history),
+    ]
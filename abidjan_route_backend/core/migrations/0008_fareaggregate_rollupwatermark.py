@@ -0,0 +1,137 @@
+# Generated by Django 4.2.9 on 2026-10-19 09:12
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0007_partition_search_history"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RollupWatermark",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True, null=True)),
+                ("name", models.CharField(max_length=50, unique=True)),
+                (
+                    "processed_until",
+                    models.DateTimeField(
+                        help_text="created_at des dernières lignes agrégées"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Repère d'agrégation",
+                "verbose_name_plural": "Repères d'agrégation",
+                "db_table": "rollup_watermarks",
+            },
+        ),
+        migrations.CreateModel(
+            name="FareAggregate",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True, null=True)),
+                (
+                    "granularity",
+                    models.CharField(
+                        choices=[("hour", "Heure"), ("day", "Jour")], max_length=10
+                    ),
+                ),
+                (
+                    "bucket_start",
+                    models.DateTimeField(
+                        help_text="Début de l'heure ou du jour agrégé (UTC)"
+                    ),
+                ),
+                (
+                    "observation_count",
+                    models.IntegerField(
+                        validators=[django.core.validators.MinValueValidator(0)]
+                    ),
+                ),
+                ("mean_price", models.DecimalField(decimal_places=2, max_digits=10)),
+                ("median_price", models.DecimalField(decimal_places=2, max_digits=10)),
+                ("p90_price", models.DecimalField(decimal_places=2, max_digits=10)),
+                ("min_price", models.DecimalField(decimal_places=2, max_digits=10)),
+                ("max_price", models.DecimalField(decimal_places=2, max_digits=10)),
+                (
+                    "destination",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="fare_aggregates_to",
+                        to="core.location",
+                    ),
+                ),
+                (
+                    "origin",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="fare_aggregates_from",
+                        to="core.location",
+                    ),
+                ),
+                (
+                    "transport_mode",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="fare_aggregates",
+                        to="core.transportmode",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Agrégat de prix",
+                "verbose_name_plural": "Agrégats de prix",
+                "db_table": "fare_aggregates",
+                "ordering": ["-bucket_start"],
+                "indexes": [
+                    models.Index(
+                        fields=["granularity", "bucket_start"],
+                        name="fare_aggreg_granula_0df597_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="fareaggregate",
+            constraint=models.UniqueConstraint(
+                fields=(
+                    "granularity",
+                    "transport_mode",
+                    "origin",
+                    "destination",
+                    "bucket_start",
+                ),
+                name="fare_aggregates_bucket_unique",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="pricehistory",
+            index=models.Index(
+                fields=["created_at"], name="price_histo_created_be9adc_idx"
+            ),
+        ),
+    ]
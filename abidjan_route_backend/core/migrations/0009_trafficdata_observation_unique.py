@@ -0,0 +1,31 @@
+# Generated by Django 4.2.9 on 2026-10-19 10:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0008_fareaggregate_rollupwatermark"),
+    ]
+
+    operations = [
+        # Supprime les doublons existants avant de poser la contrainte
+        migrations.RunSQL(
+            sql="""
+                DELETE FROM traffic_data a
+                USING traffic_data b
+                WHERE a.location_id = b.location_id
+                  AND a.recorded_at = b.recorded_at
+                  AND a.source = b.source
+                  AND a.ctid > b.ctid
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddConstraint(
+            model_name="trafficdata",
+            constraint=models.UniqueConstraint(
+                fields=("location", "recorded_at", "source"),
+                name="traffic_data_observation_unique",
+            ),
+        ),
+    ]
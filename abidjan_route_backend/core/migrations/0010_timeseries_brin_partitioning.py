@@ -0,0 +1,78 @@
+"""
+traffic_data et price_history : index BRIN sur les dates et partitionnement
+mensuel sur recorded_at (clé primaire en base : (id, recorded_at)).
+
+Les index B-tree sur recorded_at sont remplacés par des index BRIN, bien plus
+petits pour des tables en ajout seul. Le partitionnement est sans effet hors
+PostgreSQL.
+"""
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+from core import partitioning
+
+
+TABLES = ['traffic_data', 'price_history']
+
+
+def partition_timeseries(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table in TABLES:
+        partitioning.convert_to_partitioned(
+            table, 'recorded_at', connection=schema_editor.connection
+        )
+
+
+def unpartition_timeseries(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table in TABLES:
+        partitioning.revert_to_plain(table, connection=schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0009_trafficdata_observation_unique"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="pricehistory",
+            name="price_histo_recorde_9f304b_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="pricehistory",
+            name="price_histo_created_be9adc_idx",
+        ),
+        migrations.AlterField(
+            model_name="pricehistory",
+            name="recorded_at",
+            field=models.DateTimeField(auto_now_add=True),
+        ),
+        migrations.AlterField(
+            model_name="trafficdata",
+            name="recorded_at",
+            field=models.DateTimeField(auto_now_add=True),
+        ),
+        migrations.AddIndex(
+            model_name="pricehistory",
+            index=django.contrib.postgres.indexes.BrinIndex(
+                fields=["recorded_at"], name="price_histo_recorde_f68148_brin"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="pricehistory",
+            index=django.contrib.postgres.indexes.BrinIndex(
+                fields=["created_at"], name="price_histo_created_a46b19_brin"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="trafficdata",
+            index=django.contrib.postgres.indexes.BrinIndex(
+                fields=["recorded_at"], name="traffic_dat_recorde_28127c_brin"
+            ),
+        ),
+        migrations.RunPython(partition_timeseries, unpartition_timeseries),
+    ]
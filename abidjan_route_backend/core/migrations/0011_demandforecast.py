@@ -0,0 +1,94 @@
+# Generated by Django 4.2.9 on 2026-10-19 11:20
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0010_timeseries_brin_partitioning"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DemandForecast",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True, null=True)),
+                (
+                    "bucket_start",
+                    models.DateTimeField(help_text="Début de l'heure prévue"),
+                ),
+                (
+                    "search_criteria",
+                    models.CharField(
+                        choices=[
+                            ("fastest", "Plus rapide"),
+                            ("cheapest", "Moins cher"),
+                            ("balanced", "Équilibré"),
+                            ("safest", "Plus sécurisé"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "expected_searches",
+                    models.FloatField(
+                        validators=[django.core.validators.MinValueValidator(0)]
+                    ),
+                ),
+                (
+                    "rank",
+                    models.IntegerField(
+                        validators=[django.core.validators.MinValueValidator(1)]
+                    ),
+                ),
+                (
+                    "destination",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="demand_forecasts_to",
+                        to="core.location",
+                    ),
+                ),
+                (
+                    "origin",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="demand_forecasts_from",
+                        to="core.location",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Prévision de demande",
+                "verbose_name_plural": "Prévisions de demande",
+                "db_table": "demand_forecasts",
+                "ordering": ["bucket_start", "rank"],
+                "indexes": [
+                    models.Index(
+                        fields=["bucket_start", "rank"],
+                        name="demand_fore_bucket__daf056_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="demandforecast",
+            constraint=models.UniqueConstraint(
+                fields=("bucket_start", "origin", "destination", "search_criteria"),
+                name="demand_forecasts_bucket_unique",
+            ),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 4.2.9 on 2026-10-19 14:05
+
+from django.db import migrations, models
+import uuid
+
+
+SYNCED_TABLES = ['locations', 'transport_stops', 'transport_routes', 'hotels', 'restaurants', 'car_rentals']
+
+# Les lignes sans updated_at seraient invisibles pour la synchronisation
+BACKFILL_SQL = "\n".join(
+    f"UPDATE {table} SET updated_at = COALESCE(created_at, now()) WHERE updated_at IS NULL;"
+    for table in SYNCED_TABLES
+)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0011_demandforecast"),
+    ]
+
+    operations = [
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+        migrations.CreateModel(
+            name="DeletedRecord",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True, null=True)),
+                (
+                    "resource",
+                    models.CharField(
+                        help_text="Ressource de core/sync.py (locations, stops...)",
+                        max_length=30,
+                    ),
+                ),
+                ("object_id", models.UUIDField()),
+            ],
+            options={
+                "verbose_name": "Suppression",
+                "verbose_name_plural": "Suppressions",
+                "db_table": "deleted_records",
+                "ordering": ["updated_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["resource", "updated_at", "id"],
+                        name="deleted_rec_resourc_bd2711_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="location",
+            index=models.Index(fields=["updated_at", "id"], name="locations_updated_b92107_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="transportstop",
+            index=models.Index(fields=["updated_at", "id"], name="transport_s_updated_9b7708_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="transportroute",
+            index=models.Index(fields=["updated_at", "id"], name="transport_r_updated_2e4271_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="hotel",
+            index=models.Index(fields=["updated_at", "id"], name="hotels_updated_169e45_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="restaurant",
+            index=models.Index(fields=["updated_at", "id"], name="restaurants_updated_de9198_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="carrental",
+            index=models.Index(fields=["updated_at", "id"], name="car_rentals_updated_1fa31d_idx"),
+        ),
+    ]
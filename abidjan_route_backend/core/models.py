@@ -11,6 +11,7 @@ pip install pillow
 import uuid
 from django.contrib.auth.models import AbstractUser
 from django.contrib.gis.db import models as gis_models
+from django.contrib.postgres.indexes import BrinIndex
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.core.validators import MinValueValidator, MaxValueValidator
@@ -120,6 +121,7 @@ class Location(TimeStampedModel):
         ordering = ['type', 'name']
         indexes = [
             models.Index(fields=['name', 'type']),
+            models.Index(fields=['updated_at', 'id']),  # synchronisation (core/sync.py)
         ]
 
     def __str__(self):
@@ -239,6 +241,7 @@ class TransportStop(TimeStampedModel):
         ordering = ['name']
         indexes = [
             models.Index(fields=['transport_mode', 'location']),
+            models.Index(fields=['updated_at', 'id']),
         ]
 
     def __str__(self):
@@ -292,6 +295,7 @@ class TransportRoute(TimeStampedModel):
         ordering = ['transport_mode', 'code']
         indexes = [
             models.Index(fields=['transport_mode', 'is_active']),
+            models.Index(fields=['updated_at', 'id']),
         ]
 
     def __str__(self):
@@ -343,7 +347,12 @@ class RouteSegment(TimeStampedModel):
 # ============================================================================
 
 class SearchHistory(TimeStampedModel):
-    """Historique des recherches d'itinéraires"""
+    """
+    Historique des recherches d'itinéraires
+
+    Table partitionnée par mois sur search_date (voir core/partitioning.py) :
+    filtrer sur search_date pour ne lire que les partitions utiles.
+    """
     
     CRITERIA_CHOICES = [
         ('fastest', 'Plus rapide'),
@@ -608,6 +617,7 @@ class Hotel(TimeStampedModel):
         indexes = [
             models.Index(fields=['location', 'is_active']),
             models.Index(fields=['price_range']),
+            models.Index(fields=['updated_at', 'id']),
         ]
 
     def __str__(self):
@@ -666,6 +676,7 @@ class Restaurant(TimeStampedModel):
         ordering = ['name']
         indexes = [
             models.Index(fields=['location', 'is_active']),
+            models.Index(fields=['updated_at', 'id']),
         ]
 
     def __str__(self):
@@ -722,18 +733,53 @@ class CarRental(TimeStampedModel):
         ordering = ['name']
         indexes = [
             models.Index(fields=['location', 'is_active']),
+            models.Index(fields=['updated_at', 'id']),
         ]
 
     def __str__(self):
         return self.name
 
 
+# ============================================================================
+# SYNCHRONISATION
+# ============================================================================
+
+class DeletedRecord(TimeStampedModel):
+    """
+    Trace de suppression d'une ligne de référence
+
+    Posée par post_delete (core/sync.py) pour que les clients synchronisés
+    par updated_at apprennent la suppression ; purgée après
+    SYNC['tombstone_days'] jours.
+    """
+
+    resource = models.CharField(max_length=30, help_text="Ressource de core/sync.py (locations, stops...)")
+    object_id = models.UUIDField()
+
+    class Meta:
+        db_table = 'deleted_records'
+        verbose_name = 'Suppression'
+        verbose_name_plural = 'Suppressions'
+        ordering = ['updated_at']
+        indexes = [
+            models.Index(fields=['resource', 'updated_at', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.resource} {self.object_id}"
+
+
 # ============================================================================
 # DONNÉES POUR IA
 # ============================================================================
 
 class PriceHistory(TimeStampedModel):
-    """Historique des prix pour analyse IA"""
+    """
+    Historique des prix pour analyse IA
+
+    Série temporelle en ajout seul, partitionnée par mois sur recorded_at
+    (voir core/partitioning.py) et indexée en BRIN sur les dates.
+    """
     
     transport_mode = models.ForeignKey(
         TransportMode,
@@ -760,7 +806,7 @@ class PriceHistory(TimeStampedModel):
         decimal_places=2,
         validators=[MinValueValidator(0)]
     )
-    recorded_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    recorded_at = models.DateTimeField(auto_now_add=True)
     source = models.CharField(
         max_length=50,
         help_text="Source de l'information (API, user_reported, etc.)"
@@ -773,15 +819,134 @@ class PriceHistory(TimeStampedModel):
         ordering = ['-recorded_at']
         indexes = [
             models.Index(fields=['transport_mode', 'origin', 'destination']),
-            models.Index(fields=['recorded_at']),
+            BrinIndex(fields=['recorded_at']),
+            BrinIndex(fields=['created_at']),
         ]
 
     def __str__(self):
         return f"{self.transport_mode.name}: {self.origin} → {self.destination} - {self.price} FCFA"
 
 
+class FareAggregate(TimeStampedModel):
+    """
+    Agrégats horaires et journaliers de PriceHistory
+
+    Maintenus incrémentalement par core/rollups.py : les estimations de prix
+    et l'entraînement des modèles lisent cette table au lieu de la table brute.
+    """
+
+    GRANULARITIES = [
+        ('hour', 'Heure'),
+        ('day', 'Jour'),
+    ]
+
+    granularity = models.CharField(max_length=10, choices=GRANULARITIES)
+    transport_mode = models.ForeignKey(
+        TransportMode,
+        on_delete=models.CASCADE,
+        related_name='fare_aggregates'
+    )
+    origin = models.ForeignKey(
+        Location,
+        on_delete=models.CASCADE,
+        related_name='fare_aggregates_from'
+    )
+    destination = models.ForeignKey(
+        Location,
+        on_delete=models.CASCADE,
+        related_name='fare_aggregates_to'
+    )
+    bucket_start = models.DateTimeField(help_text="Début de l'heure ou du jour agrégé (UTC)")
+    observation_count = models.IntegerField(validators=[MinValueValidator(0)])
+    mean_price = models.DecimalField(max_digits=10, decimal_places=2)
+    median_price = models.DecimalField(max_digits=10, decimal_places=2)
+    p90_price = models.DecimalField(max_digits=10, decimal_places=2)
+    min_price = models.DecimalField(max_digits=10, decimal_places=2)
+    max_price = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        db_table = 'fare_aggregates'
+        verbose_name = 'Agrégat de prix'
+        verbose_name_plural = 'Agrégats de prix'
+        ordering = ['-bucket_start']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['granularity', 'transport_mode', 'origin', 'destination', 'bucket_start'],
+                name='fare_aggregates_bucket_unique',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['granularity', 'bucket_start']),
+        ]
+
+    def __str__(self):
+        return f"{self.granularity} {self.bucket_start:%Y-%m-%d %H:%M} - {self.median_price} FCFA"
+
+
+class RollupWatermark(TimeStampedModel):
+    """Position de la dernière agrégation incrémentale (une ligne par agrégat)"""
+
+    name = models.CharField(max_length=50, unique=True)
+    processed_until = models.DateTimeField(help_text="created_at des dernières lignes agrégées")
+
+    class Meta:
+        db_table = 'rollup_watermarks'
+        verbose_name = "Repère d'agrégation"
+        verbose_name_plural = "Repères d'agrégation"
+
+    def __str__(self):
+        return f"{self.name}: {self.processed_until}"
+
+
+class DemandForecast(TimeStampedModel):
+    """
+    Recherches attendues par (origine, destination, critère) pour une heure
+
+    Produit par ai/demand.py ; sert à précalculer les itinéraires des trajets
+    les plus demandés avant les heures de pointe.
+    """
+
+    bucket_start = models.DateTimeField(help_text="Début de l'heure prévue")
+    origin = models.ForeignKey(
+        Location,
+        on_delete=models.CASCADE,
+        related_name='demand_forecasts_from'
+    )
+    destination = models.ForeignKey(
+        Location,
+        on_delete=models.CASCADE,
+        related_name='demand_forecasts_to'
+    )
+    search_criteria = models.CharField(max_length=20, choices=SearchHistory.CRITERIA_CHOICES)
+    expected_searches = models.FloatField(validators=[MinValueValidator(0)])
+    rank = models.IntegerField(validators=[MinValueValidator(1)])
+
+    class Meta:
+        db_table = 'demand_forecasts'
+        verbose_name = 'Prévision de demande'
+        verbose_name_plural = 'Prévisions de demande'
+        ordering = ['bucket_start', 'rank']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['bucket_start', 'origin', 'destination', 'search_criteria'],
+                name='demand_forecasts_bucket_unique',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['bucket_start', 'rank']),
+        ]
+
+    def __str__(self):
+        return f"{self.bucket_start:%Y-%m-%d %H}h #{self.rank} ({self.expected_searches:.1f})"
+
+
 class TrafficData(TimeStampedModel):
-    """Données de trafic pour améliorer les estimations"""
+    """
+    Données de trafic pour améliorer les estimations
+
+    Série temporelle en ajout seul, partitionnée par mois sur recorded_at
+    (voir core/partitioning.py) et indexée en BRIN sur les dates.
+    """
     
     TRAFFIC_LEVELS = [
         ('low', 'Fluide'),
@@ -802,7 +967,7 @@ class TrafficData(TimeStampedModel):
         decimal_places=2,
         validators=[MinValueValidator(0)]
     )
-    recorded_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    recorded_at = models.DateTimeField(auto_now_add=True)
     day_of_week = models.IntegerField(
         validators=[MinValueValidator(0), MaxValueValidator(6)],
         help_text="0=Lundi, 6=Dimanche"
@@ -820,6 +985,14 @@ class TrafficData(TimeStampedModel):
         indexes = [
             models.Index(fields=['day_of_week', 'hour_of_day']),
             models.Index(fields=['location', 'recorded_at']),
+            BrinIndex(fields=['recorded_at']),
+        ]
+        constraints = [
+            # Déduplication des imports (core/ingest.py)
+            models.UniqueConstraint(
+                fields=['location', 'recorded_at', 'source'],
+                name='traffic_data_observation_unique',
+            ),
         ]
 
     def __str__(self):
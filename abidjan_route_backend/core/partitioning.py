@@ -0,0 +1,402 @@
+"""
+Partitionnement mensuel des grosses tables (PostgreSQL)
+
+Les tables listées dans settings.PARTITIONED_TABLES sont partitionnées par
+plage (PARTITION BY RANGE) sur une colonne de date, une partition par mois :
+
+    search_history
+    ├── search_history_p202601   [2026-01-01, 2026-02-01)
+    ├── search_history_p202602   [2026-02-01, 2026-03-01)
+    └── search_history_default   (lignes hors plage)
+
+Une requête filtrée sur la colonne de partition ne lit que les partitions
+concernées (partition pruning). Les vieilles partitions sont détachées puis
+archivées ou supprimées en bloc, sans DELETE ni VACUUM sur la table active.
+Seules les lignes expirées de la partition par défaut (normalement vide)
+sont retirées par DELETE.
+"""
+
+import re
+from datetime import date, datetime, timezone
+
+from django.conf import settings
+from django.db import connection as default_connection
+
+
+DEFAULT_SUFFIX = 'default'
+
+
+# ============================================================================
+# DATES
+# ============================================================================
+
+def month_start(value):
+    """Premier jour du mois de `value` (date ou datetime)"""
+    return date(value.year, value.month, 1)
+
+
+def add_months(value, months):
+    """Ajoute `months` mois à un premier jour de mois"""
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table, month):
+    return f"{table}_p{month:%Y%m}"
+
+
+def _bound(month):
+    return f"{month:%Y-%m-%d} 00:00:00+00"
+
+
+def get_table_config(table):
+    """Configuration d'une table partitionnée (settings.PARTITIONED_TABLES)"""
+    try:
+        return settings.PARTITIONED_TABLES[table]
+    except KeyError:
+        raise ValueError(f"La table '{table}' n'est pas déclarée dans PARTITIONED_TABLES")
+
+
+# ============================================================================
+# INTROSPECTION
+# ============================================================================
+
+def is_partitioned(cursor, table):
+    cursor.execute(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table pt "
+        "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = %s)",
+        [table],
+    )
+    return cursor.fetchone()[0]
+
+
+def list_partitions(cursor, table):
+    """Partitions mensuelles attachées, triées par mois : [(mois, nom), ...]"""
+    cursor.execute(
+        "SELECT child.relname FROM pg_inherits i "
+        "JOIN pg_class parent ON parent.oid = i.inhparent "
+        "JOIN pg_class child ON child.oid = i.inhrelid "
+        "WHERE parent.relname = %s",
+        [table],
+    )
+    pattern = re.compile(rf"^{re.escape(table)}_p(\d{{4}})(\d{{2}})$")
+    partitions = []
+    for (name,) in cursor.fetchall():
+        match = pattern.match(name)
+        if match:
+            partitions.append((date(int(match[1]), int(match[2]), 1), name))
+    return sorted(partitions)
+
+
+def _copyable_constraints(cursor, table):
+    """Clés étrangères et contraintes d'unicité à recréer sur la nouvelle table"""
+    cursor.execute(
+        "SELECT con.conname, pg_get_constraintdef(con.oid) FROM pg_constraint con "
+        "JOIN pg_class c ON c.oid = con.conrelid "
+        "WHERE c.relname = %s AND con.contype IN ('f', 'u') ORDER BY con.conname",
+        [table],
+    )
+    return cursor.fetchall()
+
+
+def _copyable_indexes(cursor, table):
+    """Index hors contraintes (les index des contraintes sont recréés avec elles)"""
+    cursor.execute(
+        "SELECT ic.relname, pg_get_indexdef(ix.indexrelid) FROM pg_index ix "
+        "JOIN pg_class ic ON ic.oid = ix.indexrelid "
+        "JOIN pg_class tc ON tc.oid = ix.indrelid "
+        "WHERE tc.relname = %s "
+        "AND NOT EXISTS (SELECT 1 FROM pg_constraint con WHERE con.conindid = ix.indexrelid) "
+        "ORDER BY ic.relname",
+        [table],
+    )
+    return cursor.fetchall()
+
+
+def _pk_constraint(cursor, table):
+    cursor.execute(
+        "SELECT con.conname FROM pg_constraint con JOIN pg_class c ON c.oid = con.conrelid "
+        "WHERE c.relname = %s AND con.contype = 'p'",
+        [table],
+    )
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+# ============================================================================
+# CRÉATION DES PARTITIONS
+# ============================================================================
+
+def create_partition(table, column, month, connection=None):
+    """
+    Crée la partition du mois `month` si elle n'existe pas.
+
+    Les lignes de ce mois déjà tombées dans la partition par défaut y sont
+    déplacées avant l'attachement (sinon ATTACH PARTITION échoue).
+    Retourne True si la partition a été créée.
+    """
+    connection = connection or default_connection
+    qn = connection.ops.quote_name
+    month = month_start(month)
+    name = partition_name(table, month)
+    lower, upper = _bound(month), _bound(add_months(month, 1))
+
+    with connection.cursor() as cursor:
+        if any(existing == name for _, existing in list_partitions(cursor, table)):
+            return False
+        default = f"{table}_{DEFAULT_SUFFIX}"
+        cursor.execute(
+            f"CREATE TABLE {qn(name)} (LIKE {qn(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        )
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {qn(default)} "
+            f"WHERE {qn(column)} >= %s AND {qn(column)} < %s RETURNING *) "
+            f"INSERT INTO {qn(name)} SELECT * FROM moved",
+            [lower, upper],
+        )
+        cursor.execute(
+            f"ALTER TABLE {qn(table)} ATTACH PARTITION {qn(name)} "
+            f"FOR VALUES FROM (%s) TO (%s)",
+            [lower, upper],
+        )
+    return True
+
+
+def ensure_partitions(table, column=None, months_ahead=None, start=None, connection=None):
+    """
+    Garantit l'existence des partitions du mois `start` (par défaut le mois
+    courant) jusqu'à `months_ahead` mois dans le futur.
+    Retourne la liste des partitions créées.
+    """
+    if column is None or months_ahead is None:
+        config = get_table_config(table)
+        column = column or config['column']
+        if months_ahead is None:
+            months_ahead = config.get('premake_months', 3)
+    current = month_start(datetime.now(timezone.utc))
+    month = month_start(start) if start else current
+
+    created = []
+    while month <= add_months(current, months_ahead):
+        if create_partition(table, column, month, connection=connection):
+            created.append(partition_name(table, month))
+        month = add_months(month, 1)
+    return created
+
+
+# ============================================================================
+# CONVERSION D'UNE TABLE EXISTANTE
+# ============================================================================
+
+def convert_to_partitioned(table, column, months_ahead=3, connection=None):
+    """
+    Transforme une table ordinaire en table partitionnée par mois sur `column`.
+
+    La clé primaire devient (id, column) : PostgreSQL impose que toute
+    contrainte d'unicité contienne la clé de partition. Les index, clés
+    étrangères et contraintes d'unicité existants sont recréés à l'identique
+    (mêmes noms) sur la table partitionnée, puis les données sont recopiées.
+    """
+    connection = connection or default_connection
+    qn = connection.ops.quote_name
+    legacy = f"{table}_legacy"
+
+    with connection.cursor() as cursor:
+        if is_partitioned(cursor, table):
+            return
+        constraints = _copyable_constraints(cursor, table)
+        indexes = _copyable_indexes(cursor, table)
+        pk_name = _pk_constraint(cursor, table)
+
+        cursor.execute(f"ALTER TABLE {qn(table)} RENAME TO {qn(legacy)}")
+        # Les noms d'index et de contraintes sont uniques par schéma : on les
+        # libère sur l'ancienne table, qui est supprimée à la fin.
+        for name, _ in constraints:
+            cursor.execute(f"ALTER TABLE {qn(legacy)} DROP CONSTRAINT {qn(name)}")
+        for name, _ in indexes:
+            cursor.execute(f"DROP INDEX {qn(name)}")
+        if pk_name:
+            cursor.execute(f"ALTER TABLE {qn(legacy)} DROP CONSTRAINT {qn(pk_name)}")
+
+        cursor.execute(
+            f"CREATE TABLE {qn(table)} (LIKE {qn(legacy)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+            f"PARTITION BY RANGE ({qn(column)})"
+        )
+        cursor.execute(
+            f"ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(pk_name or table + '_pkey')} "
+            f"PRIMARY KEY (id, {qn(column)})"
+        )
+        for name, definition in constraints:
+            cursor.execute(f"ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(name)} {definition}")
+        for name, definition in indexes:
+            cursor.execute(_retarget_index(definition, legacy, table, qn))
+
+        cursor.execute(
+            f"CREATE TABLE {qn(table + '_' + DEFAULT_SUFFIX)} PARTITION OF {qn(table)} DEFAULT"
+        )
+        cursor.execute(f"SELECT min({qn(column)}) FROM {qn(legacy)}")
+        oldest = cursor.fetchone()[0]
+
+    ensure_partitions(
+        table, column=column, months_ahead=months_ahead,
+        start=oldest, connection=connection,
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {qn(table)} SELECT * FROM {qn(legacy)}")
+        cursor.execute(f"DROP TABLE {qn(legacy)}")
+
+
+def revert_to_plain(table, connection=None):
+    """Opération inverse de convert_to_partitioned (clé primaire sur id seul)"""
+    connection = connection or default_connection
+    qn = connection.ops.quote_name
+    legacy = f"{table}_partitioned"
+
+    with connection.cursor() as cursor:
+        if not is_partitioned(cursor, table):
+            return
+        constraints = _copyable_constraints(cursor, table)
+        indexes = _copyable_indexes(cursor, table)
+        pk_name = _pk_constraint(cursor, table)
+
+        cursor.execute(f"ALTER TABLE {qn(table)} RENAME TO {qn(legacy)}")
+        for name, _ in constraints:
+            cursor.execute(f"ALTER TABLE {qn(legacy)} DROP CONSTRAINT {qn(name)}")
+        for name, _ in indexes:
+            cursor.execute(f"DROP INDEX {qn(name)}")
+        if pk_name:
+            cursor.execute(f"ALTER TABLE {qn(legacy)} DROP CONSTRAINT {qn(pk_name)}")
+
+        cursor.execute(
+            f"CREATE TABLE {qn(table)} (LIKE {qn(legacy)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        )
+        cursor.execute(
+            f"ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(pk_name or table + '_pkey')} PRIMARY KEY (id)"
+        )
+        for name, definition in constraints:
+            cursor.execute(f"ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(name)} {definition}")
+        for name, definition in indexes:
+            cursor.execute(_retarget_index(definition, legacy, table, qn))
+
+        cursor.execute(f"INSERT INTO {qn(table)} SELECT * FROM {qn(legacy)}")
+        cursor.execute(f"DROP TABLE {qn(legacy)} CASCADE")
+
+
+def _retarget_index(definition, old_table, new_table, qn):
+    """Réécrit un CREATE INDEX pour qu'il porte sur `new_table`"""
+    return re.sub(
+        rf" ON (ONLY )?(\w+\.)?{re.escape(old_table)} ",
+        f" ON {qn(new_table)} ",
+        definition,
+        count=1,
+    )
+
+
+# ============================================================================
+# RÉTENTION
+# ============================================================================
+
+def retention_cutoff(retention_months, today=None):
+    """Premier mois conservé"""
+    return add_months(month_start(today or datetime.now(timezone.utc)), -retention_months)
+
+
+def expired_partitions(table, retention_months, today=None, connection=None):
+    """Partitions dont tout le mois est antérieur à la fenêtre de rétention"""
+    connection = connection or default_connection
+    cutoff = retention_cutoff(retention_months, today)
+    with connection.cursor() as cursor:
+        return [(month, name) for month, name in list_partitions(cursor, table) if month < cutoff]
+
+
+def prune_default_partition(table, column, cutoff, action='archive', dry_run=False, connection=None):
+    """
+    Lignes de la partition par défaut antérieures à `cutoff` (premier mois
+    conservé) : elles n'appartiennent à aucune partition mensuelle et ne
+    seraient jamais détachées. Archivées dans
+    PARTITION_ARCHIVE_SCHEMA.<table>_default_archive ou supprimées.
+    Retourne le nombre de lignes concernées.
+    """
+    connection = connection or default_connection
+    qn = connection.ops.quote_name
+    default = f"{table}_{DEFAULT_SUFFIX}"
+    bound = _bound(cutoff)
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [qn(default)])
+        if not cursor.fetchone()[0]:
+            return 0
+        if dry_run:
+            cursor.execute(f"SELECT count(*) FROM {qn(default)} WHERE {qn(column)} < %s", [bound])
+            return cursor.fetchone()[0]
+        if action == 'drop':
+            cursor.execute(f"DELETE FROM {qn(default)} WHERE {qn(column)} < %s", [bound])
+            return cursor.rowcount
+        schema = settings.PARTITION_ARCHIVE_SCHEMA
+        archive = f"{qn(schema)}.{qn(default + '_archive')}"
+        cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {qn(schema)}")
+        cursor.execute(f"CREATE TABLE IF NOT EXISTS {archive} (LIKE {qn(table)} INCLUDING DEFAULTS)")
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {qn(default)} WHERE {qn(column)} < %s RETURNING *) "
+            f"INSERT INTO {archive} SELECT * FROM moved",
+            [bound],
+        )
+        return cursor.rowcount
+
+
+def apply_retention(table, retention_months=None, action=None, dry_run=False,
+                    today=None, connection=None):
+    """
+    Détache les partitions expirées puis les archive (déplacement dans le
+    schéma settings.PARTITION_ARCHIVE_SCHEMA et, s'il est configuré, dans le
+    tablespace settings.PARTITION_ARCHIVE_TABLESPACE) ou les supprime.
+    Les lignes expirées de la partition par défaut subissent le même sort
+    (prune_default_partition). Retourne la liste des partitions traitées,
+    suivie de "<table>_default (N lignes)" s'il y en avait.
+    """
+    config = get_table_config(table)
+    connection = connection or default_connection
+    qn = connection.ops.quote_name
+    if retention_months is None:
+        retention_months = config['retention_months']
+    action = action or config.get('retention_action', 'archive')
+    if action not in ('archive', 'drop'):
+        raise ValueError(f"Action de rétention inconnue : {action}")
+
+    expired = expired_partitions(table, retention_months, today=today, connection=connection)
+    default_rows = prune_default_partition(
+        table, config['column'], retention_cutoff(retention_months, today),
+        action=action, dry_run=dry_run, connection=connection,
+    )
+    pruned = [name for _, name in expired]
+    if default_rows:
+        pruned.append(f"{table}_{DEFAULT_SUFFIX} ({default_rows} lignes)")
+    if dry_run:
+        return pruned
+
+    schema = settings.PARTITION_ARCHIVE_SCHEMA
+    tablespace = settings.PARTITION_ARCHIVE_TABLESPACE
+    with connection.cursor() as cursor:
+        if expired and action == 'archive':
+            cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {qn(schema)}")
+        for _, name in expired:
+            cursor.execute(f"ALTER TABLE {qn(table)} DETACH PARTITION {qn(name)}")
+            if action == 'archive':
+                cursor.execute(f"ALTER TABLE {qn(name)} SET SCHEMA {qn(schema)}")
+                if tablespace:
+                    _move_to_tablespace(cursor, schema, name, tablespace, qn)
+            else:
+                cursor.execute(f"DROP TABLE {qn(name)}")
+    return pruned
+
+
+def _move_to_tablespace(cursor, schema, table, tablespace, qn):
+    """Déplace une table et ses index dans un autre tablespace"""
+    cursor.execute(f"ALTER TABLE {qn(schema)}.{qn(table)} SET TABLESPACE {qn(tablespace)}")
+    cursor.execute(
+        "SELECT indexname FROM pg_indexes WHERE schemaname = %s AND tablename = %s",
+        [schema, table],
+    )
+    for (index,) in cursor.fetchall():
+        cursor.execute(f"ALTER INDEX {qn(schema)}.{qn(index)} SET TABLESPACE {qn(tablespace)}")
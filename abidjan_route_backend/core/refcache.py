@@ -0,0 +1,250 @@
+"""
+Cache des données de référence propre à chaque processus
+
+    from core.refcache import reference_cache
+    data = reference_cache.get()
+    data.locations['cocody']            # LocationRecord (lieux actifs, par slug)
+    data.modes                          # ModeRecord actifs
+    data.nearest_stop(mode.id, point)   # StopMatch ou None
+
+Les modes de transport, les lieux et les arrêts actifs sont lus à presque
+chaque recherche et changent rarement : ils sont chargés une fois par
+processus dans des structures compactes et figées (enregistrements à
+__slots__, coordonnées des arrêts en tableaux NumPy par mode) au lieu d'être
+relus et instanciés par l'ORM à chaque requête.
+
+Invalidation : toute modification de ces tables (signaux post_save /
+post_delete, ou invalidate() après un chargement en masse) écrit une
+nouvelle version dans le cache partagé (CACHES, Redis en production). Au
+plus une fois toutes les REFERENCE_CACHE['check_interval'] secondes, get()
+compare cette version à celle des données en mémoire et recharge si elle a
+changé ; au-delà de REFERENCE_CACHE['max_age'], le rechargement a lieu
+quoi qu'il arrive (version évincée du cache).
+"""
+
+import logging
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from config.db_routers import pin_to_primary
+
+from .models import Location, TransportMode, TransportStop
+
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'refcache:version'
+EARTH_RADIUS_M = 6371000
+
+
+class ModeRecord:
+    """Mode de transport actif ; mêmes attributs que TransportMode pour le planificateur"""
+
+    __slots__ = (
+        'id', 'slug', 'name', 'type', 'icon', 'color',
+        'base_price', 'price_per_km', 'average_speed',
+        'comfort_rating', 'security_rating',
+        'operating_hours_start', 'operating_hours_end',
+    )
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            setattr(self, name, values[name])
+
+
+class LocationRecord:
+    """Lieu actif ; `coordinates` est le Point GEOS (lng, lat) de la base"""
+
+    __slots__ = ('id', 'slug', 'name', 'type', 'coordinates')
+
+    def __init__(self, id, slug, name, type, coordinates):
+        self.id = id
+        self.slug = slug
+        self.name = name
+        self.type = type
+        self.coordinates = coordinates
+
+
+class StopMatch:
+    """Arrêt le plus proche d'un point et sa distance en mètres"""
+
+    __slots__ = ('id', 'name', 'distance_m')
+
+    def __init__(self, id, name, distance_m):
+        self.id = id
+        self.name = name
+        self.distance_m = distance_m
+
+
+class StopTable:
+    """Arrêts actifs d'un mode : identifiants, noms et coordonnées (radians) alignés"""
+
+    __slots__ = ('ids', 'names', 'lat', 'lng', 'cos_lat')
+
+    def __init__(self, ids, names, lat, lng):
+        # NumPy importé au premier chargement, pas à l'import du module
+        import numpy as np
+
+        self.ids = tuple(ids)
+        self.names = tuple(names)
+        self.lat = np.radians(np.asarray(lat, dtype=np.float64))
+        self.lng = np.radians(np.asarray(lng, dtype=np.float64))
+        self.cos_lat = np.cos(self.lat)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def nearest(self, lat, lng):
+        """Haversine vers tous les arrêts, en une opération NumPy"""
+        import numpy as np
+
+        lat, lng = np.radians(lat), np.radians(lng)
+        a = (np.sin((self.lat - lat) / 2) ** 2
+             + np.cos(lat) * self.cos_lat * np.sin((self.lng - lng) / 2) ** 2)
+        distances = 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+        index = int(np.argmin(distances))
+        return StopMatch(self.ids[index], self.names[index], float(distances[index]))
+
+
+class ReferenceData:
+    """Instantané figé des tables de référence"""
+
+    __slots__ = ('version', 'loaded_at', 'modes', 'modes_by_id', 'locations', 'locations_by_id', 'stops')
+
+    def __init__(self, version, modes, locations, stops):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.modes = tuple(modes)
+        self.modes_by_id = {mode.id: mode for mode in self.modes}
+        self.locations = {location.slug: location for location in locations}
+        self.locations_by_id = {location.id: location for location in locations}
+        self.stops = stops
+
+    def nearest_stop(self, mode_id, point):
+        """Arrêt actif du mode le plus proche de `point` (Point GEOS), ou None"""
+        table = self.stops.get(mode_id)
+        if not table:
+            return None
+        return table.nearest(point.y, point.x)
+
+
+def load_reference(version=None):
+    """Lit les tables de référence sur le primaire (pas de retard de réplication)"""
+    with pin_to_primary():
+        modes = [
+            ModeRecord(
+                id=mode.id, slug=mode.slug, name=mode.name, type=mode.type,
+                icon=mode.icon, color=mode.color,
+                base_price=mode.base_price, price_per_km=mode.price_per_km,
+                average_speed=mode.average_speed,
+                comfort_rating=mode.comfort_rating, security_rating=mode.security_rating,
+                operating_hours_start=mode.operating_hours_start,
+                operating_hours_end=mode.operating_hours_end,
+            )
+            for mode in TransportMode.objects.filter(is_active=True)
+        ]
+        locations = [
+            LocationRecord(*row)
+            for row in Location.objects.filter(is_active=True)
+            .values_list('id', 'slug', 'name', 'type', 'coordinates')
+        ]
+        columns = {}
+        stops = (
+            TransportStop.objects.filter(is_active=True)
+            .order_by('transport_mode_id', 'id')
+            .values_list('transport_mode_id', 'id', 'name', 'coordinates')
+        )
+        for mode_id, pk, name, point in stops.iterator(chunk_size=10000):
+            ids, names, lat, lng = columns.setdefault(mode_id, ([], [], [], []))
+            ids.append(pk)
+            names.append(name)
+            lat.append(point.y)
+            lng.append(point.x)
+    tables = {mode_id: StopTable(*values) for mode_id, values in columns.items()}
+    return ReferenceData(version, modes, locations, tables)
+
+
+class ReferenceCache:
+
+    def __init__(self):
+        self._data = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """
+        Instantané courant ; rechargé si la version partagée a changé.
+        Ne renvoie jamais None : le premier chargement attend le verrou et
+        propage l'erreur s'il échoue.
+        """
+        if self._is_stale():
+            self._refresh()
+        return self._data
+
+    def _is_stale(self):
+        checked_at = self._checked_at
+        return (
+            self._data is None
+            or checked_at is None
+            or time.monotonic() - checked_at > settings.REFERENCE_CACHE['check_interval']
+        )
+
+    def _refresh(self):
+        with self._lock:
+            # Un autre thread a pu recharger pendant l'attente du verrou
+            if not self._is_stale():
+                return
+            version = cache.get(VERSION_KEY)
+            current = self._data
+            if (
+                current is not None
+                and current.version == version
+                and time.monotonic() - current.loaded_at < settings.REFERENCE_CACHE['max_age']
+            ):
+                self._checked_at = time.monotonic()
+                return
+            try:
+                data = load_reference(version)
+            except Exception:
+                if current is None:
+                    raise
+                # On garde l'instantané en service ; nouvel essai au prochain get()
+                logger.exception("Rechargement des données de référence impossible")
+                return
+            self._data = data
+            # Contrôle daté seulement après un chargement réussi
+            self._checked_at = time.monotonic()
+            logger.info(
+                "Données de référence chargées (%d modes, %d lieux, %d arrêts)",
+                len(data.modes), len(data.locations),
+                sum(len(table) for table in data.stops.values()),
+            )
+
+    def clear(self):
+        """Marque l'instantané comme périmé ; il reste servi jusqu'au rechargement"""
+        self._checked_at = None
+
+
+reference_cache = ReferenceCache()
+
+
+def invalidate():
+    """Publie une nouvelle version : chaque processus recharge à son prochain contrôle"""
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+    reference_cache.clear()
+
+
+def _changed(sender, **kwargs):
+    # Après validation : les autres processus doivent relire les nouvelles lignes
+    transaction.on_commit(invalidate, using=kwargs.get('using'))
+
+
+for _model in (TransportMode, Location, TransportStop):
+    post_save.connect(_changed, sender=_model, dispatch_uid=f'refcache-save-{_model.__name__}')
+    post_delete.connect(_changed, sender=_model, dispatch_uid=f'refcache-delete-{_model.__name__}')
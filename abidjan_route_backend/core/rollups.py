@@ -0,0 +1,116 @@
+"""
+Agrégation incrémentale de PriceHistory en agrégats horaires et journaliers
+
+Chaque passe ne lit que les observations insérées depuis le dernier repère
+(RollupWatermark, sur created_at), repère les seaux (mode, origine,
+destination, heure/jour) qu'elles touchent et recalcule ces seaux
+entièrement dans PostgreSQL : médiane et p90 ne se combinent pas, un seau
+touché est donc recalculé à partir des lignes brutes du seau, pas fusionné.
+
+Usage:
+    from core.rollups import rollup_price_history
+    rollup_price_history()            # heure + jour
+    rollup_price_history(['day'])
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import RollupWatermark
+
+
+GRANULARITIES = {
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1),
+}
+
+# Premier passage : rien avant cette date n'est considéré comme déjà agrégé
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+ROLLUP_SQL = """
+WITH touched AS (
+    SELECT DISTINCT transport_mode_id, origin_id, destination_id,
+           date_trunc(%(granularity)s, recorded_at) AS bucket_start
+    FROM price_history
+    WHERE created_at > %(since)s AND created_at <= %(until)s
+)
+INSERT INTO fare_aggregates (
+    id, created_at, updated_at, granularity,
+    transport_mode_id, origin_id, destination_id, bucket_start,
+    observation_count, mean_price, median_price, p90_price, min_price, max_price
+)
+SELECT gen_random_uuid(), now(), now(), %(granularity)s,
+       t.transport_mode_id, t.origin_id, t.destination_id, t.bucket_start,
+       count(*),
+       round(avg(p.price), 2),
+       round(percentile_cont(0.5) WITHIN GROUP (ORDER BY p.price)::numeric, 2),
+       round(percentile_cont(0.9) WITHIN GROUP (ORDER BY p.price)::numeric, 2),
+       min(p.price),
+       max(p.price)
+FROM touched t
+JOIN price_history p
+  ON p.transport_mode_id = t.transport_mode_id
+ AND p.origin_id = t.origin_id
+ AND p.destination_id = t.destination_id
+ AND p.recorded_at >= t.bucket_start
+ AND p.recorded_at < t.bucket_start + %(width)s
+GROUP BY t.transport_mode_id, t.origin_id, t.destination_id, t.bucket_start
+ON CONFLICT (granularity, transport_mode_id, origin_id, destination_id, bucket_start)
+DO UPDATE SET
+    updated_at = now(),
+    observation_count = EXCLUDED.observation_count,
+    mean_price = EXCLUDED.mean_price,
+    median_price = EXCLUDED.median_price,
+    p90_price = EXCLUDED.p90_price,
+    min_price = EXCLUDED.min_price,
+    max_price = EXCLUDED.max_price
+"""
+
+
+def watermark_name(granularity):
+    return f"price_history:{granularity}"
+
+
+def rollup_price_history(granularities=None, until=None):
+    """
+    Met à jour les agrégats pour chaque granularité demandée.
+
+    `until` borne la passe (par défaut maintenant moins ROLLUP_SAFETY_LAG,
+    pour laisser les transactions en cours se valider avant d'avancer le
+    repère). Retourne {granularité: nombre de seaux recalculés}.
+    """
+    granularities = granularities or list(GRANULARITIES)
+    if until is None:
+        until = datetime.now(timezone.utc) - timedelta(seconds=settings.ROLLUP_SAFETY_LAG_SECONDS)
+
+    results = {}
+    for granularity in granularities:
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Granularité inconnue : {granularity}")
+        results[granularity] = _rollup(granularity, until)
+    return results
+
+
+def _rollup(granularity, until):
+    with transaction.atomic():
+        watermark, _ = RollupWatermark.objects.select_for_update().get_or_create(
+            name=watermark_name(granularity),
+            defaults={'processed_until': EPOCH},
+        )
+        if watermark.processed_until >= until:
+            return 0
+
+        with connection.cursor() as cursor:
+            cursor.execute(ROLLUP_SQL, {
+                'granularity': granularity,
+                'width': GRANULARITIES[granularity],
+                'since': watermark.processed_until,
+                'until': until,
+            })
+            buckets = cursor.rowcount
+
+        watermark.processed_until = until
+        watermark.save(update_fields=['processed_until', 'updated_at'])
+    return buckets
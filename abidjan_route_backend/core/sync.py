@@ -0,0 +1,227 @@
+"""
+Synchronisation incrémentale des données de référence
+
+Chaque ressource (lieux, arrêts, lignes, POI) est lue dans l'ordre
+(updated_at, id) à partir d'un curseur opaque qui encode la dernière paire
+vue. Une page contient :
+- `changes` : lignes actives créées ou modifiées depuis le curseur ;
+- `deleted` : identifiants des lignes désactivées (is_active=False) ou
+  supprimées (traces DeletedRecord posées par post_delete).
+
+Sans curseur, la première page part du début : un client reçoit tout le
+catalogue page par page, puis ne demande plus que les changements.
+
+Les lignes modifiées il y a moins de SYNC['safety_seconds'] ne sont pas
+encore servies : une transaction plus ancienne mais validée plus tard
+pourrait sinon avoir un updated_at antérieur au curseur et être manquée.
+Les traces de suppression sont conservées SYNC['tombstone_days'] jours ;
+un curseur plus ancien doit repartir de zéro (CursorExpired).
+
+Les mises à jour en masse (QuerySet.update, bulk_update) ne touchent pas
+updated_at d'elles-mêmes : elles doivent l'inclure explicitement.
+"""
+
+import base64
+import binascii
+import heapq
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Q
+from django.db.models.signals import post_delete
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from phonenumber_field.phonenumber import PhoneNumber
+
+from config.db_routers import pin_to_primary
+
+from .models import CarRental, DeletedRecord, Hotel, Location, Restaurant, TransportRoute, TransportStop
+
+
+# Plus grand UUID : un curseur (t, LAST_ID) reprend strictement après t
+LAST_ID = uuid.UUID(int=(1 << 128) - 1)
+
+
+class CursorError(ValueError):
+    """Curseur illisible"""
+
+
+class CursorExpired(CursorError):
+    """Curseur antérieur à la rétention des traces de suppression"""
+
+
+def _plain(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, PhoneNumber):
+        return str(value)
+    return value
+
+
+class Resource:
+    """Ressource synchronisable : modèle, champs servis, géométrie"""
+
+    def __init__(self, name, model, fields, geometry):
+        self.name = name
+        self.model = model
+        self.fields = fields
+        self.geometry = geometry
+
+    def payload(self, row):
+        item = {field: _plain(value) for field, value in zip(self.fields, row)}
+        geometry = item.pop(self.geometry)
+        if geometry.geom_type == 'Point':
+            item['lat'], item['lng'] = geometry.y, geometry.x
+        else:
+            item['path'] = [[lat, lng] for lng, lat in geometry.coords]
+        return item
+
+
+_POI_FIELDS = ('id', 'updated_at', 'name', 'slug', 'location_id', 'coordinates', 'address', 'phone',
+               'average_rating', 'rating_count', 'description', 'photos')
+
+RESOURCES = {
+    resource.name: resource
+    for resource in (
+        Resource('locations', Location, (
+            'id', 'updated_at', 'slug', 'name', 'type', 'parent_location_id', 'coordinates',
+            'population', 'description',
+        ), 'coordinates'),
+        Resource('stops', TransportStop, (
+            'id', 'updated_at', 'name', 'transport_mode_id', 'location_id', 'coordinates',
+            'address', 'stop_type', 'amenities',
+        ), 'coordinates'),
+        Resource('routes', TransportRoute, (
+            'id', 'updated_at', 'name', 'code', 'transport_mode_id', 'origin_stop_id',
+            'destination_stop_id', 'route_path', 'distance_km', 'estimated_duration_minutes',
+            'price', 'frequency_minutes',
+        ), 'route_path'),
+        Resource('hotels', Hotel, _POI_FIELDS + (
+            'star_rating', 'price_range', 'min_price_fcfa', 'max_price_fcfa', 'amenities',
+            'email', 'website', 'is_verified',
+        ), 'coordinates'),
+        Resource('restaurants', Restaurant, _POI_FIELDS + (
+            'cuisine_type', 'price_range', 'opening_hours',
+        ), 'coordinates'),
+        Resource('car-rentals', CarRental, _POI_FIELDS + (
+            'price_per_day_fcfa', 'car_types_available', 'amenities', 'insurance_included',
+            'unlimited_mileage', 'email', 'website', 'is_verified',
+        ), 'coordinates'),
+    )
+}
+
+
+# ============================================================================
+# CURSEURS
+# ============================================================================
+
+def encode_cursor(updated_at, pk):
+    raw = f"{updated_at.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(updated_at, id) d'un curseur ; CursorError s'il est illisible"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        stamp, pk = raw.split('|')
+        updated_at, pk = parse_datetime(stamp), uuid.UUID(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise CursorError("Curseur invalide") from exc
+    if updated_at is None or timezone.is_naive(updated_at):
+        raise CursorError("Curseur invalide")
+    return updated_at, pk
+
+
+def _after(queryset, position):
+    if position is None:
+        return queryset
+    updated_at, pk = position
+    return queryset.filter(Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=pk))
+
+
+# ============================================================================
+# PAGES
+# ============================================================================
+
+def _pages(resource, position, horizon, limit):
+    """Lignes et traces après `position`, chacune bornée à limit + 1"""
+    rows = list(
+        _after(resource.model.objects.filter(updated_at__lte=horizon), position)
+        .order_by('updated_at', 'id')
+        .values_list('is_active', *resource.fields)[:limit + 1]
+    )
+    tombstones = list(
+        _after(DeletedRecord.objects.filter(resource=resource.name, updated_at__lte=horizon), position)
+        .order_by('updated_at', 'id')
+        .values_list('updated_at', 'id', 'object_id')[:limit + 1]
+    )
+    return rows, tombstones
+
+
+def changes_since(resource, cursor=None, limit=500):
+    """
+    Page de changements de `resource` après `cursor` :
+    {'changes', 'deleted', 'cursor', 'hasMore'}. Le curseur renvoyé est à
+    redonner tel quel ; sur la dernière page il avance jusqu'à l'horizon de
+    sûreté, pour qu'un client à jour ne voie pas son curseur expirer.
+    """
+    position = decode_cursor(cursor) if cursor else None
+    now = timezone.now()
+    if position is not None and position[0] < now - timedelta(days=settings.SYNC['tombstone_days']):
+        raise CursorExpired("Curseur expiré, resynchronisation complète nécessaire")
+    horizon = now - timedelta(seconds=settings.SYNC['safety_seconds'])
+
+    # Primaire : une ligne pas encore répliquée serait sautée définitivement
+    with pin_to_primary():
+        rows, tombstones = _pages(resource, position, horizon, limit)
+    # Fusion des deux flux triés par (updated_at, id), puis coupe à `limit`
+    merged = heapq.merge(
+        ((row[2], row[1], 'row', row) for row in rows),
+        ((updated_at, pk, 'tombstone', object_id) for updated_at, pk, object_id in tombstones),
+        key=lambda entry: (entry[0], entry[1]),
+    )
+    page = []
+    has_more = False
+    for entry in merged:
+        if len(page) == limit:
+            has_more = True
+            break
+        page.append(entry)
+
+    changes, deleted = [], []
+    for _, _, kind, value in page:
+        if kind == 'tombstone':
+            deleted.append(value)
+        elif value[0]:
+            changes.append(resource.payload(value[1:]))
+        else:
+            deleted.append(value[1])
+
+    if has_more:
+        cursor = encode_cursor(page[-1][0], page[-1][1])
+    else:
+        # Tout ce qui précède l'horizon a été servi
+        cursor = encode_cursor(horizon, LAST_ID)
+    return {'changes': changes, 'deleted': deleted, 'cursor': cursor, 'hasMore': has_more}
+
+
+def purge_tombstones(days=None):
+    """Supprime les traces plus anciennes que la rétention ; renvoie le nombre supprimé"""
+    days = settings.SYNC['tombstone_days'] if days is None else days
+    deleted, _ = DeletedRecord.objects.filter(updated_at__lt=timezone.now() - timedelta(days=days)).delete()
+    return deleted
+
+
+def _record_deletion(sender, instance, **kwargs):
+    DeletedRecord.objects.using(kwargs.get('using')).create(
+        resource=RESOURCE_NAMES[sender], object_id=instance.pk,
+    )
+
+
+RESOURCE_NAMES = {resource.model: name for name, resource in RESOURCES.items()}
+
+for _model, _name in RESOURCE_NAMES.items():
+    post_delete.connect(_record_deletion, sender=_model, dispatch_uid=f'sync-tombstone-{_name}')
@@ -0,0 +1,520 @@
+"""
+Jeu de données synthétique d'une grande ville, pour les mesures de performance
+
+Génère, à partir d'une graine et d'un facteur d'échelle, un réseau complet
+et plusieurs mois d'historique :
+
+    table               scale=1          remarque
+    locations           13 + 2 000       communes réelles, quartiers autour
+    transport_modes     7                tarifs et vitesses du frontend
+    transport_routes    1 000            bus, gbaka, train, métro
+    transport_stops     ~19 000          arrêts le long des lignes
+    route_segments      ~18 000          LineStrings entre arrêts successifs
+    hotels / restaurants / car_rentals   500 / 2 000 / 100
+    search_history      2 000 000        pointes 6h-8h et 17h-19h, trajets populaires
+    traffic_data        ~3 500 000       200 capteurs, une mesure / 15 min
+    price_history       1 000 000        tarif x distance x pointe, arrondi à 25 FCFA
+
+La même (graine, échelle, jours, date de fin) produit exactement les mêmes
+lignes, identifiants compris : chaque table a son propre générateur
+aléatoire, on peut donc n'en régénérer qu'une. Les lignes sont produites en
+flux, dans l'ordre chronologique pour les séries temporelles (BRIN,
+partitions), et écrites soit en CSV compatibles COPY (write_csv), soit
+directement en base par COPY (copy_to_database).
+
+Les slugs sont préfixés (`prefix`) pour ne pas entrer en conflit avec les
+données réelles ; charger deux fois le même jeu viole les clés primaires.
+
+Usage:
+    python manage.py generate_synthetic --scale 0.1 --output var/synthetic
+    python manage.py generate_synthetic --scale 1 --database
+"""
+
+import csv
+import gzip
+import json
+import math
+import random
+import uuid
+from datetime import datetime, time, timedelta, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection as default_connection, transaction
+
+from . import partitioning
+from .ingest import copy_rows
+from .refcache import invalidate
+
+
+# Communes d'Abidjan : (nom, lng, lat, population)
+COMMUNES = [
+    ('Abobo', -4.0167, 5.4147, 1200000),
+    ('Adjamé', -4.0167, 5.3500, 500000),
+    ('Attécoubé', -4.0400, 5.3350, 300000),
+    ('Cocody', -3.9833, 5.3500, 400000),
+    ('Koumassi', -3.9500, 5.2950, 450000),
+    ('Marcory', -3.9833, 5.3000, 250000),
+    ('Plateau', -4.0000, 5.3167, 50000),
+    ('Port-Bouët', -3.9333, 5.2550, 420000),
+    ('Treichville', -4.0083, 5.2950, 120000),
+    ('Yopougon', -4.0833, 5.3333, 1100000),
+    ('Bingerville', -3.8900, 5.3550, 100000),
+    ('Anyama', -4.0500, 5.4950, 150000),
+    ('Songon', -4.2600, 5.3150, 80000),
+]
+
+# slug, nom, type, icône, couleur, prix de base, prix/km, vitesse, confort, sécurité, horaires
+MODES = [
+    ('bus', 'Bus SOTRA', 'bus', '🚌', '#0066CC', 200, 0, 20, 3, 4, (time(5), time(22))),
+    ('taxi', 'Taxi', 'taxi', '🚕', '#FF9900', 500, 200, 30, 4, 4, (None, None)),
+    ('woro', 'Woro-Woro', 'woro', '🚐', '#33AA33', 300, 50, 25, 2, 3, (time(5, 30), time(23))),
+    ('gbaka', 'Gbaka', 'gbaka', '🚎', '#CC3333', 250, 30, 22, 2, 2, (time(5), time(22))),
+    ('train', 'Train urbain', 'train', '🚆', '#663399', 300, 0, 45, 4, 5, (time(5, 30), time(21))),
+    ('metro', 'Métro', 'metro', '🚇', '#009999', 400, 0, 40, 5, 5, (time(5), time(23))),
+    ('car_rental', 'Location de voiture', 'car_rental', '🚗', '#333333', 25000, 150, 35, 5, 5, (None, None)),
+]
+
+TRANSIT_SHARES = {'bus': 0.6, 'gbaka': 0.3, 'train': 0.05, 'metro': 0.05}
+
+# Poids relatifs des recherches et de la congestion par heure (pointes du matin et du soir)
+HOUR_WEIGHTS = [
+    0.2, 0.1, 0.1, 0.1, 0.3, 1.0, 3.0, 4.0, 3.5, 2.0, 1.5, 1.5,
+    1.8, 1.6, 1.4, 1.6, 2.5, 3.8, 4.0, 3.0, 2.0, 1.2, 0.8, 0.4,
+]
+WEEKEND_FACTOR = 0.6
+CRITERIA = [('balanced', 0.45), ('cheapest', 0.3), ('fastest', 0.2), ('safest', 0.05)]
+
+TRAFFIC_INTERVAL_MINUTES = 15
+ROAD_FACTOR = 1.3  # distance routière / distance à vol d'oiseau
+
+COLUMNS = {
+    'locations': [
+        'id', 'created_at', 'updated_at', 'name', 'slug', 'type', 'parent_location_id',
+        'coordinates', 'population', 'description', 'is_active',
+    ],
+    'transport_modes': [
+        'id', 'created_at', 'updated_at', 'name', 'slug', 'type', 'icon', 'color', 'description',
+        'base_price', 'price_per_km', 'average_speed', 'comfort_rating', 'security_rating',
+        'operating_hours_start', 'operating_hours_end', 'is_active',
+    ],
+    'transport_stops': [
+        'id', 'created_at', 'updated_at', 'name', 'transport_mode_id', 'location_id',
+        'coordinates', 'address', 'stop_type', 'amenities', 'is_active',
+    ],
+    'transport_routes': [
+        'id', 'created_at', 'updated_at', 'name', 'code', 'transport_mode_id', 'origin_stop_id',
+        'destination_stop_id', 'route_path', 'distance_km', 'estimated_duration_minutes',
+        'price', 'frequency_minutes', 'is_active',
+    ],
+    'route_segments': [
+        'id', 'created_at', 'updated_at', 'transport_route_id', 'from_stop_id', 'to_stop_id',
+        'segment_order', 'segment_path', 'distance_km', 'duration_minutes',
+    ],
+    'hotels': [
+        'id', 'created_at', 'updated_at', 'name', 'slug', 'location_id', 'coordinates', 'address',
+        'phone', 'email', 'website', 'star_rating', 'average_rating', 'rating_count',
+        'price_range', 'min_price_fcfa', 'max_price_fcfa', 'amenities', 'description', 'photos',
+        'is_verified', 'is_active',
+    ],
+    'restaurants': [
+        'id', 'created_at', 'updated_at', 'name', 'slug', 'location_id', 'coordinates', 'address',
+        'phone', 'cuisine_type', 'average_rating', 'rating_count', 'price_range',
+        'opening_hours', 'description', 'photos', 'is_active',
+    ],
+    'car_rentals': [
+        'id', 'created_at', 'updated_at', 'name', 'slug', 'location_id', 'coordinates', 'address',
+        'phone', 'email', 'website', 'average_rating', 'rating_count', 'price_per_day_fcfa',
+        'car_types_available', 'amenities', 'insurance_included', 'unlimited_mileage',
+        'description', 'photos', 'is_verified', 'is_active',
+    ],
+    'search_history': [
+        'id', 'created_at', 'updated_at', 'user_id', 'session_id', 'origin_id', 'destination_id',
+        'origin_coordinates', 'destination_coordinates', 'search_criteria',
+        'selected_transport_mode_id', 'search_date', 'ip_address',
+    ],
+    'traffic_data': [
+        'id', 'created_at', 'updated_at', 'location_id', 'coordinates', 'traffic_level',
+        'average_speed_kmh', 'recorded_at', 'day_of_week', 'hour_of_day', 'source',
+    ],
+    'price_history': [
+        'id', 'created_at', 'updated_at', 'transport_mode_id', 'origin_id', 'destination_id',
+        'price', 'distance_km', 'recorded_at', 'source',
+    ],
+}
+
+# Ordre de chargement (clés étrangères)
+TABLES = list(COLUMNS)
+
+
+def point(lng, lat):
+    return f"SRID=4326;POINT({lng:.6f} {lat:.6f})"
+
+
+def linestring(points):
+    return "SRID=4326;LINESTRING({})".format(', '.join(f"{lng:.6f} {lat:.6f}" for lng, lat in points))
+
+
+def haversine_km(lng1, lat1, lng2, lat2):
+    dlat = math.radians(lat2 - lat1)
+    dlng = math.radians(lng2 - lng1)
+    a = math.sin(dlat / 2) ** 2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlng / 2) ** 2
+    return 6371 * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+class SyntheticCity:
+    """Générateur déterministe ; rows(table) produit les lignes dans l'ordre de COLUMNS[table]"""
+
+    def __init__(self, seed=0, scale=1.0, days=180, end=None, prefix='syn'):
+        self.seed = seed
+        self.scale = scale
+        self.days = days
+        end = end or datetime.now(timezone.utc).date()
+        self.end = datetime.combine(end, time(), tzinfo=timezone.utc)
+        self.start = self.end - timedelta(days=days)
+        self.prefix = prefix
+        self.counts = {
+            'quartiers': self._scaled(2000),
+            'routes': self._scaled(1000),
+            'hotels': self._scaled(500),
+            'restaurants': self._scaled(2000),
+            'car_rentals': self._scaled(100),
+            'searches': self._scaled(2_000_000),
+            'sensors': self._scaled(200),
+            'prices': self._scaled(1_000_000),
+        }
+        self._reference = None
+
+    def _scaled(self, count):
+        return max(1, round(count * self.scale))
+
+    def rng(self, table):
+        return random.Random(f"{self.seed}:{table}")
+
+    @staticmethod
+    def new_id(rng):
+        return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+    def rows(self, table):
+        reference = self.reference
+        if table in reference:
+            return iter(reference[table])
+        return getattr(self, f'_{table}')()
+
+    # ------------------------------------------------------------------
+    # Référentiel (en mémoire : quelques dizaines de milliers de lignes)
+    # ------------------------------------------------------------------
+
+    @property
+    def reference(self):
+        if self._reference is None:
+            self._reference = {}
+            self._build_locations()
+            self._build_modes()
+            self._build_network()
+            self._build_pois()
+        return self._reference
+
+    def _stamp(self):
+        return self.start.isoformat()
+
+    def _build_locations(self):
+        rng = self.rng('locations')
+        stamp = self._stamp()
+        rows, self.communes, self.quartiers = [], [], []
+        for name, lng, lat, population in COMMUNES:
+            pk = self.new_id(rng)
+            self.communes.append((pk, lng, lat, population))
+            rows.append((
+                pk, stamp, stamp, name, f"{self.prefix}-{name.lower()}", 'commune', None,
+                point(lng, lat), population, f"Commune synthétique {name}", True,
+            ))
+
+        weights = [population for *_, population in self.communes]
+        for index in range(self.counts['quartiers']):
+            commune_id, lng, lat, _ = rng.choices(self.communes, weights=weights)[0]
+            lng += rng.gauss(0, 0.02)
+            lat += rng.gauss(0, 0.015)
+            # Popularité très inégale : quelques quartiers concentrent la demande
+            popularity = rng.paretovariate(1.2)
+            pk = self.new_id(rng)
+            population = int(2000 + popularity * 5000)
+            self.quartiers.append((pk, lng, lat, popularity))
+            rows.append((
+                pk, stamp, stamp, f"Quartier {index + 1}", f"{self.prefix}-q{index + 1}", 'quartier',
+                commune_id, point(lng, lat), population, "Quartier synthétique", True,
+            ))
+        self.quartier_weights = [popularity for *_, popularity in self.quartiers]
+        self._reference['locations'] = rows
+
+    def _build_modes(self):
+        rng = self.rng('transport_modes')
+        stamp = self._stamp()
+        rows, self.modes = [], {}
+        for slug, name, kind, icon, color, base, per_km, speed, comfort, security, hours in MODES:
+            pk = self.new_id(rng)
+            self.modes[kind] = {'id': pk, 'base': base, 'per_km': per_km, 'speed': speed}
+            rows.append((
+                pk, stamp, stamp, name, f"{self.prefix}-{slug}", kind, icon, color,
+                f"{name} (synthétique)", base, per_km, speed, comfort, security,
+                hours[0], hours[1], True,
+            ))
+        self._reference['transport_modes'] = rows
+
+    def _build_network(self):
+        rng = self.rng('transport_routes')
+        stamp = self._stamp()
+        stops, routes, segments = [], [], []
+        kinds, shares = zip(*TRANSIT_SHARES.items())
+
+        for index in range(self.counts['routes']):
+            kind = rng.choices(kinds, weights=shares)[0]
+            mode = self.modes[kind]
+            origin, destination = self._pair(rng, self.quartier_weights)
+            n_stops = rng.randint(8, 30)
+
+            # Tracé légèrement courbe entre les deux quartiers, un arrêt par sommet
+            bend = rng.uniform(-0.01, 0.01)
+            points = []
+            for step in range(n_stops):
+                t = step / (n_stops - 1)
+                points.append((
+                    origin[1] + (destination[1] - origin[1]) * t + bend * math.sin(math.pi * t) + rng.gauss(0, 0.0005),
+                    origin[2] + (destination[2] - origin[2]) * t - bend * math.sin(math.pi * t) + rng.gauss(0, 0.0005),
+                ))
+
+            code = f"{kind[0].upper()}{index + 1}"
+            stop_ids = []
+            for step, (lng, lat) in enumerate(points):
+                pk = self.new_id(rng)
+                location_id = origin[0] if step < n_stops / 2 else destination[0]
+                stop_ids.append(pk)
+                stops.append((
+                    pk, stamp, stamp, f"{code} arrêt {step + 1}", mode['id'], location_id,
+                    point(lng, lat), f"Ligne {code}, arrêt {step + 1}",
+                    'train_station' if kind == 'train' else 'metro_station' if kind == 'metro' else 'bus_stop',
+                    json.dumps({'shelter': rng.random() < 0.3}), True,
+                ))
+
+            route_id = self.new_id(rng)
+            total_km = total_minutes = 0
+            for step in range(n_stops - 1):
+                km = haversine_km(*points[step], *points[step + 1]) * ROAD_FACTOR
+                minutes = max(1, round(km / mode['speed'] * 60 * rng.uniform(1.0, 1.6)))
+                total_km += km
+                total_minutes += minutes
+                segments.append((
+                    self.new_id(rng), stamp, stamp, route_id, stop_ids[step], stop_ids[step + 1],
+                    step + 1, linestring(points[step:step + 2]), round(km, 2), minutes,
+                ))
+
+            routes.append((
+                route_id, stamp, stamp, f"Ligne {index + 1}", code, mode['id'], stop_ids[0], stop_ids[-1],
+                linestring(points), round(total_km, 2), total_minutes,
+                mode['base'] + mode['per_km'] * round(total_km), rng.choice([5, 10, 15, 20, 30]), True,
+            ))
+
+        self._reference['transport_stops'] = stops
+        self._reference['transport_routes'] = routes
+        self._reference['route_segments'] = segments
+
+    def _poi_base(self, rng, kind, index):
+        location_id, lng, lat, _ = rng.choices(self.quartiers, weights=self.quartier_weights)[0]
+        stamp = self._stamp()
+        return (
+            self.new_id(rng), stamp, stamp, f"{kind.capitalize()} {index + 1}",
+            f"{self.prefix}-{kind}-{index + 1}", location_id,
+            point(lng + rng.gauss(0, 0.004), lat + rng.gauss(0, 0.004)),
+            f"{kind.capitalize()} {index + 1}, Abidjan", f"+22507{rng.randrange(10 ** 8):08d}",
+        )
+
+    def _build_pois(self):
+        rng = self.rng('pois')
+        hotels = []
+        for index in range(self.counts['hotels']):
+            stars = rng.randint(1, 5)
+            price_range = 'budget' if stars <= 2 else 'moderate' if stars <= 4 else 'luxury'
+            hotels.append(self._poi_base(rng, 'hotel', index) + (
+                f"hotel{index + 1}@example.ci", f"https://hotel{index + 1}.example.ci", stars,
+                round(rng.uniform(2.5, 5), 1), rng.randint(0, 800), price_range,
+                stars * 10000, stars * 30000, json.dumps({'wifi': True, 'pool': stars >= 4}),
+                "Hôtel synthétique", '[]', rng.random() < 0.5, True,
+            ))
+        restaurants = []
+        for index in range(self.counts['restaurants']):
+            restaurants.append(self._poi_base(rng, 'restaurant', index) + (
+                json.dumps(rng.sample(['ivoirienne', 'libanaise', 'française', 'maquis', 'fast-food'], 2)),
+                round(rng.uniform(2.5, 5), 1), rng.randint(0, 1500),
+                rng.choice(['cheap', 'moderate', 'expensive']),
+                json.dumps({'lundi': '08:00-22:00'}), "Restaurant synthétique", '[]', True,
+            ))
+        car_rentals = []
+        for index in range(self.counts['car_rentals']):
+            car_rentals.append(self._poi_base(rng, 'location', index) + (
+                f"agence{index + 1}@example.ci", f"https://agence{index + 1}.example.ci",
+                round(rng.uniform(3, 5), 1), rng.randint(0, 300), rng.choice([20000, 25000, 35000, 50000]),
+                json.dumps(['sedan', 'suv']), json.dumps({'gps': True, 'ac': True}),
+                rng.random() < 0.5, rng.random() < 0.3, "Agence synthétique", '[]', True, True,
+            ))
+        self._reference['hotels'] = hotels
+        self._reference['restaurants'] = restaurants
+        self._reference['car_rentals'] = car_rentals
+
+    def _pair(self, rng, weights=None, cum_weights=None):
+        """Deux quartiers distincts tirés selon leur popularité"""
+        while True:
+            origin, destination = rng.choices(self.quartiers, weights=weights, cum_weights=cum_weights, k=2)
+            if origin is not destination or len(self.quartiers) == 1:
+                return origin, destination
+
+    # ------------------------------------------------------------------
+    # Séries temporelles (flux)
+    # ------------------------------------------------------------------
+
+    def _timeline(self, rng, total):
+        """`total` instants chronologiques répartis selon HOUR_WEIGHTS et le week-end"""
+        day_weights = [
+            WEEKEND_FACTOR if (self.start + timedelta(days=day)).weekday() >= 5 else 1.0
+            for day in range(self.days)
+        ]
+        unit = total / (sum(day_weights) * sum(HOUR_WEIGHTS))
+        carry = 0.0
+        for day, day_weight in enumerate(day_weights):
+            for hour, hour_weight in enumerate(HOUR_WEIGHTS):
+                carry += unit * day_weight * hour_weight
+                count, carry = int(carry), carry - int(carry)
+                base = self.start + timedelta(days=day, hours=hour)
+                for second in sorted(rng.randrange(3600) for _ in range(count)):
+                    yield base + timedelta(seconds=second)
+
+    def _search_history(self):
+        rng = self.rng('search_history')
+        criteria, criteria_weights = zip(*CRITERIA)
+        transit = [self.modes[kind]['id'] for kind in ('bus', 'taxi', 'woro', 'gbaka')]
+        cum_weights = list(_accumulate(self.quartier_weights))
+        for at in self._timeline(rng, self.counts['searches']):
+            origin, destination = self._pair(rng, cum_weights=cum_weights)
+            stamp = at.isoformat()
+            yield (
+                self.new_id(rng), stamp, stamp, None, self.new_id(rng), origin[0], destination[0],
+                point(origin[1], origin[2]), point(destination[1], destination[2]),
+                rng.choices(criteria, weights=criteria_weights)[0],
+                rng.choice(transit) if rng.random() < 0.6 else None,
+                stamp, f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}",
+            )
+
+    def _traffic_data(self):
+        rng = self.rng('traffic_data')
+        sensors = rng.sample(self.quartiers, min(self.counts['sensors'], len(self.quartiers)))
+        free_flow = {sensor[0]: rng.uniform(30, 50) for sensor in sensors}
+        peak = max(HOUR_WEIGHTS)
+
+        at = self.start
+        step = timedelta(minutes=TRAFFIC_INTERVAL_MINUTES)
+        while at < self.end:
+            weekday = at.weekday()
+            congestion = 0.65 * HOUR_WEIGHTS[at.hour] / peak * (WEEKEND_FACTOR if weekday >= 5 else 1.0)
+            stamp = at.isoformat()
+            for location_id, lng, lat, _ in sensors:
+                speed = max(3.0, free_flow[location_id] * (1 - congestion) * rng.uniform(0.85, 1.15))
+                level = 'low' if speed >= 35 else 'moderate' if speed >= 22 else 'high' if speed >= 12 else 'very_high'
+                yield (
+                    self.new_id(rng), stamp, stamp, location_id, point(lng, lat), level,
+                    round(speed, 2), stamp, weekday, at.hour, 'synthetic',
+                )
+            at += step
+
+    def _price_history(self):
+        rng = self.rng('price_history')
+        modes = [mode for kind, mode in self.modes.items() if kind != 'car_rental']
+        cum_weights = list(_accumulate(self.quartier_weights))
+        peak = max(HOUR_WEIGHTS)
+        for at in self._timeline(rng, self.counts['prices']):
+            origin, destination = self._pair(rng, cum_weights=cum_weights)
+            mode = rng.choice(modes)
+            km = max(0.5, haversine_km(origin[1], origin[2], destination[1], destination[2]) * ROAD_FACTOR)
+            surge = 1 + 0.3 * HOUR_WEIGHTS[at.hour] / peak
+            price = (mode['base'] + mode['per_km'] * km) * surge * rng.uniform(0.85, 1.2)
+            stamp = at.isoformat()
+            yield (
+                self.new_id(rng), stamp, stamp, mode['id'], origin[0], destination[0],
+                max(mode['base'], round(price / 25) * 25), round(km, 2), stamp, 'synthetic',
+            )
+
+
+def _accumulate(values):
+    total = 0
+    for value in values:
+        total += value
+        yield total
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# ============================================================================
+# SORTIES
+# ============================================================================
+
+def write_csv(city, directory, tables=None, compress=True):
+    """
+    Écrit un fichier CSV (avec en-tête) par table dans `directory`, chargeable par
+        \\copy <table> (<colonnes de l'en-tête>) FROM PROGRAM 'zcat <fichier>' WITH (FORMAT csv, HEADER)
+    Retourne {table: nombre de lignes}.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    written = {}
+    for table in tables or TABLES:
+        path = directory / f"{table}.csv{'.gz' if compress else ''}"
+        opener = gzip.open if compress else open
+        with opener(path, 'wt', encoding='utf-8', newline='') as handle:
+            writer = csv.writer(handle)
+            writer.writerow(COLUMNS[table])
+            count = 0
+            for chunk in _chunks(city.rows(table), 10000):
+                writer.writerows(chunk)
+                count += len(chunk)
+        written[table] = count
+    return written
+
+
+def _ensure_partitions(table, start, connection):
+    """Partitions mensuelles depuis `start` : sans elles, l'historique tomberait dans la partition par défaut"""
+    if table not in settings.PARTITIONED_TABLES:
+        return
+    with connection.cursor() as cursor:
+        if not partitioning.is_partitioned(cursor, table):
+            return
+    partitioning.ensure_partitions(table, start=start, connection=connection)
+
+
+def copy_to_database(city, tables=None, chunk_size=50000, connection=None, progress=None):
+    """
+    Charge les tables par COPY, paquet par paquet (une transaction par paquet).
+    `progress(table, lignes)` est appelé après chaque paquet.
+    Retourne {table: nombre de lignes}.
+    """
+    connection = connection or default_connection
+    loaded = {}
+    for table in tables or TABLES:
+        _ensure_partitions(table, city.start, connection)
+        count = 0
+        for chunk in _chunks(city.rows(table), chunk_size):
+            with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+                copy_rows(cursor, table, COLUMNS[table], chunk)
+            count += len(chunk)
+            if progress is not None:
+                progress(table, count)
+        loaded[table] = count
+    # COPY ne déclenche pas les signaux : les processus doivent recharger leurs références
+    invalidate()
+    return loaded
@@ -0,0 +1,136 @@
+"""
+Tâches Celery de maintenance des données (voir config/celery.py)
+
+- rollup_prices : agrégats de prix incrémentaux (file rollups)
+- maintain_partitions : partitions à venir et rétention (file rollups)
+- purge_tombstones : traces de suppression expirées de la synchronisation
+  (file rollups)
+- reconcile_ratings : moyennes et nombres d'avis des POI recalculés depuis
+  Rating, par paquets (file ratings)
+- merge_traffic_file : import d'un fichier de trafic déposé (file ingest)
+
+Chaque tâche recalcule son résultat depuis les données sources : la rejouer
+après un échec ou un redémarrage de worker ne crée ni doublon ni dérive.
+"""
+
+import logging
+from decimal import Decimal
+
+from celery import shared_task
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+from django.db.models import Avg, Count
+from django.utils import timezone
+
+from config.celery import report_progress, single_instance
+
+from . import partitioning, sync
+from .ingest import import_traffic_file
+from .models import CarRental, Hotel, Rating, Restaurant
+from .rollups import rollup_price_history
+
+
+logger = logging.getLogger(__name__)
+
+# rating_type de Rating -> modèle portant average_rating / rating_count
+RATED_MODELS = {
+    'hotel': Hotel,
+    'restaurant': Restaurant,
+    'car_rental': CarRental,
+}
+
+
+@shared_task
+def rollup_prices(granularities=None):
+    with single_instance('rollup_prices', timeout=60 * 60) as acquired:
+        if not acquired:
+            logger.info("Agrégation des prix déjà en cours, passe ignorée")
+            return None
+        return rollup_price_history(granularities)
+
+
+@shared_task
+def maintain_partitions(tables=None):
+    """Crée les partitions à venir puis applique la rétention configurée"""
+    if connection.vendor != 'postgresql':
+        return {}
+    report = {}
+    with single_instance('maintain_partitions', timeout=4 * 60 * 60) as acquired:
+        if not acquired:
+            return report
+        for table in tables or list(settings.PARTITIONED_TABLES):
+            with transaction.atomic():
+                created = partitioning.ensure_partitions(table)
+                pruned = partitioning.apply_retention(table)
+            report[table] = {'created': created, 'pruned': pruned}
+    return report
+
+
+@shared_task
+def purge_tombstones(days=None):
+    return sync.purge_tombstones(days)
+
+
+def _reconcile_chunk(model, content_type, ids):
+    """Recalcule average_rating / rating_count d'un paquet d'objets ; renvoie le nombre modifié"""
+    stats = {
+        row['object_id']: row
+        for row in Rating.objects
+        .filter(content_type=content_type, object_id__in=ids)
+        .values('object_id')
+        .annotate(average=Avg('rating'), count=Count('id'))
+    }
+    changed = []
+    now = timezone.now()
+    for obj in model.objects.filter(pk__in=ids).only('pk', 'average_rating', 'rating_count'):
+        row = stats.get(obj.pk)
+        average = Decimal(row['average']).quantize(Decimal('0.1')) if row else Decimal('0.0')
+        count = row['count'] if row else 0
+        if obj.average_rating != average or obj.rating_count != count:
+            obj.average_rating, obj.rating_count = average, count
+            # bulk_update ne touche pas auto_now : sans cela la synchronisation manquerait la note
+            obj.updated_at = now
+            changed.append(obj)
+    model.objects.bulk_update(changed, ['average_rating', 'rating_count', 'updated_at'])
+    return len(changed)
+
+
+@shared_task(bind=True)
+def reconcile_ratings(self, rating_types=None, chunk_size=500):
+    """
+    Réaligne les notes dénormalisées des hôtels, restaurants et loueurs sur
+    les avis (Rating). Chaque paquet est validé séparément ; l'avancement est
+    publié après chaque paquet.
+    """
+    rating_types = rating_types or list(RATED_MODELS)
+    plan = [
+        (RATED_MODELS[rating_type], list(
+            RATED_MODELS[rating_type].objects.order_by('pk').values_list('pk', flat=True)
+        ))
+        for rating_type in rating_types
+    ]
+    total = sum(len(ids) for _, ids in plan)
+    done = updated = 0
+
+    for model, ids in plan:
+        content_type = ContentType.objects.get_for_model(model)
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            with transaction.atomic():
+                updated += _reconcile_chunk(model, content_type, chunk)
+            done += len(chunk)
+            report_progress(self, done, total, updated=updated)
+    return {'checked': total, 'updated': updated}
+
+
+@shared_task
+def merge_traffic_file(path, fmt=None, source=None, chunk_size=50000):
+    """Importe un fichier de trafic ; les lignes déjà présentes sont ignorées (ON CONFLICT)"""
+    stats = import_traffic_file(path, fmt=fmt, source=source, chunk_size=chunk_size)
+    return {
+        'read': stats.read,
+        'rejected': stats.rejected,
+        'inserted': stats.inserted,
+        'duplicates': stats.duplicates,
+    }
@@ -1,3 +1,313 @@
-from django.test import TestCase
+import gzip
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.gis.geos import Point
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from . import ingest, refcache, sync
+from .models import DeletedRecord, FareAggregate, Location, PriceHistory, RollupWatermark, TransportMode
+from .rollups import rollup_price_history, watermark_name
+
+
+def _snapshot(version):
+    return SimpleNamespace(version=version, loaded_at=time.monotonic(), modes=(), locations={}, stops={})
+
+
+# ============================================================================
+# CACHE DE RÉFÉRENCE
+# ============================================================================
+
+@override_settings(REFERENCE_CACHE={'check_interval': 0, 'max_age': 900})
+class ReferenceCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.delete(refcache.VERSION_KEY)
+        self.cache = refcache.ReferenceCache()
+
+    def test_invalidate_triggers_reload_with_new_version(self):
+        with mock.patch.object(refcache, 'load_reference', side_effect=_snapshot) as load:
+            first = self.cache.get()
+            self.assertIs(self.cache.get(), first)
+            with mock.patch.object(refcache, 'reference_cache', self.cache):
+                refcache.invalidate()
+            second = self.cache.get()
+        self.assertEqual(load.call_count, 2)
+        self.assertIsNotNone(second.version)
+        self.assertNotEqual(second.version, first.version)
+
+    def test_get_never_returns_none_during_concurrent_reload(self):
+        def slow_load(version):
+            time.sleep(0.02)
+            return _snapshot(version)
+
+        results = []
+        with mock.patch.object(refcache, 'load_reference', side_effect=slow_load):
+            self.cache.get()
+            cache.set(refcache.VERSION_KEY, 'v2')
+            self.cache.clear()
+            threads = [threading.Thread(target=lambda: results.append(self.cache.get())) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(results), 8)
+        self.assertTrue(all(result is not None for result in results))
+
+    def test_failed_reload_keeps_serving_previous_snapshot(self):
+        with mock.patch.object(refcache, 'load_reference', side_effect=_snapshot):
+            first = self.cache.get()
+        cache.set(refcache.VERSION_KEY, 'v2')
+        self.cache.clear()
+        with mock.patch.object(refcache, 'load_reference', side_effect=RuntimeError), \
+                self.assertLogs(refcache.logger, 'ERROR'):
+            self.assertIs(self.cache.get(), first)
+        # Nouvel essai au get() suivant, qui réussit
+        with mock.patch.object(refcache, 'load_reference', side_effect=_snapshot):
+            self.assertEqual(self.cache.get().version, 'v2')
+
+    def test_first_load_failure_is_raised(self):
+        with mock.patch.object(refcache, 'load_reference', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.cache.get()
+
+
+# ============================================================================
+# INGESTION
+# ============================================================================
+
+LOCATION_ID = '6f1c2a9e-0000-4000-8000-000000000001'
+
+
+class FakeResolver:
+    """Un seul lieu connu, sans base"""
+
+    def resolve(self, key):
+        if str(key) not in ('cocody', LOCATION_ID):
+            raise ingest.IngestError(f"Lieu inconnu : {key}")
+        return LOCATION_ID, ingest.point_ewkt(-3.98, 5.36)
+
+
+class IngestParserTests(SimpleTestCase):
+
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def write(self, name, text):
+        path = self.directory / name
+        if path.suffix == '.gz':
+            with gzip.open(path, 'wt', encoding='utf-8') as handle:
+                handle.write(text)
+        else:
+            path.write_text(text, encoding='utf-8')
+        return path
+
+    def record(self, **values):
+        return dict({
+            'location': 'cocody', 'traffic_level': 'high',
+            'average_speed_kmh': '12.5', 'recorded_at': '2026-10-19T07:30:00', 'source': 'capteur',
+        }, **values)
+
+    def test_detect_format(self):
+        self.assertEqual(ingest.detect_format('trafic.csv.gz'), 'csv')
+        self.assertEqual(ingest.detect_format('trafic.jsonl'), 'ndjson')
+        with self.assertRaises(ingest.IngestError):
+            ingest.detect_format('trafic.xlsx')
+
+    def test_read_csv_records_with_line_numbers(self):
+        path = self.write('trafic.csv.gz', "location,traffic_level\ncocody,low\nplateau,high\n")
+        records = list(ingest.read_records(path))
+        self.assertEqual(records, [
+            (2, {'location': 'cocody', 'traffic_level': 'low'}),
+            (3, {'location': 'plateau', 'traffic_level': 'high'}),
+        ])
+
+    def test_read_ndjson_skips_blank_lines_and_reports_bad_json(self):
+        path = self.write('trafic.ndjson', '{"location": "cocody"}\n\n{oups\n')
+        records = list(ingest.read_records(path))
+        self.assertEqual(records[0], (1, {'location': 'cocody'}))
+        self.assertEqual(records[1][0], 3)
+        self.assertIsInstance(records[1][1], ingest.IngestError)
+
+    def test_parse_traffic_record(self):
+        row = ingest.parse_traffic_record(self.record(), FakeResolver())
+        location_id, coordinates, level, speed, recorded_at, day, hour, source = row
+        self.assertEqual((location_id, level, source), (LOCATION_ID, 'high', 'capteur'))
+        self.assertEqual(str(speed), '12.50')
+        # Sans fuseau : UTC, qui est aussi l'heure locale d'Abidjan
+        self.assertEqual(recorded_at, '2026-10-19T07:30:00+00:00')
+        self.assertEqual((day, hour), (0, 7))
+
+    def test_parse_traffic_record_explicit_coordinates(self):
+        row = ingest.parse_traffic_record(self.record(lat='5.3', lng='-4.0'), FakeResolver())
+        self.assertEqual(row[1], 'SRID=4326;POINT(-4.0 5.3)')
+
+    def test_invalid_traffic_records_raise_ingest_error(self):
+        cases = [
+            self.record(location='atlantis'),
+            self.record(traffic_level='bouchon'),
+            self.record(traffic_level=['high']),
+            self.record(traffic_level={'level': 'high'}),
+            self.record(average_speed_kmh='rapide'),
+            self.record(average_speed_kmh='-3'),
+            self.record(average_speed_kmh='NaN'),
+            self.record(average_speed_kmh='sNaN'),
+            self.record(average_speed_kmh='Infinity'),
+            self.record(average_speed_kmh='1E+30'),
+            self.record(recorded_at='hier'),
+            self.record(lat='95', lng='0'),
+            self.record(source='x' * 51),
+            ['cocody', 'high'],
+        ]
+        for record in cases:
+            with self.subTest(record=record), self.assertRaises(ingest.IngestError):
+                ingest.parse_traffic_record(record, FakeResolver())
+
+    def test_non_finite_price_raises_ingest_error(self):
+        modes = mock.Mock(resolve=mock.Mock(return_value='gbaka'))
+        for price in ('NaN', 'sNaN', 'Infinity', '-Infinity'):
+            record = {'transport_mode': 'gbaka', 'origin': 'cocody', 'destination': 'cocody',
+                      'price': price, 'distance_km': '12'}
+            with self.subTest(price=price), self.assertRaises(ingest.IngestError):
+                ingest.parse_price_record(record, FakeResolver(), modes)
+
+
+# ============================================================================
+# SYNCHRONISATION
+# ============================================================================
+
+def _location(slug):
+    return Location.objects.create(name=slug.title(), slug=slug, type='commune', coordinates=Point(-4.0, 5.3))
+
+
+class SyncCursorTests(SimpleTestCase):
+
+    def test_round_trip(self):
+        stamp = datetime(2026, 10, 19, 8, 30, tzinfo=dt_timezone.utc)
+        self.assertEqual(sync.decode_cursor(sync.encode_cursor(stamp, sync.LAST_ID)), (stamp, sync.LAST_ID))
+
+    def test_unreadable_cursor(self):
+        naive = sync.encode_cursor(datetime(2026, 10, 19, 8, 30), sync.LAST_ID)
+        for cursor in ('!!!', 'bm9uc2Vucw', naive):
+            with self.subTest(cursor=cursor), self.assertRaises(sync.CursorError):
+                sync.decode_cursor(cursor)
+
+
+@override_settings(SYNC={'safety_seconds': 0, 'tombstone_days': 30, 'page_size': 500, 'max_page_size': 5000})
+class SyncTests(TestCase):
+
+    def setUp(self):
+        self.resource = sync.RESOURCES['locations']
+        self.locations = [_location(slug) for slug in ('abobo', 'cocody', 'plateau')]
+
+    def sync_all(self, cursor=None, limit=2):
+        changes, deleted, pages = [], [], 0
+        while True:
+            page = sync.changes_since(self.resource, cursor, limit=limit)
+            changes += page['changes']
+            deleted += page['deleted']
+            cursor = page['cursor']
+            pages += 1
+            if not page['hasMore']:
+                return changes, deleted, cursor, pages
+
+    def test_pages_cover_every_row_once(self):
+        changes, deleted, _, pages = self.sync_all()
+        self.assertEqual(pages, 2)
+        self.assertEqual(sorted(item['slug'] for item in changes), ['abobo', 'cocody', 'plateau'])
+        self.assertEqual(deleted, [])
+        self.assertEqual((changes[0]['lat'], changes[0]['lng']), (5.3, -4.0))
+
+    def test_up_to_date_cursor_sees_only_new_changes(self):
+        _, _, cursor, _ = self.sync_all()
+        self.assertEqual(self.sync_all(cursor)[:2], ([], []))
+
+        abobo, cocody, plateau = self.locations
+        Location.objects.filter(pk=cocody.pk).update(is_active=False, updated_at=timezone.now())
+        plateau.delete()
+        abobo.name = "Abobo Gare"
+        abobo.save()
+
+        changes, deleted, _, _ = self.sync_all(cursor)
+        self.assertEqual([item['name'] for item in changes], ["Abobo Gare"])
+        self.assertCountEqual(deleted, [cocody.pk, plateau.pk])
+
+    def test_deletion_leaves_tombstone(self):
+        pk = self.locations[0].pk
+        self.locations[0].delete()
+        self.assertTrue(DeletedRecord.objects.filter(resource='locations', object_id=pk).exists())
+
+    def test_expired_cursor(self):
+        cursor = sync.encode_cursor(timezone.now() - timedelta(days=31), sync.LAST_ID)
+        with self.assertRaises(sync.CursorExpired):
+            sync.changes_since(self.resource, cursor)
+
+    def test_purge_tombstones(self):
+        self.locations[0].delete()
+        DeletedRecord.objects.update(updated_at=timezone.now() - timedelta(days=31))
+        self.assertEqual(sync.purge_tombstones(), 1)
+        self.assertFalse(DeletedRecord.objects.exists())
+
+
+# ============================================================================
+# AGRÉGATS DE PRIX
+# ============================================================================
+
+class RollupTests(TestCase):
+
+    def setUp(self):
+        self.mode = TransportMode.objects.create(
+            name="Gbaka", slug='gbaka', type='gbaka', icon='🚐', color='#00AA00',
+            base_price=Decimal('200'), price_per_km=Decimal('50'), average_speed=Decimal('20'),
+        )
+        self.origin, self.destination = _location('abobo'), _location('plateau')
+        self.recorded_at = datetime(2026, 10, 19, 7, 15, tzinfo=dt_timezone.utc)
+
+    def observe(self, price, created_at):
+        observation = PriceHistory.objects.create(
+            transport_mode=self.mode, origin=self.origin, destination=self.destination,
+            price=Decimal(price), distance_km=Decimal('12'), source='test',
+        )
+        # auto_now_add : dates fixées après coup
+        PriceHistory.objects.filter(pk=observation.pk).update(recorded_at=self.recorded_at, created_at=created_at)
+
+    def aggregate(self):
+        return FareAggregate.objects.get(granularity='hour', transport_mode=self.mode)
+
+    def test_watermark_limits_each_pass_to_new_rows(self):
+        first = datetime(2026, 10, 19, 8, 0, tzinfo=dt_timezone.utc)
+        self.observe('300', first - timedelta(minutes=5))
+        self.observe('500', first - timedelta(minutes=4))
+        # Insérée après la borne : pour la passe suivante
+        self.observe('700', first + timedelta(minutes=1))
+
+        self.assertEqual(rollup_price_history(['hour'], until=first), {'hour': 1})
+        watermark = RollupWatermark.objects.get(name=watermark_name('hour'))
+        self.assertEqual(watermark.processed_until, first)
+        self.assertEqual(self.aggregate().observation_count, 2)
+        self.assertEqual(self.aggregate().median_price, Decimal('400.00'))
+
+        # Rien de neuf avant la borne : rien à recalculer
+        self.assertEqual(rollup_price_history(['hour'], until=first), {'hour': 0})
+
+        # Le seau touché est recalculé entièrement, pas fusionné
+        second = first + timedelta(minutes=10)
+        self.assertEqual(rollup_price_history(['hour'], until=second), {'hour': 1})
+        aggregate = self.aggregate()
+        self.assertEqual(aggregate.observation_count, 3)
+        self.assertEqual((aggregate.min_price, aggregate.max_price), (Decimal('300.00'), Decimal('700.00')))
+        self.assertEqual(aggregate.bucket_start, datetime(2026, 10, 19, 7, 0, tzinfo=dt_timezone.utc))
+
+    def test_unknown_granularity(self):
+        with self.assertRaises(ValueError):
+            rollup_price_history(['week'])
@@ -0,0 +1,31 @@
+"""
+Configuration gunicorn
+
+    gunicorn -c gunicorn.conf.py config.wsgi
+    gunicorn -c gunicorn.conf.py -k uvicorn.workers.UvicornWorker config.asgi   (recherche async, ingestion)
+
+Les métriques Prometheus de tous les workers sont agrégées via
+PROMETHEUS_MULTIPROC_DIR (voir config/metrics.py) : le dossier est vidé au
+démarrage et les fichiers d'un worker arrêté sont libérés.
+"""
+
+import multiprocessing
+import os
+import shutil
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(os.path.dirname(__file__), 'var', 'prometheus'))
+
+
+def on_starting(server):
+    directory = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
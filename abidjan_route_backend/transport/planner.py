@@ -0,0 +1,430 @@
+"""
+Calcul des options de transport entre deux lieux
+
+Version serveur de generateTransportOptions / recommendRoute du frontend
+(frontend/src/app/data/abidjan-data.ts) : mêmes structures de réponse
+(RouteResult, TransportOption), mais prix et durées viennent des lignes
+TransportRoute, des modèles de l'application ai et des tarifs TransportMode.
+
+Les options sont calculées par familles indépendantes (FAMILIES) pour
+pouvoir être exécutées en parallèle ou diffusées au fil de l'eau :
+    transit     bus SOTRA, gbaka, train, métro (lignes et arrêts)
+    road        taxi, woro-woro (porte à porte)
+    car_rental  location de voiture (agence la plus proche)
+Les POI autour de la destination (hôtels, restaurants) sont calculés à part.
+
+Modes, lieux et arrêts viennent du cache de référence du processus
+(core/refcache.py) : pas d'ORM pour eux sur le chemin d'une recherche.
+
+Le résultat d'une recherche est mis en cache par (origine, destination,
+heure de départ) : voir plan_route_cached().
+"""
+
+import math
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from django.conf import settings
+from django.contrib.gis.db.models.functions import Distance
+from django.core.cache import cache
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from ai.registry import registry
+from config.metrics import time_phase
+from core.models import CarRental, Hotel, Restaurant, RouteSegment, TransportRoute
+from core.refcache import reference_cache
+
+
+TRANSIT_TYPES = ('bus', 'gbaka', 'train', 'metro')
+ROAD_TYPES = ('taxi', 'woro')
+CAR_RENTAL_TYPES = ('car_rental',)
+
+# Le train n'est proposé qu'au-delà de cette distance (règle du frontend)
+TRAIN_MIN_DISTANCE_KM = 10
+WALKING_SPEED_KMH = 5
+ROUTE_POINTS = 5
+MAX_ROUTE_POINTS = 50
+POI_RADIUS_M = 2000
+POI_LIMIT = 5
+
+
+@dataclass
+class SearchContext:
+    """Paramètres d'une recherche, partagés par toutes les familles"""
+
+    origin: object
+    destination: object
+    depart_at: datetime
+    modes: list = field(default_factory=list)
+
+    @property
+    def distance_km(self):
+        return haversine_km(
+            self.origin.coordinates.y, self.origin.coordinates.x,
+            self.destination.coordinates.y, self.destination.coordinates.x,
+        )
+
+    @property
+    def hour(self):
+        return self.depart_at.hour
+
+    @property
+    def day_of_week(self):
+        return self.depart_at.weekday()
+
+    def modes_of(self, types):
+        local_time = self.depart_at.time()
+        return [mode for mode in self.modes if mode.type in types and is_operating(mode, local_time)]
+
+
+def build_context(origin, destination, depart_at=None):
+    depart_at = timezone.localtime(depart_at or timezone.now())
+    modes = list(reference_cache.get().modes)
+    return SearchContext(origin=origin, destination=destination, depart_at=depart_at, modes=modes)
+
+
+# ============================================================================
+# OUTILS
+# ============================================================================
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Distance à vol d'oiseau en km, arrondie à 0,1 km (comme le frontend)"""
+    radius = 6371
+    d_lat = math.radians(lat2 - lat1)
+    d_lng = math.radians(lng2 - lng1)
+    a = (math.sin(d_lat / 2) ** 2
+         + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(d_lng / 2) ** 2)
+    return round(radius * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a)), 1)
+
+
+def is_operating(mode, at_time):
+    start, end = mode.operating_hours_start, mode.operating_hours_end
+    if start is None or end is None:
+        return True
+    if start <= end:
+        return start <= at_time <= end
+    return at_time >= start or at_time <= end
+
+
+def straight_route(origin, destination, steps=ROUTE_POINTS):
+    """Tracé simplifié [[lat, lng], ...] en ligne droite (generateRoute)"""
+    (lng1, lat1), (lng2, lat2) = origin.coordinates.coords, destination.coordinates.coords
+    return [
+        [lat1 + (lat2 - lat1) * i / steps, lng1 + (lng2 - lng1) * i / steps]
+        for i in range(steps + 1)
+    ]
+
+
+def line_route(line):
+    """Tracé [[lat, lng], ...] d'une LineString, réduit à MAX_ROUTE_POINTS points"""
+    coords = line.coords
+    step = max(1, math.ceil(len(coords) / MAX_ROUTE_POINTS))
+    points = list(coords[::step])
+    if points[-1] != coords[-1]:
+        points.append(coords[-1])
+    return [[lat, lng] for lng, lat in points]
+
+
+def mode_payload(mode):
+    return {
+        'id': mode.slug,
+        'name': mode.name,
+        'type': mode.type,
+        'icon': mode.icon,
+        'color': mode.color,
+    }
+
+
+def option_payload(mode, price, duration, distance, route, nearest_stop=None,
+                   nearest_stop_distance=0, stops=None, option_id=None):
+    option = {
+        'id': option_id or f"opt-{mode.slug}",
+        'transportMode': mode_payload(mode),
+        'price': int(round(price)),
+        'duration': int(round(duration)),
+        'distance': distance,
+        'nearestStop': nearest_stop,
+        'nearestStopDistance': int(round(nearest_stop_distance)),
+        'securityRating': mode.security_rating,
+        'comfortRating': mode.comfort_rating,
+        'route': route,
+    }
+    if stops:
+        option['stops'] = stops
+    return option
+
+
+def walking_minutes(meters):
+    return meters / 1000 / WALKING_SPEED_KMH * 60
+
+
+def tariff(mode, distance_km):
+    return float(mode.base_price) + float(mode.price_per_km) * distance_km
+
+
+def estimate_prices(ctx, modes, distances):
+    """Prix de plusieurs options en un appel au modèle (tarif TransportMode à défaut)"""
+    predictor = registry.get('fare')
+    if predictor is not None and modes:
+        prices = predictor.predict([mode.slug for mode in modes], distances, ctx.hour, ctx.day_of_week)
+        return [
+            tariff(mode, distance) if math.isnan(price) else float(price)
+            for mode, distance, price in zip(modes, distances, prices)
+        ]
+    return [tariff(mode, distance) for mode, distance in zip(modes, distances)]
+
+
+def estimate_durations(ctx, modes, distances, location_ids):
+    """Durées (minutes) de plusieurs tronçons en un appel au modèle (vitesse moyenne à défaut)"""
+    predictor = registry.get('eta')
+    fallback = [
+        distance / float(mode.average_speed) * 60 if mode.average_speed else 0
+        for mode, distance in zip(modes, distances)
+    ]
+    if predictor is not None and modes:
+        minutes = predictor.predict(
+            [mode.slug for mode in modes], distances, location_ids, ctx.hour, ctx.day_of_week
+        )
+        return [default if math.isnan(value) else float(value) for default, value in zip(fallback, minutes)]
+    return fallback
+
+
+# ============================================================================
+# FAMILLES D'OPTIONS
+# ============================================================================
+
+def nearest_stop(mode, point):
+    """Arrêt actif du mode le plus proche de `point` (StopMatch : nom, distance_m), ou None"""
+    with time_phase('access'):
+        return reference_cache.get().nearest_stop(mode.id, point)
+
+
+def direct_routes(ctx, modes):
+    """Lignes directes origine -> destination, par mode"""
+    routes = (
+        TransportRoute.objects
+        .filter(
+            is_active=True,
+            transport_mode_id__in=[mode.id for mode in modes],
+            origin_stop__location_id=ctx.origin.id,
+            destination_stop__location_id=ctx.destination.id,
+        )
+        .select_related('transport_mode', 'origin_stop', 'destination_stop')
+        .prefetch_related(Prefetch(
+            'segments',
+            queryset=RouteSegment.objects.select_related('to_stop').order_by('segment_order'),
+        ))
+    )
+    by_mode = {}
+    for route in routes:
+        wait = route.frequency_minutes / 2
+        best = by_mode.get(route.transport_mode_id)
+        if best is None or route.estimated_duration_minutes + wait < best[1]:
+            by_mode[route.transport_mode_id] = (route, route.estimated_duration_minutes + wait)
+    return {mode_id: route for mode_id, (route, _) in by_mode.items()}
+
+
+def transit_options(ctx):
+    """Bus, gbaka, train et métro : ligne directe si elle existe, estimation sinon"""
+    distance = ctx.distance_km
+    modes = [
+        mode for mode in ctx.modes_of(TRANSIT_TYPES)
+        if mode.type != 'train' or distance > TRAIN_MIN_DISTANCE_KM
+    ]
+    if not modes:
+        return []
+
+    routes = direct_routes(ctx, modes)
+    access = {mode.id: nearest_stop(mode, ctx.origin.coordinates) for mode in modes}
+    estimated = [mode for mode in modes if mode.id not in routes]
+    durations = estimate_durations(
+        ctx, estimated, [distance] * len(estimated), [ctx.origin.id] * len(estimated)
+    )
+    prices = estimate_prices(ctx, estimated, [distance] * len(estimated))
+    estimates = {mode.id: (price, duration) for mode, price, duration in zip(estimated, prices, durations)}
+
+    options = []
+    for mode in modes:
+        stop = access[mode.id]
+        stop_distance = stop.distance_m if stop is not None else 0
+        route = routes.get(mode.id)
+        if route is not None:
+            price = float(route.price)
+            duration = route.estimated_duration_minutes + route.frequency_minutes / 2
+            stops = [route.origin_stop.name] + [segment.to_stop.name for segment in route.segments.all()]
+            path = line_route(route.route_path)
+            route_distance = float(route.distance_km)
+        else:
+            price, duration = estimates[mode.id]
+            stops = None
+            path = straight_route(ctx.origin, ctx.destination)
+            route_distance = distance
+        options.append(option_payload(
+            mode,
+            price=price,
+            duration=duration + walking_minutes(stop_distance),
+            distance=route_distance,
+            route=path,
+            nearest_stop=stop.name if stop is not None else None,
+            nearest_stop_distance=stop_distance,
+            stops=stops,
+        ))
+    return options
+
+
+def road_options(ctx):
+    """Taxi et woro-woro : porte à porte, prix et durée estimés par les modèles"""
+    modes = ctx.modes_of(ROAD_TYPES)
+    if not modes:
+        return []
+    distance = ctx.distance_km
+    prices = estimate_prices(ctx, modes, [distance] * len(modes))
+    durations = estimate_durations(ctx, modes, [distance] * len(modes), [ctx.origin.id] * len(modes))
+    path = straight_route(ctx.origin, ctx.destination)
+    return [
+        option_payload(
+            mode, price=price, duration=duration, distance=distance, route=path,
+            nearest_stop='Votre position',
+        )
+        for mode, price, duration in zip(modes, prices, durations)
+    ]
+
+
+def car_rental_options(ctx):
+    """Location de voiture : agence la plus proche de l'origine"""
+    modes = ctx.modes_of(CAR_RENTAL_TYPES)
+    if not modes:
+        return []
+    agency = (
+        CarRental.objects
+        .filter(is_active=True)
+        .annotate(distance=Distance('coordinates', ctx.origin.coordinates))
+        .order_by('distance')
+        .first()
+    )
+    distance = ctx.distance_km
+    prices = estimate_prices(ctx, modes, [distance] * len(modes))
+    durations = estimate_durations(ctx, modes, [distance] * len(modes), [ctx.origin.id] * len(modes))
+    path = straight_route(ctx.origin, ctx.destination)
+    return [
+        option_payload(
+            mode, price=price, duration=duration, distance=distance, route=path,
+            nearest_stop=agency.name if agency else 'Agence de location',
+            nearest_stop_distance=agency.distance.m if agency else 0,
+        )
+        for mode, price, duration in zip(modes, prices, durations)
+    ]
+
+
+FAMILIES = {
+    'transit': transit_options,
+    'road': road_options,
+    'car_rental': car_rental_options,
+}
+
+
+def poi_payload(poi, poi_type):
+    return {
+        'id': str(poi.id),
+        'name': poi.name,
+        'type': poi_type,
+        'lat': poi.coordinates.y,
+        'lng': poi.coordinates.x,
+        'rating': float(poi.average_rating),
+        'address': poi.address,
+        'phone': str(poi.phone),
+    }
+
+
+def destination_pois(ctx):
+    """Hôtels et restaurants actifs à moins de POI_RADIUS_M de la destination"""
+    point = ctx.destination.coordinates
+    results = {}
+    for key, model, poi_type in (('hotels', Hotel, 'hotel'), ('restaurants', Restaurant, 'restaurant')):
+        queryset = (
+            model.objects
+            .filter(is_active=True, coordinates__dwithin=(point, POI_RADIUS_M / 111320))
+            .annotate(distance=Distance('coordinates', point))
+            .order_by('distance')[:POI_LIMIT]
+        )
+        results[key] = [poi_payload(poi, poi_type) for poi in queryset]
+    return results
+
+
+# ============================================================================
+# RECOMMANDATION ET ASSEMBLAGE
+# ============================================================================
+
+def recommend(options, criteria):
+    """Identifiant de l'option recommandée selon le critère (recommendRoute)"""
+    if not options:
+        return None
+    if criteria == 'fastest':
+        return min(options, key=lambda opt: opt['duration'])['id']
+    if criteria == 'cheapest':
+        return min(options, key=lambda opt: opt['price'])['id']
+    if criteria == 'safest':
+        return max(options, key=lambda opt: opt['securityRating'])['id']
+
+    max_price = max(opt['price'] for opt in options) or 1
+    max_duration = max(opt['duration'] for opt in options) or 1
+
+    def balanced_score(opt):
+        return (
+            (1 - opt['price'] / max_price)
+            + (1 - opt['duration'] / max_duration)
+            + opt['securityRating'] / 5
+            + opt['comfortRating'] / 5
+        ) / 4
+
+    return max(options, key=balanced_score)['id']
+
+
+def location_payload(location):
+    return {
+        'id': location.slug,
+        'name': location.name,
+        'type': location.type,
+        'lat': location.coordinates.y,
+        'lng': location.coordinates.x,
+    }
+
+
+def plan_route(ctx):
+    """RouteResult complet (sans recommandation : elle dépend du critère)"""
+    options = []
+    for compute in FAMILIES.values():
+        options.extend(compute(ctx))
+    result = {
+        'from': location_payload(ctx.origin),
+        'to': location_payload(ctx.destination),
+        'options': options,
+    }
+    result.update(destination_pois(ctx))
+    return result
+
+
+# ============================================================================
+# CACHE
+# ============================================================================
+
+def cache_key(origin, destination, depart_at):
+    """Une entrée par (origine, destination, heure de départ)"""
+    bucket = timezone.localtime(depart_at).strftime('%Y%m%d%H')
+    return f"route:v1:{origin.id}:{destination.id}:{bucket}"
+
+
+def plan_route_cached(origin, destination, criteria='balanced', depart_at=None, refresh=False):
+    """
+    RouteResult avec recommandation, depuis le cache si possible.
+    Renvoie (résultat, trouvé_en_cache).
+    """
+    depart_at = depart_at or timezone.now()
+    key = cache_key(origin, destination, depart_at)
+    result = None if refresh else cache.get(key)
+    hit = result is not None
+    if result is None:
+        result = plan_route(build_context(origin, destination, depart_at))
+        cache.set(key, result, settings.ROUTE_CACHE_TTL)
+    return dict(result, recommendedOption=recommend(result['options'], criteria)), hit